@@ -0,0 +1,139 @@
+"""
+Vectorized aggregation of funding results.
+
+SPARQL results come back from execute_sparql() as lists of dicts whose
+values are all strings (missing values are the literal "None"), so the
+helpers here coerce whole columns with pandas instead of looping per row.
+"""
+
+import pandas as pd
+
+DATE_FIELDS = ("date", "round_date")
+COMPANY_FIELDS = ("company_name", "name")
+
+YEARLY_COLUMNS = ["year", "total_funding", "funding_rounds", "companies_count"]
+
+
+def to_frame(results):
+    """Return results as a DataFrame (accepts a DataFrame or a list of dicts)"""
+    if isinstance(results, pd.DataFrame):
+        return results
+    if not isinstance(results, (list, tuple)):
+        # execute_sparql() returns an error string when a query fails
+        return pd.DataFrame()
+    return pd.DataFrame(list(results))
+
+
+def detect_field(df, candidates):
+    """Return the first column of df found in candidates, or None"""
+    for field in candidates:
+        if field in df.columns:
+            return field
+    return None
+
+
+def extract_years(values):
+    """
+    Vectorized equivalent of str(value)[:4] with a four-digit check
+
+    Returns a nullable integer Series; rows without a usable year are <NA>.
+    """
+    prefix = values.astype("string").str.slice(0, 4)
+    prefix = prefix.where(prefix.str.fullmatch(r"\d{4}", na=False))
+    return pd.to_numeric(prefix, errors="coerce").astype("Int64")
+
+
+def to_amounts(values):
+    """Coerce amounts to float, treating "None", "" and junk as 0"""
+    return pd.to_numeric(values, errors="coerce").fillna(0.0).astype("float64")
+
+
+def yearly_funding(results, date_field=None, amount_field="amount", company_field=None):
+    """
+    Aggregate funding records by year
+
+    Args:
+        results: List of result dicts or a DataFrame
+        date_field: Date column; detected from DATE_FIELDS when omitted
+        amount_field: Amount column; rows still count as rounds without it
+        company_field: Company column; detected from COMPANY_FIELDS when omitted
+
+    Returns:
+        DataFrame with columns year (str), total_funding, funding_rounds and
+        companies_count, sorted by year. Empty if no row has a usable date.
+    """
+    df = to_frame(results)
+    date_field = date_field or detect_field(df, DATE_FIELDS)
+    if df.empty or date_field not in df.columns:
+        return pd.DataFrame(columns=YEARLY_COLUMNS)
+
+    company_field = company_field or detect_field(df, COMPANY_FIELDS)
+
+    years = extract_years(df[date_field])
+    mask = years.notna().to_numpy()
+    if not mask.any():
+        return pd.DataFrame(columns=YEARLY_COLUMNS)
+
+    frame = pd.DataFrame({"year": years[mask].astype("int64")})
+    if amount_field in df.columns:
+        frame["amount"] = to_amounts(df[amount_field])[mask].to_numpy()
+    else:
+        frame["amount"] = 0.0
+    if company_field:
+        companies = df[company_field][mask].astype("string")
+        frame["company"] = companies.where(
+            (companies != "") & (companies != "None")
+        ).to_numpy()
+    else:
+        frame["company"] = pd.NA
+
+    grouped = frame.groupby("year", sort=True).agg(
+        total_funding=("amount", "sum"),
+        funding_rounds=("amount", "size"),
+        companies_count=("company", "nunique"),
+    )
+    grouped = grouped.reset_index()
+    grouped["year"] = grouped["year"].astype(str)
+    return grouped[YEARLY_COLUMNS]
+
+
+def yearly_funding_records(results, **kwargs):
+    """
+    Yearly aggregation as a list of dicts, the shape used in LLM prompts
+
+    Each entry has year, funding_rounds, total_funding, total_funding_millions
+    and companies_count.
+    """
+    yearly = yearly_funding(results, **kwargs)
+    return [
+        {
+            "year": row.year,
+            "funding_rounds": int(row.funding_rounds),
+            "total_funding": float(row.total_funding),
+            "total_funding_millions": float(row.total_funding) / 1000000,
+            "companies_count": int(row.companies_count),
+        }
+        for row in yearly.itertuples(index=False)
+    ]
+
+
+def yearly_totals(results, **kwargs):
+    """Return {year: total_funding} for quick lookups"""
+    yearly = yearly_funding(results, **kwargs)
+    return dict(zip(yearly["year"], yearly["total_funding"].astype(float)))
+
+
+def yearly_series(results, **kwargs):
+    """
+    Yearly aggregation as parallel typed arrays for charting
+
+    Returns a JSON-serializable dict with int year, float total_funding,
+    int funding_rounds and int companies_count lists of equal length.
+    """
+    yearly = yearly_funding(results, **kwargs)
+    return {
+        "year": yearly["year"].astype(int).tolist(),
+        "total_funding": yearly["total_funding"].astype(float).tolist(),
+        "funding_rounds": yearly["funding_rounds"].astype(int).tolist(),
+        "companies_count": yearly["companies_count"].astype(int).tolist(),
+    }
@@ -0,0 +1,250 @@
+"""
+Headless HTTP API in front of llm.process_query.
+
+Usage:
+    python api_server.py --host 0.0.0.0 --port 8080
+
+Endpoints:
+    POST /query                    body: {"question": "..."}
+    GET  /company/{name}
+    GET  /industry/{name}/trends
+    GET  /crunchbase/{name}
+
+Responses are JSON. Clients that send
+"Accept: application/vnd.apache.arrow.stream" get the tabular part of the
+response as an Arrow IPC stream instead, with the remaining fields stored as
+JSON in the schema metadata (requires pyarrow).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+# Importing llm loads the graph once; llm.store swaps in new versions in the background
+import llm
+from aggregation import yearly_funding_records, yearly_series
+from company_comparison import get_company_details, get_funding_history
+from crunchbase import find_company, load_organizations
+from singleflight import normalize_question
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+
+class InFlightRequests:
+    """Lets identical concurrent requests await one shared computation"""
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def run(self, key, coro_factory):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # Shield so one client disconnecting doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+
+def wants_arrow(request):
+    return ARROW_MIME in request.headers.get("Accept", "")
+
+
+def respond(request, payload, table_key=None, status=200):
+    """Serialize payload as JSON, or as Arrow when the client asks for it (errors stay JSON)"""
+    if table_key is None or status >= 400 or not wants_arrow(request):
+        return web.json_response(payload, status=status, dumps=_dumps)
+
+    if pa is None:
+        return web.json_response(
+            {"error": "Arrow responses require pyarrow"}, status=406
+        )
+
+    table = pa.Table.from_pylist(payload.get(table_key) or [])
+    rest = {key: value for key, value in payload.items() if key != table_key}
+    table = table.replace_schema_metadata({"payload": _dumps(rest)})
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return web.Response(body=sink.getvalue(), status=status, content_type=ARROW_MIME)
+
+
+def _dumps(obj):
+    return json.dumps(obj, default=str)
+
+
+def _frame_records(df):
+    """DataFrame to JSON-safe records (NaN becomes null)"""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+async def run_blocking(request, func, *args):
+    """Run blocking work on the shared worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app["executor"], func, *args)
+
+
+def _answer_question(question):
+    # Each request gets its own chat history so concurrent conversations
+    # don't interleave in the shared module-level one
+    response = llm.process_query(question, llm.new_chat_history())
+    try:
+        return json.loads(response), 200
+    except json.JSONDecodeError:
+        return {"error": response}, 502
+
+
+async def handle_query(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        # Malformed JSON or not UTF-8
+        return web.json_response({"error": "Body must be JSON"}, status=400)
+    if not isinstance(body, dict):
+        return web.json_response({"error": "Body must be a JSON object"}, status=400)
+
+    question = body.get("question")
+    if not isinstance(question, str) or not question.strip():
+        return web.json_response(
+            {"error": "'question' must be a non-empty string"}, status=400
+        )
+    question = question.strip()
+
+    payload, status = await request.app["in_flight"].run(
+        ("query", normalize_question(question), llm.store.version),
+        lambda: run_blocking(request, _answer_question, question),
+    )
+    return respond(request, payload, table_key="raw_results", status=status)
+
+
+def _company_profile(company_name):
+    graph = llm.store.graph
+    details = get_company_details(graph, company_name)
+    if not details:
+        return None
+
+    history = [
+        {
+            "date": str(event.date) if event.date else None,
+            "phase": str(event.phase) if event.phase else None,
+            "amount": float(event.amount) if event.amount else None,
+        }
+        for event in get_funding_history(graph, company_name)
+    ]
+    return {
+        "company_name": company_name,
+        "industry": str(details.industry_name) if details.industry_name else None,
+        "location": str(details.location_name) if details.location_name else None,
+        "funding_rounds": int(details.funding_rounds),
+        "total_funding": float(details.total_funding) if details.total_funding else 0,
+        "funding_history": history,
+    }
+
+
+async def handle_company(request):
+    name = request.match_info["name"]
+    profile = await run_blocking(request, _company_profile, name)
+    if profile is None:
+        return web.json_response({"error": f"Company {name} not found"}, status=404)
+    return respond(request, profile, table_key="funding_history")
+
+
+def _industry_trends(industry_name):
+    results = llm.execute_sparql(llm.industry_funding_query(industry_name))
+    if not isinstance(results, list):
+        # execute_sparql returns the error message of a failed query
+        return {"error": str(results)}, 502
+    return {
+        "industry": industry_name,
+        "total_results": len(results),
+        "yearly_trends": yearly_funding_records(results),
+        "series": yearly_series(results),
+    }, 200
+
+
+async def handle_industry_trends(request):
+    industry_name = llm.normalize_industry_name(request.match_info["name"])
+    payload, status = await request.app["in_flight"].run(
+        ("industry", industry_name, llm.store.version),
+        lambda: run_blocking(request, _industry_trends, industry_name),
+    )
+    return respond(request, payload, table_key="yearly_trends", status=status)
+
+
+def _crunchbase_profile(company_name):
+    org, rounds = find_company(company_name)
+    if org is None:
+        return None
+    return {
+        "organization": json.loads(org.to_json(date_format="iso")),
+        "funding_rounds": _frame_records(rounds),
+    }
+
+
+async def handle_crunchbase(request):
+    name = request.match_info["name"]
+    try:
+        profile = await run_blocking(request, _crunchbase_profile, name)
+    except FileNotFoundError as e:
+        return web.json_response({"error": str(e)}, status=503)
+    if profile is None:
+        return web.json_response({"error": f"Company {name} not found"}, status=404)
+    return respond(request, profile, table_key="funding_rounds")
+
+
+async def warm_up(app):
+    """Load the Crunchbase names before the first request needs them"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(app["executor"], load_organizations)
+    except FileNotFoundError as e:
+        print(f"Crunchbase data not available: {e}")
+
+
+async def shutdown(app):
+    app["executor"].shutdown(wait=False)
+
+
+def create_app(workers=None):
+    app = web.Application()
+    app["executor"] = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4)
+    app["in_flight"] = InFlightRequests()
+
+    app.router.add_post("/query", handle_query)
+    app.router.add_get("/company/{name}", handle_company)
+    app.router.add_get("/industry/{name}/trends", handle_industry_trends)
+    app.router.add_get("/crunchbase/{name}", handle_crunchbase)
+
+    app.on_startup.append(warm_up)
+    app.on_cleanup.append(shutdown)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup funding HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker threads for queries (default: number of CPU cores)",
+    )
+    args = parser.parse_args()
+
+    print(f"Graph loaded with {len(llm.store.graph)} triples")
+    web.run_app(create_app(args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,28 @@
 import streamlit as st
 import json
-from llm import process_query, chat_history
+from llm import process_query, chat_history, store as graph_store
 import pandas as pd
 import matplotlib.pyplot as plt
-import re
 import os
 from web_scrapper import download_sogc_data
-import PyPDF2
-import tempfile
+from driver_pool import DriverPool
+from sogc_cache import SOGCCache
+from startups_db import StartupRepository
+from sogc_http import latest_publication_date
+from aggregation import yearly_totals
+from company_index import CompanyIndex
+from crunchbase import find_company
+from pdf_text import extract_text
+from sogc_records import (
+    BoardMember,
+    CapitalChange,
+    Liquidation,
+    RegistryEvent,
+    parse_text,
+    record_from_dict,
+    record_to_dict,
+    save_records,
+)
 
 st.set_page_config(
     page_title="Startup Funding SPARQL Query System", page_icon="📊", layout="wide"
@@ -47,93 +62,131 @@ with st.sidebar:
     st.write(", ".join(industries))
 
 
-# Function to get UID from the database based on company name
-def get_company_uid(company_name):
-    # This is a placeholder function
-    # In a real implementation, you would search your database for the UID
-    # For demo purposes, we'll use a hardcoded mapping
-    company_uid_map = {
-        "swissdrones": "CHE-236.101.881",
-        "climeworks": "CHE-215.350.964",
-        # Add more mappings as needed
-    }
+# Relational lookups answered from startups_clean.db
+@st.cache_resource
+def get_repository():
+    return StartupRepository()
 
-    # Normalize company name for lookup
-    normalized_name = company_name.lower().strip()
 
-    # Check if we have a direct match
-    for company, uid in company_uid_map.items():
-        if company in normalized_name or normalized_name in company:
-            return uid
+# Company titles and UIDs of companies.csv, for when the database is missing
+@st.cache_resource
+def get_company_codes():
+    companies = pd.read_csv("companies.csv", usecols=["Code", "Title"]).dropna()
+    codes = dict(zip(companies["Title"], companies["Code"]))
+    return CompanyIndex.from_names(codes), codes
 
-    # Return a default UID if company not found
-    return "CHE-215.350.964"  # Default to Climeworks as an example
 
+# Function to get UID from the database based on company name
+def get_company_uid(company_name):
+    repository = get_repository()
+    if repository.available():
+        return repository.company_uid(company_name)
+    # Same matching as the database lookup, over companies.csv
+    titles, codes = get_company_codes()
+    title = titles.resolve(company_name.strip())
+    return codes[title].upper() if title is not None else None
 
-# Function to extract text from PDF file
-def extract_text_from_pdf(pdf_path):
-    try:
-        with open(pdf_path, "rb") as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
-    except Exception as e:
-        return f"Error extracting text from PDF: {str(e)}"
 
+# Keep one warm browser per server process for SOGC lookups
+@st.cache_resource
+def get_driver_pool():
+    return DriverPool(size=1)
 
-# Function to summarize PDF content using LLM
-def summarize_pdf_content(text, company_name):
-    # In a real implementation, you would call your LLM here
-    # For demo purposes, we'll return a simple summary
-
-    # Here you could use the same process_query function or a different LLM function
-    # For now, we'll create a placeholder summary
-    summary = f"""
-    ## SOGC Registry Information for {company_name}
-    
-    The Swiss Official Gazette of Commerce (SOGC) report for this company includes:
-    
-    - Registration information and legal status
-    - Company formation details
-    - Management and board members
-    - Official legal notices
-    
-    The full document contains {len(text)} characters of information from the official registry.
-    """
-    return summary
 
+# Downloaded SOGC documents and their text survive across reruns and sessions
+@st.cache_resource
+def get_sogc_cache():
+    return SOGCCache("sogc_cache")
 
-# Function to get company data from Crunchbase
-def get_crunchbase_data(company_name):
-    try:
-        # Load organizations data
-        orgs_path = "data_csv/crunchbase/organizations.csv"
-        orgs_df = pd.read_csv(orgs_path)
 
-        # Normalize company name and search
-        normalized_name = company_name.lower().strip()
+# Function to extract text from PDF file, page by page on a process pool
+def extract_text_from_pdf(pdf_path, on_page=None):
+    return extract_text(
+        pdf_path, cache_dir=os.path.join("sogc_cache", "pages"), on_page=on_page
+    )
 
-        # Search for company in the name field (case-insensitive)
-        matched_orgs = orgs_df[
-            orgs_df["name"].str.lower().str.contains(normalized_name, na=False)
-        ]
 
-        if matched_orgs.empty:
-            return None, None
+def stream_pages_to(placeholder):
+    """on_page callback that previews pages in a placeholder as they arrive"""
+    preview = {"text": ""}
+
+    def on_page(page):
+        # Only the first 5000 characters are ever shown
+        if len(preview["text"]) < 5000:
+            preview["text"] = (preview["text"] + page.text)[:5000]
+        placeholder.text(
+            f"Parsed page {page.number} of {page.total}\n\n" + preview["text"]
+        )
+
+    return on_page
+
+
+def get_sogc_document(uid, on_page=None):
+    """Cached SOGC document for a UID, downloading it only when needed"""
+    return get_sogc_cache().fetch(
+        uid,
+        lambda uid, download_dir: download_sogc_data(
+            uid=uid,
+            output_format="pdf",
+            download_dir=download_dir,
+            pool=get_driver_pool(),
+        ),
+        extract_text=lambda pdf_path: extract_text_from_pdf(pdf_path, on_page),
+        parse=lambda text: {
+            "records": [record_to_dict(r) for r in parse_text(text, uid)]
+        },
+        latest_date=latest_publication_date,
+    )
 
-        # Get the first matching organization
-        org = matched_orgs.iloc[0]
 
-        # Load funding rounds data for this company
-        rounds_path = "data_csv/crunchbase/funding_rounds.csv"
-        rounds_df = pd.read_csv(rounds_path)
+# Function to summarize PDF content using LLM
+def summarize_pdf_content(text, company_name, records=()):
+    publications = [r for r in records if isinstance(r, RegistryEvent)]
+    capital = [r for r in records if isinstance(r, CapitalChange)]
+    liquidations = [r for r in records if isinstance(r, Liquidation)]
+
+    # Board as of the latest publication: people who joined and did not leave later
+    board = {}
+    for member in sorted(
+        (r for r in records if isinstance(r, BoardMember)), key=lambda r: r.date
+    ):
+        if member.change == "joined":
+            board[member.name] = member.role
+        else:
+            board.pop(member.name, None)
+
+    lines = [
+        f"## SOGC Registry Information for {company_name}",
+        "",
+        f"- Publications found: {len(publications)}",
+    ]
+    if publications:
+        latest = max(publications, key=lambda r: r.date)
+        lines.append(f"- Latest publication: {latest.date or 'unknown date'} ({latest.event})")
+    if capital:
+        latest_capital = max(capital, key=lambda r: r.date)
+        lines.append(
+            f"- Capital: {latest_capital.currency} {latest_capital.amount:,.2f}"
+            f" (as of {latest_capital.date or 'unknown date'})"
+        )
+    if board:
+        lines.append(f"- Board and officers: {len(board)}")
+        lines.extend(f"  - {name}" + (f", {role}" if role else "") for name, role in board.items())
+    if liquidations:
+        status = max(liquidations, key=lambda r: r.date).status.replace("_", " ")
+        lines.append(f"- Legal status: {status}")
+    lines.append("")
+    lines.append(
+        f"The full document contains {len(text)} characters of information from the official registry."
+    )
+    summary = "\n".join(lines)
+    return summary
 
-        # Filter funding rounds for this company
-        org_rounds = rounds_df[rounds_df["org_uuid"] == org["uuid"]]
 
-        return org, org_rounds
+# Function to get company data from Crunchbase
+def get_crunchbase_data(company_name):
+    try:
+        return find_company(company_name)
     except Exception as e:
         st.error(f"Error loading Crunchbase data: {str(e)}")
         return None, None
@@ -304,34 +357,47 @@ if sogc_button:
             # Get UID for the company
             uid = get_company_uid(company_name)
 
-            st.info(f"Searching SOGC registry for company UID: {uid}")
-
-            # Create a temporary directory for downloads
-            with tempfile.TemporaryDirectory() as download_dir:
-                # Download SOGC data
-                download_sogc_data(
-                    uid=uid, output_format="pdf", download_dir=download_dir
-                )
+            if uid is None:
+                st.error(f"No company matching '{company_name}' found")
+            else:
+                st.info(f"Searching SOGC registry for company UID: {uid}")
+
+                # Show the first pages while the rest of a new document is parsed
+                page_preview = st.empty()
+                try:
+                    document = get_sogc_document(uid, stream_pages_to(page_preview))
+                except Exception as e:
+                    print(f"SOGC lookup failed for {uid}: {e}")
+                    document = None
+                page_preview.empty()
+
+                if document is not None:
+                    pdf_text = document.text
+                    if "records" in document.fields:
+                        records = [record_from_dict(r) for r in document.fields["records"]]
+                    else:
+                        records = parse_text(pdf_text, uid)
 
-                # Check if the PDF was downloaded
-                pdf_path = os.path.join(download_dir, f"{uid}.pdf")
-                if os.path.exists(pdf_path):
-                    # Extract text from PDF
-                    pdf_text = extract_text_from_pdf(pdf_path)
+                    # Make the registry events queryable from the chat as well
+                    if records:
+                        save_records(records)
+                        # Load the rewritten sogc_graph.ttl into a new snapshot now
+                        # instead of waiting for the watcher
+                        graph_store.refresh()
 
                     # Summarize PDF content
-                    summary = summarize_pdf_content(pdf_text, company_name)
+                    summary = summarize_pdf_content(pdf_text, company_name, records)
 
                     # Display summary
                     st.subheader(f"SOGC Registry Information for '{company_name}'")
+                    if document.publication_date:
+                        st.caption(f"Latest publication: {document.publication_date}")
                     st.markdown(summary)
 
                     # Option to view raw PDF text
                     with st.expander("View raw PDF text"):
                         st.text(
-                            pdf_text[:5000] + "..."
-                            if len(pdf_text) > 5000
-                            else pdf_text
+                            pdf_text[:5000] + "..." if len(pdf_text) > 5000 else pdf_text
                         )
                 else:
                     st.error(
@@ -454,21 +520,10 @@ if st.button("Process Query") or query:
                                         )
 
                                         # Create a year-based dictionary of company funding
-                                        company_yearly_funding = {}
-                                        for round_data in company_data[
-                                            "funding_rounds"
-                                        ]:
-                                            if round_data.get("date"):
-                                                year = str(round_data["date"])[:4]
-                                                if year.isdigit() and len(year) == 4:
-                                                    if (
-                                                        year
-                                                        not in company_yearly_funding
-                                                    ):
-                                                        company_yearly_funding[year] = 0
-                                                    company_yearly_funding[year] += (
-                                                        round_data.get("amount", 0)
-                                                    )
+                                        company_yearly_funding = yearly_totals(
+                                            company_data["funding_rounds"],
+                                            date_field="date",
+                                        )
 
                                         # Create dataframe for visualization
                                         industry_df = pd.DataFrame(industry_trends)
@@ -669,166 +724,49 @@ if st.button("Process Query") or query:
                     else:
                         st.header("Visualizations")
 
-                        # Check if this appears to be trend data with years
-                        year_pattern = re.compile(r"20\d\d")
-
-                        # Function to extract trend data from LLM analysis
-                        def extract_trend_data(analysis_text):
-                            years = []
-                            funding_amounts = []
-
-                            # Look for years followed by funding data
-                            lines = analysis_text.split("\n")
-                            for line in lines:
-                                if year_pattern.search(line) and (
-                                    "funding" in line.lower()
-                                    or "amount" in line.lower()
-                                    or "CHF" in line
-                                    or "million" in line
-                                ):
-                                    # Try to extract year and amount
-                                    year_match = year_pattern.search(line)
-                                    if year_match:
-                                        year = year_match.group(0)
-
-                                        # Look for funding amount (numbers followed by M, million, or CHF)
-                                        amount_pattern = re.compile(
-                                            r"(\d+\.?\d*)\s*(million|M|CHF|million CHF)"
-                                        )
-                                        amount_match = amount_pattern.search(line)
-
-                                        if amount_match:
-                                            amount = float(amount_match.group(1))
-                                            # If in millions, convert to absolute value
-                                            if "million" in amount_match.group(
-                                                2
-                                            ) or "M" in amount_match.group(2):
-                                                amount = amount * 1000000
+                        # Yearly series precomputed by process_query's aggregation stage
+                        series = response_data.get("series") or {}
 
-                                            years.append(year)
-                                            funding_amounts.append(amount)
+                        if series.get("year"):
+                            years = [str(year) for year in series["year"]]
+                            funding_amounts = series["total_funding"]
 
-                            return years, funding_amounts
-
-                        # Extract yearly funding from the raw results if available
-                        if (
-                            "raw_results" in response_data
-                            and len(response_data["raw_results"]) > 0
-                        ):
-                            # Check if raw results have date and amount
-                            has_date = any(
-                                "date" in item or "round_date" in item
-                                for item in response_data["raw_results"]
-                            )
-                            has_amount = any(
-                                "amount" in item
-                                for item in response_data["raw_results"]
+                            # Display message about data shown
+                            st.info(
+                                f"Visualizing {sum(series['funding_rounds'])} dated records out of {response_data['total_results']} total results."
                             )
 
-                            if has_date and has_amount:
-                                # Process by extracting year from date
-                                df = pd.DataFrame(response_data["raw_results"])
-
-                                # Display message about data shown
-                                st.info(
-                                    f"Visualizing data from {len(df)} records out of {response_data['total_results']} total results."
-                                )
-
-                                # Determine which column has date info
-                                date_col = (
-                                    "date" if "date" in df.columns else "round_date"
-                                )
-
-                                # Extract year and convert amount to float where possible
-                                yearly_data = {}
-
-                                for _, row in df.iterrows():
-                                    if (
-                                        pd.notna(row[date_col])
-                                        and row[date_col] != "None"
-                                    ):
-                                        year = str(row[date_col])[:4]  # Extract year
-
-                                        if year.isdigit() and len(year) == 4:
-                                            if year not in yearly_data:
-                                                yearly_data[year] = 0
-
-                                            # Add amount if available
-                                            if (
-                                                "amount" in row
-                                                and pd.notna(row["amount"])
-                                                and row["amount"] != "None"
-                                            ):
-                                                try:
-                                                    amount = float(row["amount"])
-                                                    yearly_data[year] += amount
-                                                except ValueError:
-                                                    pass
-
-                                if yearly_data:
-                                    years = list(yearly_data.keys())
-                                    years.sort()
-                                    funding_amounts = [
-                                        yearly_data[year] for year in years
-                                    ]
-
-                                    fig, ax = plt.subplots(figsize=(10, 6))
-                                    ax.bar(years, funding_amounts)
-                                    ax.set_title("Funding by Year")
-                                    ax.set_xlabel("Year")
-                                    ax.set_ylabel("Amount (CHF)")
-
-                                    # Format y-axis labels in millions
-                                    ax.yaxis.set_major_formatter(
-                                        lambda x, pos: f"{x / 1000000:.1f}M"
-                                    )
-
-                                    plt.xticks(rotation=45)
-                                    st.pyplot(fig)
-
-                                    # Create a table showing the data
-                                    st.subheader("Yearly Funding Data")
-                                    yearly_df = pd.DataFrame(
-                                        {
-                                            "Year": years,
-                                            "Total Funding (CHF)": funding_amounts,
-                                            "Total Funding (Millions CHF)": [
-                                                amount / 1000000
-                                                for amount in funding_amounts
-                                            ],
-                                        }
-                                    )
-                                    st.dataframe(yearly_df, use_container_width=True)
-                                else:
-                                    # If no structured data, try to extract from LLM analysis
-                                    years, funding_amounts = extract_trend_data(
-                                        response_data["llm_analysis"]
-                                    )
+                            fig, ax = plt.subplots(figsize=(10, 6))
+                            ax.bar(years, funding_amounts)
+                            ax.set_title("Funding by Year")
+                            ax.set_xlabel("Year")
+                            ax.set_ylabel("Amount (CHF)")
 
-                                    if years and funding_amounts:
-                                        fig, ax = plt.subplots(figsize=(10, 6))
-                                        ax.bar(years, funding_amounts)
-                                        ax.set_title(
-                                            "Funding by Year (Extracted from Analysis)"
-                                        )
-                                        ax.set_xlabel("Year")
-                                        ax.set_ylabel("Amount (CHF)")
-
-                                        # Format y-axis labels in millions
-                                        ax.yaxis.set_major_formatter(
-                                            lambda x, pos: f"{x / 1000000:.1f}M"
-                                        )
+                            # Format y-axis labels in millions
+                            ax.yaxis.set_major_formatter(
+                                lambda x, pos: f"{x / 1000000:.1f}M"
+                            )
 
-                                        plt.xticks(rotation=45)
-                                        st.pyplot(fig)
-                                    else:
-                                        st.info(
-                                            "No time series data available for visualization."
-                                        )
-                            else:
-                                st.info(
-                                    "This query doesn't contain time series data that can be visualized."
-                                )
+                            plt.xticks(rotation=45)
+                            st.pyplot(fig)
+
+                            # Create a table showing the data
+                            st.subheader("Yearly Funding Data")
+                            yearly_df = pd.DataFrame(
+                                {
+                                    "Year": years,
+                                    "Total Funding (CHF)": funding_amounts,
+                                    "Total Funding (Millions CHF)": [
+                                        amount / 1000000 for amount in funding_amounts
+                                    ],
+                                    "Number of Rounds": series["funding_rounds"],
+                                }
+                            )
+                            st.dataframe(yearly_df, use_container_width=True)
+                        elif response_data.get("raw_results"):
+                            st.info(
+                                "This query doesn't contain time series data that can be visualized."
+                            )
                         else:
                             st.info("No results available for visualization.")
 
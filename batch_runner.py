@@ -0,0 +1,184 @@
+"""
+Run many natural language questions through llm.process_query.
+
+Questions are read from a text file (one per line, # starts a comment) or a
+JSONL file with a "question" field. Duplicates are dropped, questions run on
+a bounded thread pool against the one graph loaded by llm, and LLM calls are
+rate limited. Every answer is appended to a JSONL file as soon as it is ready;
+that file doubles as the checkpoint, so rerunning the same command skips
+questions that already succeeded.
+
+Usage:
+    python batch_runner.py questions.txt -o results.jsonl --parquet results.parquet
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import llm
+from rate_limit import RateLimiter
+from singleflight import normalize_question
+
+
+def read_questions(path):
+    """Read questions from a .txt or .jsonl file, dropping duplicates"""
+    questions = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                line = json.loads(line).get("question", "").strip()
+                if not line:
+                    continue
+            key = normalize_question(line)
+            if key not in seen:
+                seen.add(key)
+                questions.append(line)
+    return questions
+
+
+def load_checkpoint(output_path):
+    """Return {normalized question: record} for questions already answered"""
+    done = {}
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            # Valid JSON that is not a result record is skipped the same way
+            if not isinstance(record, dict) or not isinstance(record.get("question"), str):
+                continue
+            if record.get("status") == "ok":
+                done[normalize_question(record["question"])] = record
+    return done
+
+
+def answer_question(question):
+    """Run one question and return its result record"""
+    start = time.time()
+    response = llm.process_query(question, llm.new_chat_history())
+    record = {"question": question, "elapsed_seconds": round(time.time() - start, 2)}
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError:
+        record.update({"status": "error", "error": response})
+        return record
+
+    record.update(
+        {
+            "status": "ok",
+            "query": data.get("query"),
+            "total_results": data.get("total_results"),
+            "llm_analysis": data.get("llm_analysis"),
+            "series": data.get("series"),
+            "raw_results": data.get("raw_results"),
+        }
+    )
+    return record
+
+
+def write_parquet(output_path, parquet_path):
+    """Convert the JSONL results into a Parquet table (requires pyarrow)"""
+    import pandas as pd
+
+    records = list(load_checkpoint(output_path).values())
+    df = pd.DataFrame(
+        [
+            {
+                "question": r["question"],
+                "query": r.get("query"),
+                "total_results": r.get("total_results"),
+                "llm_analysis": r.get("llm_analysis"),
+                "series": json.dumps(r.get("series")),
+                "raw_results": json.dumps(r.get("raw_results")),
+                "elapsed_seconds": r.get("elapsed_seconds"),
+            }
+            for r in records
+        ]
+    )
+    df.to_parquet(parquet_path, index=False)
+    print(f"Wrote {len(df)} results to {parquet_path}")
+
+
+def run_batch(questions, output_path, concurrency=4, requests_per_minute=60):
+    """
+    Answer questions concurrently, appending results to output_path
+
+    Returns:
+        Tuple of (answered, failed, skipped) counts
+    """
+    done = load_checkpoint(output_path)
+    pending = [q for q in questions if normalize_question(q) not in done]
+    skipped = len(questions) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} questions already answered in {output_path}")
+
+    llm.rate_limiter = RateLimiter(requests_per_minute, per=60.0)
+    write_lock = threading.Lock()
+    answered = failed = 0
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(answer_question, q): q for q in pending}
+            for i, future in enumerate(as_completed(futures), 1):
+                question = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {"question": question, "status": "error", "error": str(e)}
+
+                with write_lock:
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+
+                if record["status"] == "ok":
+                    answered += 1
+                else:
+                    failed += 1
+                print(f"[{i}/{len(pending)}] {record['status']}: {question}")
+
+    return answered, failed, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a batch of questions")
+    parser.add_argument("questions", help="Questions file (.txt or .jsonl)")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl")
+    parser.add_argument("--parquet", help="Also write the results as Parquet")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="Questions in flight at once"
+    )
+    parser.add_argument(
+        "--rpm", type=float, default=60, help="Maximum LLM requests per minute"
+    )
+    args = parser.parse_args()
+
+    questions = read_questions(args.questions)
+    print(f"Loaded {len(questions)} unique questions from {args.questions}")
+
+    start = time.time()
+    answered, failed, skipped = run_batch(
+        questions, args.output, args.concurrency, args.rpm
+    )
+    print(
+        f"Done in {time.time() - start:.1f}s: {answered} answered, "
+        f"{failed} failed, {skipped} skipped"
+    )
+
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Incremental ingest of new and changed startupticker rows.
+
+Operators append rows to deals.csv and companies.csv. Instead of reloading
+everything, `python cdc.py` compares every row with the hash recorded for
+its key (deal Id; company Code, or Title when a company has no Code) and,
+in a single SQLite transaction:
+
+- upserts the new and changed rows into the startupticker tables, converted
+  with the data dictionary types database.py recorded,
+- records the RDF triples to remove and add in _rdf_delta,
+- refreshes the company_funding aggregate of the affected companies and
+  the investor tables,
+- bumps the data version.
+
+The new version is then published in data_version.json. Running processes
+poll that file and apply the delta to a copy of their graph
+(apply_graph_changes, see graph_store.py) instead of reparsing
+startups_graph.ttl; SQLite readers see the rows as soon as they commit.
+
+The first run records the current rows without producing a delta, so
+startups_graph.ttl must have been built from the same CSV files by
+rdf_converter.py; the run fails if the graph lacks the res:deal-<Id> node
+of a deal. `python cdc.py --compact` folds the delta into
+startups_graph.ttl so new processes start from an up to date file.
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+from rdflib import Graph
+from rdflib.util import from_n3
+
+import database
+import rdf_converter
+from data_lake import LAKE_DIR, export, source_path
+from investors import investor_names
+from startups_db import COMPANIES, DB_PATH, DEALS, refresh_company_funding, refresh_investors
+
+VERSION_FILE = "data_version.json"
+GRAPH_PATH = "startups_graph.ttl"
+
+# SQLite table -> (data_lake table, key column, triples of one row)
+SOURCES = {
+    COMPANIES: ("companies", "Code", rdf_converter.company_triples),
+    DEALS: ("deals", "Id", rdf_converter.deal_triples),
+}
+
+
+def _connect(db_path):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found, run database.py first")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _cdc_rows "
+        "(table_name TEXT, key TEXT, hash TEXT, row TEXT, PRIMARY KEY (table_name, key))"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS _rdf_delta (version INTEGER, op TEXT, s TEXT, p TEXT, o TEXT)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx__rdf_delta_version ON _rdf_delta (version)")
+    conn.execute("CREATE TABLE IF NOT EXISTS _cdc_meta (name TEXT PRIMARY KEY, value INTEGER)")
+    return conn
+
+
+def _meta(conn, name):
+    row = conn.execute("SELECT value FROM _cdc_meta WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_meta(conn, name, value):
+    conn.execute("INSERT OR REPLACE INTO _cdc_meta VALUES (?, ?)", (name, value))
+
+
+def _row_key(table, row):
+    key_column = SOURCES[table][1]
+    if row.get(key_column) is not None:
+        return str(row[key_column]).strip()
+    if table == COMPANIES and row.get("Title") is not None:
+        return "title:" + str(row["Title"]).strip()
+    return None
+
+
+def read_rows(table):
+    """{key: row dict} of a table's CSV; rows without a key are skipped"""
+    df = pd.read_csv(source_path(SOURCES[table][0]))
+    df = df.astype(object).where(df.notna(), None)
+    rows = {}
+    skipped = 0
+    for row in df.to_dict("records"):
+        key = _row_key(table, row)
+        if key is None:
+            skipped += 1
+            continue
+        rows[key] = row
+    if skipped:
+        print(f"{table}: {skipped} rows without a key ignored")
+    return rows
+
+
+def _hash(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def detect_changes(conn, table, rows):
+    """[(key, previous row or None, row)] for new and changed rows"""
+    known = {
+        key: (digest, stored)
+        for key, digest, stored in conn.execute(
+            "SELECT key, hash, row FROM _cdc_rows WHERE table_name = ?", (table,)
+        )
+    }
+    changes = []
+    for key, row in rows.items():
+        previous = known.get(key)
+        if previous is None:
+            changes.append((key, None, row))
+        elif previous[0] != _hash(row):
+            changes.append((key, json.loads(previous[1]), row))
+    return changes
+
+
+def _conversion_plan(conn, table):
+    plan = database.stored_conversion_plan(conn, table)
+    if plan:
+        return plan
+    # Databases loaded before the plan was recorded: read it from the workbook
+    file, _, desc_sheet = database.sheets_to_process[table]
+    workbook = database.open_workbook(file)
+    try:
+        return database.build_conversion_plan(pd.concat(database.iter_sheet_chunks(workbook, desc_sheet)))
+    finally:
+        workbook.close()
+
+
+def _converted(frame, plan, column):
+    if column in plan:
+        return plan[column](frame[column])
+    return frame[column]
+
+
+def _upsert(conn, table, changes, plan):
+    """Replace the rows of the changed keys; returns the affected company names"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({database._quote(table)})")]
+    frame = pd.DataFrame([row for _, _, row in changes], columns=columns)
+    frame = frame.assign(**{c: _converted(frame, plan, c) for c in columns})
+
+    key_column = SOURCES[table][1]
+    keys = frame[key_column].astype(object).where(frame[key_column].notna(), None)
+    titles = frame["Title"] if "Title" in frame else keys
+    companies = set()
+    for value, title in zip(keys, titles):
+        if value is None:
+            # Companies without a UID are identified by their name
+            where, params = f"{database._quote(key_column)} IS NULL AND Title = ?", (title,)
+        else:
+            where, params = f"{database._quote(key_column)} = ?", (value,)
+        if table == DEALS:
+            # Companies of the replaced rows need their aggregates refreshed too
+            companies.update(
+                company for (company,) in conn.execute(
+                    f"SELECT Company FROM {DEALS} WHERE {where}", params
+                ) if company is not None
+            )
+        conn.execute(f"DELETE FROM {database._quote(table)} WHERE {where}", params)
+    placeholders = ", ".join("?" * len(columns))
+    conn.executemany(
+        f"INSERT INTO {database._quote(table)} VALUES ({placeholders})", database._sql_rows(frame)
+    )
+
+    if table == DEALS:
+        companies.update(frame["Company"].dropna())
+    return companies
+
+
+def _graph_delta(table, changes, rows):
+    """(removals, additions) for the changed rows; rows are all current rows"""
+    triples = SOURCES[table][2]
+    # Shared nodes of the old rows that no current row uses any more
+    live = None
+    if table == DEALS:
+        # Name investors the way rdf_converter.build_graph does
+        names = investor_names(row.get("Investors") for row in rows.values())
+        triples = functools.partial(triples, investor_names=names)
+        live = {rdf_converter.investor_node(key) for key in names}
+    removals, additions = set(), set()
+    for _, old, new in changes:
+        old_own, old_shared = (set(part) for part in triples(old)) if old else (set(), set())
+        new_own, new_shared = triples(new)
+        removals |= old_own - set(new_own)
+        if live is not None:
+            removals |= {t for t in old_shared if t[0] not in live}
+        # Shared nodes may already exist; adding them again is a no-op
+        additions |= (set(new_own) - old_own) | set(new_shared)
+    return removals, additions
+
+
+def check_baseline_graph(deal_rows, graph_path=GRAPH_PATH):
+    """Raise ValueError unless graph_path has the node of every deal in deal_rows"""
+    if not os.path.exists(graph_path):
+        raise ValueError(f"{graph_path} not found, run rdf_converter.py first")
+    graph = Graph()
+    graph.parse(graph_path, format="turtle")
+    missing = 0
+    for row in deal_rows.values():
+        own, _ = rdf_converter.deal_triples(row)
+        if own and own[0] not in graph:
+            missing += 1
+    if missing:
+        raise ValueError(
+            f"{graph_path} lacks the res:deal-<Id> nodes of {missing} deals; "
+            "rebuild it with rdf_converter.py from the same CSV files before the first cdc.py run"
+        )
+
+
+def ingest(tables=None, db_path=DB_PATH, version_file=VERSION_FILE, graph_path=GRAPH_PATH):
+    """
+    Apply new and changed CSV rows to SQLite, the RDF delta and the aggregates
+
+    Returns the data version after the run (unchanged if nothing changed).
+    """
+    started = time.perf_counter()
+    conn = _connect(db_path)
+    try:
+        with conn:
+            version = _meta(conn, "version")
+            baseline = conn.execute("SELECT 1 FROM _cdc_rows LIMIT 1").fetchone() is None
+            changes, rows = {}, {}
+            for table in tables or SOURCES:
+                rows[table] = read_rows(table)
+                table_changes = detect_changes(conn, table, rows[table])
+                if table_changes:
+                    changes[table] = table_changes
+            if not changes:
+                print(f"No changes (version {version})")
+                return version
+            if baseline:
+                # The delta of later runs edits the deal nodes of this graph
+                check_baseline_graph(rows.get(DEALS) or read_rows(DEALS), graph_path)
+
+            version += 1
+            companies = set()
+            for table, table_changes in changes.items():
+                companies |= _upsert(conn, table, table_changes, _conversion_plan(conn, table))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO _cdc_rows VALUES (?, ?, ?, ?)",
+                    [
+                        (table, key, _hash(row), json.dumps(row, default=str))
+                        for key, _, row in table_changes
+                    ],
+                )
+                if not baseline:
+                    removals, additions = _graph_delta(table, table_changes, rows[table])
+                    conn.executemany(
+                        "INSERT INTO _rdf_delta VALUES (?, ?, ?, ?, ?)",
+                        [(version, op, s.n3(), p.n3(), o.n3())
+                         for op, delta in (("-", removals), ("+", additions))
+                         for s, p, o in delta],
+                    )
+                print(f"{table}: {len(table_changes)} new or changed rows")
+            refresh_company_funding(conn, companies)
+            if DEALS in changes:
+                refresh_investors(conn)
+
+            _set_meta(conn, "version", version)
+            if baseline:
+                # The graph file is assumed to hold the rows recorded so far
+                _set_meta(conn, "graph_version", version)
+    finally:
+        conn.close()
+
+    publish_version(version, version_file)
+    if os.path.isdir(LAKE_DIR):
+        export([SOURCES[table][0] for table in changes])
+    print(f"Version {version} published in {time.perf_counter() - started:.1f}s")
+    return version
+
+
+def publish_version(version, version_file=VERSION_FILE):
+    """Write the data version for running processes to pick up"""
+    tmp = version_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "published_at": time.time()}, f)
+    os.replace(tmp, version_file)
+
+
+def read_version(version_file=VERSION_FILE):
+    """Latest published data version (0 if none)"""
+    try:
+        with open(version_file, "r", encoding="utf-8") as f:
+            return int(json.load(f)["version"])
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def graph_base_version(db_path=DB_PATH):
+    """Data version already contained in startups_graph.ttl (0 if unknown)"""
+    if not os.path.exists(db_path):
+        return 0
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return _meta(conn, "graph_version")
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+
+def graph_changes(since, db_path=DB_PATH):
+    """[(version, op, triple)] recorded after version since, in apply order"""
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT version, op, s, p, o FROM _rdf_delta WHERE version > ? "
+            "ORDER BY version, op = '+', rowid",
+            (since,),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+    return [(version, op, (from_n3(s), from_n3(p), from_n3(o))) for version, op, s, p, o in rows]
+
+
+def apply_graph_changes(graph, since, db_path=DB_PATH):
+    """Apply the delta recorded after version since to graph; returns the new version"""
+    version = since
+    for version, op, triple in graph_changes(since, db_path):
+        if op == "-":
+            graph.remove(triple)
+        else:
+            graph.add(triple)
+    return max(version, since)
+
+
+def compact(db_path=DB_PATH, graph_path=GRAPH_PATH):
+    """Rewrite graph_path with the delta applied"""
+    base = graph_base_version(db_path)
+    graph = Graph()
+    graph.parse(graph_path, format="turtle")
+    version = apply_graph_changes(graph, base, db_path)
+    if version == base:
+        print(f"{graph_path} is up to date (version {version})")
+        return version
+    tmp = graph_path + ".tmp"
+    graph.serialize(tmp, format="turtle")
+    os.replace(tmp, graph_path)
+    conn = _connect(db_path)
+    try:
+        with conn:
+            _set_meta(conn, "graph_version", version)
+    finally:
+        conn.close()
+    print(f"{graph_path} now at version {version} ({len(graph)} triples)")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest new and changed startupticker rows")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--version-file", default=VERSION_FILE)
+    parser.add_argument("--graph", default=GRAPH_PATH)
+    parser.add_argument(
+        "--compact", action="store_true", help=f"Fold the RDF delta into {GRAPH_PATH}"
+    )
+    args = parser.parse_args()
+    if args.compact:
+        compact(args.db, args.graph)
+    else:
+        ingest(db_path=args.db, version_file=args.version_file, graph_path=args.graph)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,24 @@ from rdflib.namespace import RDF, XSD
 from datetime import datetime
 import statistics
 
+from company_index import company_index
+from startups_db import StartupRepository
+from term_store import STORE
+
 # Define namespaces
 EX = Namespace("http://example.org/ontology#")
 RES = Namespace("http://example.org/resource/")
 
 def get_company_details(g, company_name):
     """Get basic details and metrics for a company"""
+    company = company_index(g).resolve(company_name)
+    if company is None:
+        return None
     query = """
     SELECT DISTINCT ?industry_name ?location_name (COUNT(?funding) as ?funding_rounds) 
                     (SUM(?amount) as ?total_funding)
     WHERE {
-        ?company a ex:Startup ;
-                ex:name ?company_name .
+        VALUES ?company { %s }
         OPTIONAL {
             ?company ex:hasIndustry ?industry .
             ?industry ex:name ?industry_name .
@@ -27,12 +33,11 @@ def get_company_details(g, company_name):
             ?company ex:hasFunding ?funding .
             OPTIONAL { ?funding ex:amount ?amount }
         }
-        FILTER(?company_name = %s)
     }
     GROUP BY ?industry_name ?location_name
     """
     
-    results = list(g.query(query % Literal(company_name).n3()))
+    results = list(g.query(query % company.n3()))
     return results[0] if results else None
 
 def get_sector_metrics(g, industry_name):
@@ -63,8 +68,11 @@ def get_sector_metrics(g, industry_name):
             fundings.append(float(row.total_funding))
         rounds.append(int(row.funding_rounds))
     
+    return _sector_metrics(len(results), fundings, rounds)
+
+def _sector_metrics(companies, fundings, rounds):
     return {
-        'companies': len(results),
+        'companies': companies,
         'avg_funding': statistics.mean(fundings) if fundings else 0,
         'median_funding': statistics.median(fundings) if fundings else 0,
         'avg_rounds': statistics.mean(rounds) if rounds else 0,
@@ -73,27 +81,55 @@ def get_sector_metrics(g, industry_name):
 
 def get_funding_history(g, company_name):
     """Get detailed funding history for a company"""
+    company = company_index(g).resolve(company_name)
+    if company is None:
+        return []
     query = """
     SELECT ?date ?phase ?amount
     WHERE {
-        ?company a ex:Startup ;
-                ex:name ?company_name ;
-                ex:hasFunding ?funding .
+        VALUES ?company { %s }
+        ?company ex:hasFunding ?funding .
         OPTIONAL { ?funding ex:round_date ?date }
         OPTIONAL { ?funding ex:phase ?phase }
         OPTIONAL { ?funding ex:amount ?amount }
-        FILTER(?company_name = %s)
     }
     ORDER BY ?date
     """
     
-    return list(g.query(query % Literal(company_name).n3()))
+    return list(g.query(query % company.n3()))
+
+def get_company_details_db(repository, company_name):
+    """get_company_details answered from startups_clean.db"""
+    company = repository.find_company(company_name)
+    return repository.company_summary(company["Title"]) if company else None
+
+def get_sector_metrics_db(repository, industry_name):
+    """get_sector_metrics answered from startups_clean.db"""
+    rows = repository.sector_companies(industry_name)
+    fundings = [row["total_funding"] for row in rows if row["total_funding"]]
+    rounds = [row["funding_rounds"] for row in rows]
+    return _sector_metrics(len(rows), fundings, rounds)
 
-def analyze_companies(companies):
-    print("Loading RDF graph...")
-    g = Graph()
-    g.parse("startups_graph.ttl", format="turtle")
-    print("Graph loaded successfully!")
+def analyze_companies(companies, repository=None):
+    """
+    Print details, sector comparison and funding history of each company
+
+    Lookups come from startups_clean.db when database.py has been run, else
+    from the graph. Both resolve names the same way (see CompanyIndex.resolve)
+    and report the same figures, but the database stores char values
+    lowercased and only the canton is used as location, so there the
+    industry prints lowercased ("biotech", "ict") and the location is the
+    canton even when the graph would show the city.
+    """
+    repository = repository or StartupRepository()
+    use_db = repository.available()
+    if use_db:
+        print(f"Using {repository.db_path}")
+    else:
+        print("Loading RDF graph...")
+        g = Graph(store=STORE)
+        g.parse("startups_graph.ttl", format="turtle")
+        print("Graph loaded successfully!")
     
     print("\nCompany Analysis")
     print("=" * 80)
@@ -103,15 +139,24 @@ def analyze_companies(companies):
         print("-" * 50)
         
         # Get company details
-        details = get_company_details(g, company_name)
+        if use_db:
+            details = get_company_details_db(repository, company_name)
+        else:
+            details = get_company_details(g, company_name)
         if not details:
             print(f"Company {company_name} not found in the database")
             continue
             
-        industry = str(details.industry_name) if details.industry_name else None
-        location = str(details.location_name) if details.location_name else "Unknown"
-        total_funding = float(details.total_funding) if details.total_funding else 0
-        funding_rounds = int(details.funding_rounds)
+        if use_db:
+            industry = details["industry"]
+            location = details["canton"] or "Unknown"
+            total_funding = details["total_funding"] or 0
+            funding_rounds = details["funding_rounds"]
+        else:
+            industry = str(details.industry_name) if details.industry_name else None
+            location = str(details.location_name) if details.location_name else "Unknown"
+            total_funding = float(details.total_funding) if details.total_funding else 0
+            funding_rounds = int(details.funding_rounds)
         
         if industry:
             print(f"Industry: {industry}")
@@ -124,7 +169,10 @@ def analyze_companies(companies):
         
         # Get sector metrics only if industry is defined
         if industry:
-            sector = get_sector_metrics(g, industry)
+            if use_db:
+                sector = get_sector_metrics_db(repository, industry)
+            else:
+                sector = get_sector_metrics(g, industry)
             print(f"\nSector Comparison ({industry}):")
             print(f"- Total companies in sector: {sector['companies']}")
             print(f"- Sector average funding: {sector['avg_funding']:,.2f} CHF")
@@ -144,11 +192,20 @@ def analyze_companies(companies):
         
         # Get funding history
         print("\nFunding History:")
-        funding_history = get_funding_history(g, company_name)
-        for event in funding_history:
-            date = str(event.date) if event.date else "Unknown date"
-            phase = str(event.phase) if event.phase else "Unknown phase"
-            amount = f"{float(event.amount):,.2f} CHF" if event.amount else "Confidential"
+        if use_db:
+            funding_history = [
+                (row["date"] and row["date"][:10], row["phase"], row["amount"])
+                for row in repository.funding_history(details["title"])
+            ]
+        else:
+            funding_history = [
+                (event.date, event.phase, event.amount)
+                for event in get_funding_history(g, company_name)
+            ]
+        for event_date, event_phase, event_amount in funding_history:
+            date = str(event_date) if event_date else "Unknown date"
+            phase = str(event_phase) if event_phase else "Unknown phase"
+            amount = f"{float(event_amount):,.2f} CHF" if event_amount else "Confidential"
             print(f"- {date}: {phase} - {amount}")
         
         print("\n" + "=" * 50)
@@ -0,0 +1,129 @@
+"""
+Name -> startup URI index over a graph.
+
+Per-company lookups used to start by looking for the startup among all
+ex:name values (g.subjects(EX.name, ...) or FILTER(?company_name = ...),
+which rdflib answers by scanning every name). CompanyIndex is built once
+per graph and maps every ex:Startup name, exact and normalized (case,
+accents, punctuation and legal form ignored, see investors.name_words),
+to its URI. resolve() is a dict lookup for those and only falls back to a
+ranked fuzzy match (name prefixes, then difflib) for the rest:
+
+    index = company_index(graph)
+    index.resolve("cutiss")             # URIRef(".../CUTISS_AG")
+    index.matches("Augment", n=3)       # [(score, name, uri), ...]
+
+Queries then bind the URI (VALUES ?company { <...> }) instead of
+filtering on the name.
+"""
+
+import difflib
+import threading
+import weakref
+from bisect import bisect_left
+
+from rdflib import RDF, Namespace
+
+from investors import name_words
+
+EX = Namespace("http://example.org/ontology#")
+
+# Minimum difflib ratio for resolve() to accept a fuzzy match
+FUZZY_CUTOFF = 0.85
+# Shortest query resolved to a longer name it is a prefix of
+MIN_PREFIX = 4
+
+
+def normalize_company(name):
+    """Comparison form of a company name ("Swiss Drones AG" -> "swissdrones")"""
+    return "".join(name_words(str(name)))
+
+
+class CompanyIndex:
+    """Startup names of one graph, exact and normalized"""
+
+    def __init__(self, graph):
+        self.size = len(graph)
+        self._build(
+            (str(name), uri)
+            for uri in graph.subjects(RDF.type, EX.Startup)
+            for name in graph.objects(uri, EX.name)
+        )
+
+    @classmethod
+    def from_names(cls, names):
+        """Index of plain names, resolving each name to itself (e.g. database titles)"""
+        index = cls.__new__(cls)
+        index.size = None
+        index._build((str(name), name) for name in names)
+        return index
+
+    def _build(self, entries):
+        self._exact = {}
+        self._normalized = {}
+        for name, uri in entries:
+            self._exact.setdefault(name, uri)
+            self._normalized.setdefault(normalize_company(name), []).append((name, uri))
+        for candidates in self._normalized.values():
+            candidates.sort()
+        self._keys = sorted(self._normalized)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def lookup(self, name):
+        """URI of the startup with exactly this (or an equivalent) name, or None"""
+        uri = self._exact.get(name)
+        if uri is not None:
+            return uri
+        candidates = self._normalized.get(normalize_company(name))
+        return candidates[0][1] if candidates else None
+
+    def matches(self, name, n=5, cutoff=0.6):
+        """
+        [(score, name, uri)] of the n best matching startups: names starting
+        with the query first ("scandit" -> "Scandit AG (Mirasense AG)"), then by difflib
+        similarity
+        """
+        key = normalize_company(name)
+        if not key:
+            return []
+        prefixed = set()
+        start = bisect_left(self._keys, key)
+        for other in self._keys[start:start + n]:
+            if not other.startswith(key):
+                break
+            prefixed.add(other)
+        similar = difflib.get_close_matches(key, self._keys, n=n, cutoff=cutoff)
+        ranked = []
+        for other in prefixed.union(similar):
+            score = round(difflib.SequenceMatcher(None, key, other).ratio(), 3)
+            for candidate_name, uri in self._normalized[other]:
+                ranked.append((other in prefixed, score, candidate_name, uri))
+        ranked.sort(key=lambda match: (not match[0], -match[1], len(match[2]), match[2]))
+        return [(score, candidate_name, uri) for _, score, candidate_name, uri in ranked[:n]]
+
+    def resolve(self, name, cutoff=FUZZY_CUTOFF):
+        """URI of the startup name refers to: exact, normalized, then best fuzzy match"""
+        uri = self.lookup(name)
+        if uri is not None:
+            return uri
+        key = normalize_company(name)
+        for score, match_name, uri in self.matches(name, cutoff=cutoff):
+            # A longer name starting with the query counts even below the cutoff
+            if score >= cutoff or (len(key) >= MIN_PREFIX and normalize_company(match_name).startswith(key)):
+                return uri
+        return None
+
+
+_indexes = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def company_index(graph):
+    """CompanyIndex of graph, built on first use and rebuilt if the graph grew or shrank"""
+    with _lock:
+        index = _indexes.get(graph)
+        if index is None or index.size != len(graph):
+            index = _indexes[graph] = CompanyIndex(graph)
+        return index
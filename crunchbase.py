@@ -0,0 +1,56 @@
+"""
+Crunchbase lookups shared by the Streamlit app and the HTTP API.
+
+Only the organization names are kept in memory; the matched organization
+and its funding rounds are read with a filter from the data lake (see
+data_lake.py), which falls back to the CSV exports when they haven't been
+converted to Parquet.
+"""
+
+from functools import lru_cache
+
+from data_lake import read_table
+
+ORGANIZATIONS = "crunchbase_organizations"
+FUNDING_ROUNDS = "crunchbase_funding_rounds"
+
+
+@lru_cache(maxsize=None)
+def load_organizations():
+    """uuid and name of every Crunchbase organization"""
+    return read_table(ORGANIZATIONS, columns=["uuid", "name"])
+
+
+def load_funding_rounds(org_uuid=None):
+    """Crunchbase funding rounds, only those of org_uuid if given"""
+    filters = [("org_uuid", "=", org_uuid)] if org_uuid is not None else None
+    return read_table(FUNDING_ROUNDS, filters=filters)
+
+
+def find_company(company_name):
+    """
+    Find a company and its funding rounds in Crunchbase
+
+    Args:
+        company_name: Name (or part of a name) to search for, case-insensitive
+
+    Returns:
+        Tuple of (organization row, funding rounds DataFrame), or (None, None)
+        if no organization matches. File errors propagate to the caller.
+    """
+    orgs_df = load_organizations()
+
+    # Search for company in the name field (case-insensitive)
+    normalized_name = company_name.lower().strip()
+    matched_orgs = orgs_df[
+        orgs_df["name"].str.lower().str.contains(normalized_name, na=False, regex=False)
+    ]
+
+    if matched_orgs.empty:
+        return None, None
+
+    # Get the first matching organization and its funding rounds
+    uuid = matched_orgs.iloc[0]["uuid"]
+    org = read_table(ORGANIZATIONS, filters=[("uuid", "=", uuid)]).iloc[0]
+
+    return org, load_funding_rounds(uuid)
@@ -0,0 +1,257 @@
+"""
+Parquet copies of the CSV exports.
+
+export() reads companies.csv, deals.csv and the Crunchbase exports once,
+types their columns (dates, numbers, categories for repetitive strings) and
+writes them as zstd-compressed, dictionary-encoded Parquet datasets under
+data_lake/. Deals are partitioned by year and Crunchbase rounds by country,
+so filtered reads only open the matching files:
+
+    python data_lake.py                # export what changed
+    deals = read_table("deals", columns=["Company", "Amount"],
+                       filters=[("year", ">=", 2020)])
+
+read_table() only loads the requested columns and pushes the filters down
+to the Parquet reader. Without pyarrow or an exported table it reads the
+CSV instead and applies the same projection and filters with pandas, so
+callers don't have to care which one they got.
+"""
+
+import argparse
+import json
+import operator
+import os
+import shutil
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+LAKE_DIR = "data_lake"
+
+# table -> CSV candidates (first existing wins), typed columns and partition column
+TABLES = {
+    "companies": {
+        "sources": ["companies.csv", "data_csv/companies.csv"],
+        "integers": ["Year"],
+    },
+    "deals": {
+        "sources": ["deals.csv", "data_csv/deals.csv"],
+        "dates": ["Date of the funding round"],
+        "partition": "year",
+    },
+    "crunchbase_organizations": {
+        "sources": ["data_csv/crunchbase/organizations.csv"],
+        "timestamps": ["created_at", "updated_at"],
+    },
+    "crunchbase_funding_rounds": {
+        "sources": ["data_csv/crunchbase/funding_rounds.csv"],
+        "dates": ["announced_on"],
+        "timestamps": ["created_at", "updated_at"],
+        "partition": "country_code",
+    },
+}
+
+# Strings repeating this much are loaded as categories (dictionary arrays)
+CATEGORY_RATIO = 0.5
+CATEGORIES_KEY = b"data_lake.categories"
+
+FILTER_OPS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def source_path(name):
+    """First existing CSV for a table; FileNotFoundError if there is none"""
+    for path in TABLES[name]["sources"]:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No CSV found for {name}: {', '.join(TABLES[name]['sources'])}")
+
+
+def table_path(name, lake_dir=LAKE_DIR):
+    return os.path.join(lake_dir, name)
+
+
+def _normalize(df, spec):
+    """Type the columns of a CSV frame the same way for Parquet and the fallback"""
+    for column in spec.get("integers", []):
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+    for column in spec.get("dates", []):
+        if column in df:
+            df[column] = pd.to_datetime(df[column], errors="coerce").dt.date
+    for column in spec.get("timestamps", []):
+        if column in df:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    if spec.get("partition") == "year":
+        dates = pd.to_datetime(df[spec["dates"][0]], errors="coerce")
+        df["year"] = dates.dt.year.astype("Int64")
+    for column in df.columns:
+        if column == spec.get("partition") or not pd.api.types.is_string_dtype(df[column]):
+            continue
+        values = df[column].dropna()
+        if len(values) and values.nunique() <= CATEGORY_RATIO * len(values):
+            df[column] = df[column].astype("category")
+    return df
+
+
+def load_source(name, columns=None):
+    """Typed CSV frame of a table, optionally limited to some columns"""
+    spec = TABLES[name]
+    usecols = None
+    if columns is not None:
+        # The year partition is derived from the deal date
+        derived = {"year": spec["dates"][0]} if spec.get("partition") == "year" else {}
+        usecols = sorted({derived.get(c, c) for c in columns})
+    return _normalize(pd.read_csv(source_path(name), usecols=usecols), spec)
+
+
+def _is_stale(name, lake_dir):
+    source = source_path(name)
+    target = table_path(name, lake_dir)
+    if not os.path.isdir(target):
+        return True
+    return os.path.getmtime(source) > os.path.getmtime(target)
+
+
+def export_table(name, lake_dir=LAKE_DIR):
+    """Write one table as a Parquet dataset, replacing the previous export"""
+    if pq is None:
+        raise ImportError("pyarrow is required to export Parquet files")
+    spec = TABLES[name]
+    df = load_source(name)
+    partition = spec.get("partition")
+    if partition and partition != "year":
+        df[partition] = df[partition].astype("string")
+    # Categories are written as plain strings, which Parquet dictionary-encodes
+    # per file anyway; an Arrow dictionary would repeat every category in every
+    # partition. read_table() turns them back into categories.
+    categories = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    for column in categories:
+        df[column] = df[column].astype("string")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[CATEGORIES_KEY] = json.dumps(categories).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    target = table_path(name, lake_dir)
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    pq.write_to_dataset(
+        table,
+        staging,
+        partition_cols=[partition] if partition else None,
+        compression="zstd",
+        use_dictionary=True,
+    )
+    # Swap the finished export in so readers never see a half-written table
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    return len(df)
+
+
+def export(tables=None, lake_dir=LAKE_DIR, force=False):
+    """Export the tables whose CSV changed since the last export"""
+    os.makedirs(lake_dir, exist_ok=True)
+    exported = {}
+    for name in tables or TABLES:
+        try:
+            stale = force or _is_stale(name, lake_dir)
+        except FileNotFoundError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        if not stale:
+            print(f"{name} is up to date")
+            continue
+        rows = export_table(name, lake_dir)
+        exported[name] = rows
+        print(f"Exported {rows} rows to {table_path(name, lake_dir)}")
+    return exported
+
+
+def _apply_filters(df, filters):
+    for column, op, value in filters:
+        if op == "in":
+            mask = df[column].isin(value)
+        elif op == "not in":
+            mask = ~df[column].isin(value)
+        else:
+            mask = FILTER_OPS[op](df[column], value)
+        df = df[mask.fillna(False).astype(bool)]
+    return df
+
+
+def _partitioning(name):
+    """Hive partitioning with the partition column typed like in the CSV"""
+    partition = TABLES[name].get("partition")
+    if partition is None:
+        return "hive"
+    value_type = pa.int64() if partition == "year" else pa.string()
+    return ds.partitioning(pa.schema([(partition, value_type)]), flavor="hive")
+
+
+def read_table(name, columns=None, filters=None, lake_dir=LAKE_DIR):
+    """
+    Read a table from the Parquet export, or from its CSV if not exported
+
+    Args:
+        name: Table name, one of TABLES
+        columns: Columns to load (all if None)
+        filters: List of (column, op, value) tuples combined with AND; op is
+            one of =, ==, !=, <, <=, >, >=, in, not in
+
+    Returns:
+        pandas DataFrame with a fresh RangeIndex
+    """
+    filters = list(filters or [])
+    target = table_path(name, lake_dir)
+    if pq is not None and os.path.isdir(target):
+        op_names = {"==": "="}
+        metadata = pq.ParquetDataset(target).schema.metadata or {}
+        categories = json.loads(metadata.get(CATEGORIES_KEY, b"[]"))
+        if columns is not None:
+            categories = [c for c in categories if c in columns]
+        table = pq.read_table(
+            target,
+            columns=columns,
+            filters=[(c, op_names.get(op, op), v) for c, op, v in filters] or None,
+            read_dictionary=categories or None,
+            partitioning=_partitioning(name),
+        )
+        return table.to_pandas()
+
+    needed = None
+    if columns is not None:
+        needed = list(dict.fromkeys(list(columns) + [c for c, _, _ in filters]))
+    df = _apply_filters(load_source(name, needed), filters)
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the CSV data to Parquet")
+    parser.add_argument("tables", nargs="*", help=f"Tables to export: {', '.join(TABLES)} (default all)")
+    parser.add_argument("--lake", default=LAKE_DIR, help="Output directory")
+    parser.add_argument("--force", action="store_true", help="Export even if the CSV is unchanged")
+    args = parser.parse_args()
+    unknown = set(args.tables) - set(TABLES)
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(sorted(unknown))}")
+    export(args.tables or None, args.lake, args.force)
+
+
+if __name__ == "__main__":
+    main()
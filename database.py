@@ -1,12 +1,21 @@
-import pandas as pd
-from sqlalchemy import create_engine
-import re
+import argparse
+import os
 import sqlite3
+import time
+
+import openpyxl
+import pandas as pd
+
+from startups_db import DEALS, create_indexes, refresh_company_funding, refresh_investors
+
 # path to data
 file_crunchbase = "Data-crunchbase.xlsx"
 file_startupticker = "Data-startupticker.xlsx"
 sqlite_db = "startups_clean.db"
 
+# Rows converted and inserted per batch while streaming a sheet
+CHUNK_SIZE = 5000
+
 # === Mappping of the sheet to treat
 sheets_to_process = {
     "startupticker_companies": (file_startupticker, "Companies", "Company description"),
@@ -16,63 +25,299 @@ sheets_to_process = {
 }
 
 
-def clean_string(s):
-    if isinstance(s, str):
-        s = s.lower()
-        #s = re.sub(r'\s+', '', s)
-        #s = re.sub(r'[^a-z0-9]', '', s)
-    return s
+def _to_int(series):
+    numeric = pd.to_numeric(series, errors="coerce")
+    # Years and counts may arrive as floats because of missing values
+    if (numeric.dropna() % 1 == 0).all():
+        return numeric.astype("Int64")
+    return numeric.astype("Float64")
+
+
+def _to_numeric(series):
+    return pd.to_numeric(series, errors="coerce").astype("Float64")
+
+
+def _to_char(series):
+    return series.astype("string").str.lower()
+
+
+def _to_classification(series):
+    return _to_char(series).astype("category")
+
+
+BOOL_VALUES = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+
+def _to_bool(series):
+    numeric = pd.to_numeric(series, errors="coerce")
+    if numeric.notna().sum() == series.notna().sum():
+        return numeric.ne(0).astype("boolean").mask(numeric.isna())
+    values = series.astype("string").str.strip().str.lower()
+    return values.map(BOOL_VALUES, na_action="ignore").astype("boolean")
+
+
+def _to_date(series):
+    return pd.to_datetime(series, errors="coerce")
+
+
+def _to_list(series):
+    return series.astype("string")
+
+
+# Data dictionary type -> vectorized conversion of a whole column
+CONVERTERS = {
+    "int": _to_int,
+    "char": _to_char,
+    "char (classification)": _to_classification,
+    "bool": _to_bool,
+    "numeric": _to_numeric,
+    "date": _to_date,
+    "list": _to_list,
+}
+
+
+CONVERTER_TYPES = {converter: data_type for data_type, converter in CONVERTERS.items()}
+
+
+def build_conversion_plan(df_desc):
+    """Compile a description sheet into {column: converter}"""
+    plan = {}
+    types = df_desc[["Data field", "Data type"]].dropna()
+    for col_name, expected_type in zip(types["Data field"], types["Data type"]):
+        converter = CONVERTERS.get(str(expected_type).strip())
+        if converter is None:
+            print(f"Type non pris en charge pour {col_name}: {expected_type}")
+            continue
+        # The first description of a field wins, as with the old lookup
+        plan.setdefault(col_name, converter)
+    return plan
+
+
+def stored_conversion_plan(conn, table_name):
+    """Plan recorded in _column_types when table_name was loaded ({} if none)"""
+    try:
+        rows = conn.execute(
+            "SELECT column_name, data_type FROM _column_types WHERE table_name = ?",
+            (table_name,),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {column: CONVERTERS[data_type] for column, data_type in rows}
+
 
 def convert_columns_based_on_type(df1, df2):
-    
-    for col_name in df1.columns:
-        
-        type_row = df2[df2['Data field'] == col_name]
-        
-        
-        if not type_row.empty:
-            expected_type = type_row['Data type'].values[0]  
-
-            # convert in the right data type else nan
-            if expected_type == 'int':
-                df1[col_name] = pd.to_numeric(df1[col_name], errors='coerce')  
-            elif expected_type == 'char'or expected_type == 'char (classification)' :
-                df1[col_name] = df1[col_name].astype(str)
-                
-                df1[col_name] = df1[col_name].apply(clean_string)  
-            elif expected_type == 'bool':
-                df1[col_name] = df1[col_name].astype(bool)  
-            elif expected_type == 'numeric' : 
-                df1[col_name] = df1[col_name].astype(float)
-            elif expected_type == 'date' : 
-                df1[col_name]= pd.to_datetime(df1[col_name], errors='coerce')
-            elif expected_type == 'list' : 
-                df1[col_name] = df1[col_name].astype(str)
-            else:
-                print(f"Type non pris en charge pour {col_name}: {expected_type}")
-    df1 = df1.drop_duplicates()
-    return df1
-
-engine = create_engine(f"sqlite:///{sqlite_db}")
-
-for table_name, (file, data_sheet, desc_sheet) in sheets_to_process.items():
-    print(f"🔄 Traitement de {data_sheet} -> table `{table_name}`")
-
-    df_data = pd.read_excel(file, sheet_name=data_sheet)
-    df_desc = pd.read_excel(file, sheet_name=desc_sheet)
-
-    
-
-    df_data = convert_columns_based_on_type(df_data, df_desc)
-    df_data = df_data.dropna(how="all").drop_duplicates()
-
-    df_data.to_sql(table_name, con=engine, if_exists="replace", index=False)
+    """
+    Coerce df1's columns to the types of the data dictionary df2
+
+    df2 is either a description sheet or a plan from build_conversion_plan.
+    Char values are lowercased, classifications become categoricals and
+    missing values stay missing (nullable dtypes). Empty and duplicate rows
+    of df1 are dropped; load_sheet also drops rows that repeat a row of an
+    earlier chunk, so a chunked load keeps the same rows as a whole-sheet one.
+    """
+    plan = df2 if isinstance(df2, dict) else build_conversion_plan(df2)
+    converted = {
+        col_name: plan[col_name](df1[col_name])
+        for col_name in df1.columns
+        if col_name in plan
+    }
+    df1 = df1.assign(**converted)
+    return df1.dropna(how="all").drop_duplicates()
+
+# SQLite column type per converter
+SQL_TYPES = {
+    _to_int: "INTEGER",
+    _to_numeric: "REAL",
+    _to_bool: "INTEGER",
+    _to_date: "TIMESTAMP",
+}
+
+# Cell values read_excel would have parsed as missing
+NA_STRINGS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+# Bulk-load settings: WAL so readers are not blocked, no fsync while loading
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-200000",
+)
+
+
+def open_workbook(file):
+    """Read-only workbook: rows are parsed lazily, not held in memory"""
+    return openpyxl.load_workbook(file, read_only=True, data_only=True)
+
+
+def _frame(records, columns):
+    df = pd.DataFrame.from_records(records, columns=columns)
+    return df.mask(df.isin(NA_STRINGS))
+
+
+def iter_sheet_chunks(workbook, sheet_name, chunk_size=CHUNK_SIZE):
+    """Yield a sheet as DataFrames of at most chunk_size rows"""
+    rows = workbook[sheet_name].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+    chunk = []
+    for row in rows:
+        chunk.append(row[: len(columns)])
+        if len(chunk) >= chunk_size:
+            yield _frame(chunk, columns)
+            chunk = []
+    if chunk:
+        yield _frame(chunk, columns)
+
+
+def _sql_rows(df):
+    """Rows of df as tuples of plain Python values, NULL for missing"""
+    df = df.copy()
+    for col_name in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col_name]):
+            # Same text format to_sql used for timestamps
+            df[col_name] = df[col_name].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+    df = df.astype(object).where(df.notna(), None)
+    return df.itertuples(index=False, name=None)
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _source_signature(file):
+    stat = os.stat(file)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def load_sheet(conn, table_name, workbook, data_sheet, desc_sheet, source, chunk_size=CHUNK_SIZE):
+    """
+    Stream one sheet into table_name, replacing it atomically
+
+    Rows are converted chunk by chunk with the sheet's conversion plan and
+    inserted with executemany into a staging table, which replaces the old
+    table in the same transaction. source is recorded in _ingest_log.
+    Returns the number of rows written.
+    """
+    plan = build_conversion_plan(pd.concat(iter_sheet_chunks(workbook, desc_sheet)))
+    staging = f"{table_name}__loading"
+    seen = set()
+    written = 0
+
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(staging)}")
+        insert = None
+        for chunk in iter_sheet_chunks(workbook, data_sheet, chunk_size):
+            chunk = convert_columns_based_on_type(chunk, plan)
+
+            # Duplicates across chunks, tracked by row hash
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            keep = [h not in seen for h in hashes]
+            seen.update(hashes.tolist())
+            chunk = chunk[keep]
+
+            if insert is None:
+                columns = ", ".join(
+                    f"{_quote(c)} {SQL_TYPES.get(plan.get(c), 'TEXT')}" for c in chunk.columns
+                )
+                conn.execute(f"CREATE TABLE {_quote(staging)} ({columns})")
+                placeholders = ", ".join("?" * len(chunk.columns))
+                insert = f"INSERT INTO {_quote(staging)} VALUES ({placeholders})"
+
+            conn.executemany(insert, _sql_rows(chunk))
+            written += len(chunk)
+
+        if insert is None:
+            return 0
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+        conn.execute(f"ALTER TABLE {_quote(staging)} RENAME TO {_quote(table_name)}")
+        conn.execute(
+            "INSERT OR REPLACE INTO _ingest_log VALUES (?, ?, ?)",
+            (table_name, source, written),
+        )
+        # Lets incremental loads (cdc.py) convert rows without the workbook
+        conn.execute("DELETE FROM _column_types WHERE table_name = ?", (table_name,))
+        conn.executemany(
+            "INSERT INTO _column_types VALUES (?, ?, ?)",
+            [(table_name, column, CONVERTER_TYPES[converter]) for column, converter in plan.items()],
+        )
+    return written
+
+
+def load_workbooks(sheets=sheets_to_process, db_path=sqlite_db, chunk_size=CHUNK_SIZE, force=False):
+    """
+    Load every sheet of sheets into db_path
+
+    Sheets whose workbook did not change since the last load are skipped
+    unless force is set; missing workbooks are reported and skipped. The
+    lookup indexes, the company_funding aggregate and the investor tables
+    of startups_db are rebuilt afterwards.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _ingest_log "
+            "(table_name TEXT PRIMARY KEY, source TEXT, rows INTEGER)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS _column_types "
+            "(table_name TEXT, column_name TEXT, data_type TEXT)"
+        )
+
+        # Parsing a workbook's shared strings is costly, so open each file once
+        workbooks = {}
+        try:
+            for table_name, (file, data_sheet, desc_sheet) in sheets.items():
+                if not os.path.exists(file):
+                    print(f"⚠️ {file} introuvable, table `{table_name}` ignorée")
+                    continue
+                source = _source_signature(file)
+                logged = conn.execute(
+                    "SELECT source FROM _ingest_log WHERE table_name = ?", (table_name,)
+                ).fetchone()
+                if not force and logged and logged[0] == source:
+                    print(f"✅ `{table_name}` déjà à jour")
+                    continue
+
+                print(f"🔄 Traitement de {data_sheet} -> table `{table_name}`")
+                started = time.perf_counter()
+                if file not in workbooks:
+                    workbooks[file] = open_workbook(file)
+                rows = load_sheet(
+                    conn, table_name, workbooks[file], data_sheet, desc_sheet, source, chunk_size
+                )
+                print(f"   {rows} lignes en {time.perf_counter() - started:.1f}s")
+        finally:
+            for workbook in workbooks.values():
+                workbook.close()
+
+        create_indexes(conn)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (DEALS,)).fetchone():
+            refresh_company_funding(conn)
+            refresh_investors(conn)
+        conn.commit()
+        conn.execute("PRAGMA synchronous=NORMAL")
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
-    # way to the base
-    sqlite_db = 'startups_clean.db'
+    parser = argparse.ArgumentParser(description="Load the Excel workbooks into SQLite")
+    parser.add_argument("--db", default=sqlite_db)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--force", action="store_true", help="Reload unchanged sheets")
+    args = parser.parse_args()
+
+    load_workbooks(db_path=args.db, chunk_size=args.chunk_size, force=args.force)
 
     # Connect the base SQLite
-    conn = sqlite3.connect(sqlite_db)
+    conn = sqlite3.connect(args.db)
     cursor = conn.cursor()
 
     # e.g of sql request
@@ -0,0 +1,148 @@
+"""
+Wait for browser downloads to land in a directory.
+
+Chrome writes a download to <name>.crdownload and renames it to its final
+name once it is complete. A DownloadWatcher is started before the click that
+triggers a download and resolves its future with the path of the first new,
+finished file matching the suffix:
+
+    with DownloadWatcher(download_dir, suffix=".pdf") as watcher:
+        button.click()
+        path = watcher.wait(timeout=30)
+
+Filesystem events come from watchdog (inotify on Linux) when it is installed;
+otherwise the directory is rescanned every poll_interval seconds.
+"""
+
+import os
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# Names browsers give downloads that are still being written
+TEMP_SUFFIXES = (".crdownload", ".part", ".tmp")
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_moved(self, event):
+        # Chrome renames <name>.crdownload to the final name when done
+        self.watcher._consider(event.dest_path)
+
+    def on_closed(self, event):
+        # Files written in place are complete once closed after writing
+        self.watcher._consider(event.src_path)
+
+
+class DownloadWatcher:
+    """
+    Resolve a future when a new finished download appears in a directory
+
+    Args:
+        directory: Directory the browser downloads into
+        suffix: Only files ending in this suffix count ("" for any file)
+        poll_interval: Seconds between rescans when polling
+        use_events: Use filesystem events if watchdog is available
+    """
+
+    def __init__(self, directory, suffix=".pdf", poll_interval=0.2, use_events=True):
+        self.directory = directory
+        self.suffix = suffix.lower()
+        self.poll_interval = poll_interval
+        self.future = Future()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._seen = self._snapshot()
+        self._observer = None
+        self._poller = None
+
+        if use_events and Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), directory, recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            self._poller = threading.Thread(target=self._poll, daemon=True)
+            self._poller.start()
+
+    @property
+    def mode(self):
+        return "events" if self._observer is not None else "polling"
+
+    def _matches(self, name):
+        name = name.lower()
+        return name.endswith(self.suffix) and not name.endswith(TEMP_SUFFIXES)
+
+    def _snapshot(self):
+        """{name: mtime_ns} of the matching files currently in the directory"""
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if self._matches(entry.name):
+                    try:
+                        snapshot[entry.name] = entry.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        pass
+        return snapshot
+
+    def _consider(self, path):
+        """Resolve the future if path is a new, non-empty matching file"""
+        name = os.path.basename(path)
+        if self.future.done() or not self._matches(name):
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        # Chrome may create an empty placeholder under the final name first
+        if stat.st_size == 0 or self._seen.get(name) == stat.st_mtime_ns:
+            return
+        with self._lock:
+            if not self.future.done():
+                self.future.set_result(path)
+
+    def _scan(self):
+        if self.in_progress():
+            return
+        for name in self._snapshot():
+            self._consider(os.path.join(self.directory, name))
+
+    def _poll(self):
+        while not self._closed.is_set() and not self.future.done():
+            self._scan()
+            self._closed.wait(self.poll_interval)
+
+    def in_progress(self):
+        """True while the browser still has a partial download in the directory"""
+        return any(name.endswith(TEMP_SUFFIXES) for name in os.listdir(self.directory))
+
+    def wait(self, timeout=None):
+        """Return the downloaded file's path, or None if none appeared in time"""
+        try:
+            return self.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Last look in case an event was missed
+            self._scan()
+            return self.future.result() if self.future.done() else None
+
+    def close(self):
+        self._closed.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
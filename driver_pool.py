@@ -0,0 +1,189 @@
+"""
+Pool of warm, reusable headless Chrome sessions for SOGC lookups.
+
+Launching Chrome (and resolving chromedriver) dominates a single lookup, so
+the pool starts browsers up front and lends them out:
+
+    with DriverPool(size=2) as pool:
+        download_sogc_data(uid, download_dir="out", pool=pool)
+
+Each session owns a download directory under download_root, is health
+checked before it is lent out, and is replaced after max_uses lookups or
+whenever it stops responding. warm_url can point at the live search page or
+at a locally served stand-in page for tests.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from scrape_metrics import span
+from web_scrapper import create_driver, set_download_dir
+
+
+class PooledDriver:
+    """A browser owned by a DriverPool, with its own download directory"""
+
+    def __init__(self, driver, download_dir):
+        self.driver = driver
+        self.download_dir = download_dir
+        self.uses = 0
+
+    def is_healthy(self):
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+
+
+class DriverPool:
+    """
+    Fixed-size pool of pre-launched WebDriver sessions
+
+    Args:
+        size: Number of browsers kept warm
+        max_uses: Recycle a browser after this many lookups
+        download_root: Parent of the per-session download directories
+            (a temporary directory by default)
+        warm_url: Page each new browser loads right after launch
+        driver_factory: Callable(download_dir) -> WebDriver, for tests
+        acquire_timeout: Seconds to wait for a free browser before failing
+    """
+
+    def __init__(
+        self,
+        size=2,
+        max_uses=25,
+        download_root=None,
+        warm_url=None,
+        driver_factory=create_driver,
+        acquire_timeout=120,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.warm_url = warm_url
+        self.driver_factory = driver_factory
+        self.acquire_timeout = acquire_timeout
+
+        self._owns_root = download_root is None
+        self.download_root = download_root or tempfile.mkdtemp(prefix="sogc_pool_")
+        os.makedirs(self.download_root, exist_ok=True)
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._closed = False
+
+        print(f"Starting {size} browser sessions...")
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            futures = [executor.submit(self._launch) for _ in range(size)]
+        launched, errors = [], []
+        for future in futures:
+            try:
+                launched.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            # Don't leak the browsers that did start
+            for pooled in launched:
+                pooled.quit()
+            if self._owns_root:
+                shutil.rmtree(self.download_root, ignore_errors=True)
+            raise errors[0]
+        for pooled in launched:
+            self._idle.put(pooled)
+
+    def _launch(self):
+        with self._lock:
+            self._counter += 1
+            session_dir = os.path.join(self.download_root, f"session-{self._counter}")
+        os.makedirs(session_dir, exist_ok=True)
+
+        driver = self.driver_factory(session_dir)
+        if self.warm_url:
+            try:
+                driver.get(self.warm_url)
+            except Exception as e:
+                print(f"Warm-up navigation to {self.warm_url} failed: {e}")
+        return PooledDriver(driver, session_dir)
+
+    def _replace(self, pooled):
+        pooled.quit()
+        shutil.rmtree(pooled.download_dir, ignore_errors=True)
+        return self._launch()
+
+    @contextmanager
+    def session(self, download_dir=None):
+        """
+        Borrow a healthy browser for one lookup
+
+        Args:
+            download_dir: Where downloads of this lookup should go; defaults
+                to the session's own directory
+        """
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+
+        with span("driver_acquire"):
+            try:
+                pooled = self._idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise TimeoutError("No browser became available in the pool")
+
+        try:
+            if not pooled.is_healthy():
+                print("Pooled browser failed health check, relaunching...")
+                pooled = self._replace(pooled)
+
+            set_download_dir(pooled.driver, download_dir or pooled.download_dir)
+            pooled.uses += 1
+            yield pooled.driver
+        except Exception:
+            # The browser may be in an unknown state after an error
+            if not pooled.is_healthy():
+                pooled.uses = self.max_uses
+            raise
+        finally:
+            self._release(pooled)
+
+    def _release(self, pooled):
+        if self._closed:
+            pooled.quit()
+            return
+        if pooled.uses >= self.max_uses:
+            print(f"Recycling browser after {pooled.uses} uses")
+            try:
+                pooled = self._replace(pooled)
+            except Exception as e:
+                # Return the dead slot anyway: the health check of the next
+                # session() relaunches it, so the pool never shrinks
+                print(f"Could not relaunch browser, retrying on next use: {e}")
+                pooled.uses = 0
+        self._idle.put(pooled)
+
+    def close(self):
+        """Quit every idle browser and remove the pool's download directories"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
+        if self._owns_root:
+            shutil.rmtree(self.download_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,210 @@
+"""
+Versioned, hot-reloadable handle on the RDF graph.
+
+GraphStore parses startups_graph.ttl (and sogc_graph.ttl) once, then a
+background thread watches the files and the CDC data version (see cdc.py).
+A rewritten file is parsed into a new Graph; published CDC changes are
+applied to a copy of the current one. Either way the new graph replaces the
+current snapshot in a single assignment, so requests never wait for a parse
+and in-flight queries keep the graph they started with:
+
+    store = GraphStore([GRAPH_PATH, SOGC_GRAPH_PATH]).start()
+    snapshot = store.snapshot()
+    snapshot.graph.query(...)      # snapshot.version keys caches and coalescing
+
+Callbacks registered with subscribe() run after every swap; VersionedCache
+forgets its entries when the version changes.
+"""
+
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from rdflib import Graph
+
+import cdc
+from term_store import STORE
+
+# Seconds between checks of the files and the CDC version
+POLL_INTERVAL = 2.0
+
+
+class GraphSnapshot(NamedTuple):
+    graph: Graph
+    # Changes whenever the content changes; use it in cache keys
+    version: str
+    # CDC data version contained in graph
+    data_version: int
+
+
+def _file_signature(paths):
+    return tuple(
+        (path, os.stat(path).st_mtime_ns, os.stat(path).st_size)
+        for path in paths
+        if os.path.exists(path)
+    )
+
+
+def copy_graph(graph):
+    """Independent copy of graph, prefix bindings included"""
+    copy = Graph(store=STORE)
+    for prefix, namespace in graph.namespaces():
+        copy.bind(prefix, namespace, override=True)
+    copy.addN((s, p, o, copy) for s, p, o in graph)
+    return copy
+
+
+class GraphStore:
+    """Current graph snapshot, rebuilt in the background when the data changes"""
+
+    def __init__(self, paths, db_path=cdc.DB_PATH, version_file=cdc.VERSION_FILE,
+                 poll_interval=POLL_INTERVAL):
+        self.paths = list(paths)
+        self.db_path = db_path
+        self.version_file = version_file
+        self.poll_interval = poll_interval
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Last signature seen by the watcher; a file is only reloaded once its
+        # signature is stable across two polls, so half-written files are skipped
+        self._pending = None
+        self._snapshot = self._load()
+
+    def snapshot(self):
+        """The current GraphSnapshot; keep using it for the whole request"""
+        return self._snapshot
+
+    @property
+    def graph(self):
+        return self._snapshot.graph
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def subscribe(self, callback):
+        """Call callback(snapshot) after every swap"""
+        self._subscribers.append(callback)
+        return callback
+
+    def _version(self, signature, data_version):
+        files = "-".join(f"{mtime}-{size}" for _, mtime, size in signature)
+        return f"{files}-v{data_version}"
+
+    def _load(self):
+        """Parse the files and apply the CDC changes they don't contain yet"""
+        signature = _file_signature(self.paths)
+        data_version = cdc.graph_base_version(self.db_path)
+        graph = Graph(store=STORE)
+        for path, _, _ in signature:
+            graph.parse(path, format="turtle")
+        data_version = max(
+            cdc.apply_graph_changes(graph, data_version, self.db_path),
+            cdc.read_version(self.version_file),
+        )
+        self._signature = signature
+        return GraphSnapshot(graph, self._version(signature, data_version), data_version)
+
+    def _apply_changes(self, current, published):
+        """Copy of the current graph with the CDC changes after its version applied"""
+        graph = copy_graph(current.graph)
+        applied = cdc.apply_graph_changes(graph, current.data_version, self.db_path)
+        # Versions without RDF changes (e.g. the first CDC run) count as applied
+        data_version = max(applied, published)
+        return GraphSnapshot(graph, self._version(self._signature, data_version), data_version)
+
+    def _swap(self, snapshot):
+        self._snapshot = snapshot
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Graph subscriber failed: {e}")
+
+    def refresh(self, wait_for_stable=False):
+        """
+        Rebuild the snapshot if the files or the CDC version changed
+
+        Runs in the calling thread (the watcher calls it periodically).
+        With wait_for_stable, a changed file is only reloaded once it is seen
+        unchanged on the next call. Returns True if the snapshot was replaced.
+        """
+        with self._lock:
+            signature = _file_signature(self.paths)
+            if signature != self._signature:
+                if wait_for_stable and signature != self._pending:
+                    self._pending = signature
+                    return False
+                started = time.perf_counter()
+                try:
+                    snapshot = self._load()
+                except Exception as e:
+                    # Keep serving the old graph; retry once the file changes again
+                    self._signature = signature
+                    print(f"Graph reload failed, keeping version {self.version}: {e}")
+                    return False
+                print(f"Graph reloaded in {time.perf_counter() - started:.1f}s ({len(snapshot.graph)} triples)")
+            else:
+                current = self._snapshot
+                published = cdc.read_version(self.version_file)
+                if published <= current.data_version:
+                    return False
+                snapshot = self._apply_changes(current, published)
+                print(f"Graph updated to data version {snapshot.data_version}")
+            self._swap(snapshot)
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh(wait_for_stable=True)
+            except Exception as e:
+                print(f"Graph watcher error: {e}")
+
+    def start(self):
+        """Start the background watcher (no-op if running or poll_interval <= 0)"""
+        if self._thread is None and self.poll_interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="graph-store", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class VersionedCache:
+    """Dict-like cache whose entries only live as long as one graph version"""
+
+    def __init__(self, store, maxsize=256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._version = store.version
+        self._entries = {}
+        store.subscribe(self._invalidate)
+
+    def _invalidate(self, snapshot):
+        with self._lock:
+            self._version = snapshot.version
+            self._entries.clear()
+
+    def get(self, version, key, default=None):
+        with self._lock:
+            if version != self._version:
+                return default
+            return self._entries.get(key, default)
+
+    def put(self, version, key, value):
+        with self._lock:
+            # Results computed on an older snapshot are not kept
+            if version != self._version:
+                return
+            if len(self._entries) >= self.maxsize:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = value
@@ -4,6 +4,8 @@ from datetime import datetime
 import statistics
 from collections import defaultdict
 
+from term_store import STORE
+
 # Define namespaces
 EX = Namespace("http://example.org/ontology#")
 RES = Namespace("http://example.org/resource/")
@@ -166,7 +168,7 @@ def analyze_industry_trends(g, industry_name):
 
 def main():
     print("Loading RDF graph...")
-    g = Graph()
+    g = Graph(store=STORE)
     g.parse("startups_graph.ttl", format="turtle")
     print("Graph loaded successfully!")
     
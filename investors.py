@@ -0,0 +1,126 @@
+"""
+Investor names of the deals table.
+
+The Investors cell of a deal lists every participant of the round
+("Redalpine, ZKB, private investors"). split_investors() cuts it into one
+name per investor and investor_key() maps the spellings of an investor
+(case, accents, punctuation, legal form, plural, known aliases such as ZKB
+for Zürcher Kantonalbank) to a single key:
+
+    split_investors("Altos Venture, ZKB, and private investors")
+    # ["Altos Venture", "ZKB", "private investors"]
+    investor_key("ZKB") == investor_key("Zürcher Kantonalbank AG")   # True
+
+rdf_converter.py mints one ex:Investor per key and startups_db.py indexes
+the deals of each key, so "deals by investor X" is a lookup instead of a
+substring scan over the cells.
+
+Only commas and semicolons outside parentheses separate investors: "and"
+and "&" are part of too many names ("Lindt & Sprüngli", "new and existing
+investors") to split on, except for a leading "and" in a list.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+SEPARATOR = re.compile(r"[,;](?![^()]*\))")
+LEADING_AND = re.compile(r"^(?:and|as well as|und|et)\s+", re.IGNORECASE)
+
+# Cells and items that name no investor
+PLACEHOLDERS = {"na", "n/a", "none", "unknown", "undisclosed", "tbd"}
+
+# Trailing legal forms ignored when comparing names
+LEGAL_FORMS = {
+    "ag", "sa", "gmbh", "sarl", "sagl", "ltd", "limited", "llc", "inc", "plc", "bv", "nv", "kgaa",
+}
+
+# Other names of the same investor -> the name it is listed under
+ALIASES = {
+    "ZKB": "Zürcher Kantonalbank",
+    "Zuercher Kantonalbank": "Zürcher Kantonalbank",
+    "BAS": "Business Angels Switzerland",
+    "Serpentine": "Serpentine Ventures",
+    "Wingman": "Wingman Ventures",
+    "Spicehaus": "Spicehaus Partners",
+    "Go Beyond community": "Go Beyond",
+    "Polytech Ventures": "Polytech Ecosystem Ventures",
+    "private investor": "private investors",
+}
+
+
+def name_words(name):
+    """Lowercase ascii words of a name, without accents and trailing legal form"""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    words = re.findall(r"[a-z0-9]+", text)
+    while len(words) > 1 and words[-1] in LEGAL_FORMS:
+        words.pop()
+    return words
+
+
+def _normalize(name):
+    """Comparison form of an investor name"""
+    words = name_words(name)
+    # "Altos Venture" / "Altos Ventures"
+    if words and len(words[-1]) > 3 and words[-1].endswith("s"):
+        words[-1] = words[-1][:-1]
+    return "".join(words)
+
+
+ALIAS_KEYS = {_normalize(alias): _normalize(name) for alias, name in ALIASES.items()}
+CANONICAL_NAMES = {_normalize(name): name for name in ALIASES.values()}
+
+
+def investor_key(name):
+    """Key shared by every spelling of an investor (None for placeholders)"""
+    if name is None:
+        return None
+    key = _normalize(str(name))
+    if not key or key in PLACEHOLDERS or str(name).strip().lower().strip(".") in PLACEHOLDERS:
+        return None
+    return ALIAS_KEYS.get(key, key)
+
+
+def clean_name(name):
+    """name with collapsed whitespace and without list punctuation around it"""
+    name = re.sub(r"\s+", " ", str(name)).strip(" .")
+    return LEADING_AND.sub("", name).strip(" .")
+
+
+def split_investors(cell):
+    """Investor names of one Investors cell, one per investor, in order"""
+    if cell is None or (isinstance(cell, float) and cell != cell):
+        return []
+    names, seen = [], set()
+    for item in SEPARATOR.split(str(cell)):
+        name = clean_name(item)
+        key = investor_key(name)
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        names.append(name)
+    return names
+
+
+def canonical_name(name):
+    """Name an investor is listed under: its alias target, or name itself"""
+    return CANONICAL_NAMES.get(investor_key(name), clean_name(name))
+
+
+def investor_names(cells):
+    """
+    {key: display name} over Investors cells
+
+    Aliased investors get their canonical name, others their most frequent
+    spelling (ties go to the first one in sort order), so the result does
+    not depend on the order of the rows.
+    """
+    spellings = {}
+    for cell in cells:
+        for name in split_investors(cell):
+            spellings.setdefault(investor_key(name), Counter())[name] += 1
+    return {
+        key: CANONICAL_NAMES.get(key) or min(counts, key=lambda n: (-counts[n], n))
+        for key, counts in spellings.items()
+    }
@@ -2,16 +2,33 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from rdflib import Graph, Namespace
+from rdflib import Graph, Literal, Namespace
 import json
 import os
 import re
 
+from aggregation import yearly_funding_records, yearly_series
+from company_index import company_index
+from graph_store import POLL_INTERVAL, GraphStore, VersionedCache
+from singleflight import SingleFlight, normalize_question, normalize_sparql
+from sogc_records import SOGC_GRAPH_PATH
+
 load_dotenv()
 
-# Initialize RDF graph
-graph = Graph()
-graph.parse("startups_graph.ttl", format="turtle")
+# Initialize RDF graph; the store reloads it in the background when
+# startups_graph.ttl, sogc_graph.ttl (see sogc_records.py) or the CDC data
+# version (see cdc.py) change, so the process never needs a restart
+GRAPH_PATH = "startups_graph.ttl"
+store = GraphStore(
+    [GRAPH_PATH, SOGC_GRAPH_PATH],
+    poll_interval=float(os.getenv("GRAPH_POLL_INTERVAL", POLL_INTERVAL)),
+).start()
+
+# SPARQL results of the current graph version
+sparql_results = VersionedCache(store)
+
+# Concurrent identical questions / SPARQL queries share one computation
+inflight = SingleFlight()
 
 # Define namespaces
 EX = Namespace("http://example.org/ontology#")
@@ -24,6 +41,17 @@ model = ChatGoogleGenerativeAI(
     temperature=0.0,
 )
 
+# Optional RateLimiter applied to every LLM call (set by batch callers)
+rate_limiter = None
+
+
+def _invoke(history):
+    """Invoke the LLM, waiting for the rate limiter first if one is set"""
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    return model.invoke(history)
+
+
 # Create system message for SPARQL generation
 system_prompt = """You are an expert in GENERATING SPARQL QUERIES to extract data from an RDF graph.
 Your PRIMARY RESPONSIBILITY is to CONVERT natural language questions into VALID SPARQL QUERIES.
@@ -42,6 +70,8 @@ Core Classes:
 - Investor - Represents investors
 - Canton - Represents Swiss regions
 - City - Represents cities
+- RegistryEvent - Commercial register (SOGC) publication about a startup; each is also
+  one of RegistryPublication, CapitalChange, BoardMember or Liquidation
 
 Important Relationships:
 - Startup hasIndustry Industry (connects companies to their industry)
@@ -51,9 +81,17 @@ Important Relationships:
 - FundingEvent amount (funding amount in CHF)
 - FundingEvent type (funding type)
 - FundingEvent phase (funding phase)
-- FundingEvent investor Investor (links to investor)
+- FundingEvent investor Investor (one link per investor of the round; each Investor is a single
+  investor with one canonical name, e.g. "Zürcher Kantonalbank" for ZKB)
 - FundingEvent round_date (when the funding occurred) - NOT date
 - City isIn Canton (connects cities to their canton/region)
+- Startup uid (Swiss company UID, e.g. "CHE-236.101.881")
+- Startup hasRegistryEvent RegistryEvent (SOGC publications, only for companies looked up before)
+- RegistryEvent event_date (xsd:date), publication_number
+- RegistryPublication event_kind ("registration", "change" or "deletion")
+- CapitalChange capital, previous_capital (in the stated currency), currency
+- BoardMember person_name, role, signature, change ("joined" or "left")
+- Liquidation status ("in_liquidation" or "deleted")
 
 SPARQL Query Guidelines:
 1. For aggregations (SUM, COUNT, etc.), use GROUP BY and HAVING clauses
@@ -107,8 +145,33 @@ ORDER BY ?date
 YOUR RESPONSE MUST ONLY CONTAIN A VALID SPARQL QUERY, WITHOUT ANY ANALYSIS OR EXPLANATION.
 Analysis will be done in a separate step after the query results are obtained."""
 
+
+# Graphs built by older versions of rdf_converter.py have one Investor per
+# Investors cell and no ex:uid; the prompt must not advertise either for them
+SPLIT_INVESTORS_LINE = """- FundingEvent investor Investor (one link per investor of the round; each Investor is a single
+  investor with one canonical name, e.g. "Zürcher Kantonalbank" for ZKB)
+"""
+LEGACY_INVESTORS_LINE = """- FundingEvent investor Investor (one Investor per round whose name lists all of its
+  investors, e.g. "Redalpine, ZKB, private investors"; match investors with CONTAINS)
+"""
+UID_LINE = """- Startup uid (Swiss company UID, e.g. "CHE-236.101.881")
+"""
+
+
+def graph_system_prompt(graph):
+    """system_prompt describing only the predicates graph actually has"""
+    if next(iter(graph.triples((None, EX.uid, None))), None) is not None:
+        return system_prompt
+    return system_prompt.replace(SPLIT_INVESTORS_LINE, LEGACY_INVESTORS_LINE).replace(UID_LINE, "")
+
+
+def new_chat_history():
+    """Return a fresh chat history seeded with the SPARQL system prompt of the current graph"""
+    return [SystemMessage(content=graph_system_prompt(store.graph))]
+
+
 # Initialize chat history
-chat_history = [SystemMessage(content=system_prompt)]
+chat_history = new_chat_history()
 
 
 def normalize_industry_name(industry_name):
@@ -168,6 +231,20 @@ def normalize_industry_name(industry_name):
 
 def execute_sparql(query):
     """Execute SPARQL query and return results"""
+    # One snapshot for the whole call, even if the store swaps meanwhile
+    snapshot = store.snapshot()
+    key = normalize_sparql(query)
+    results = sparql_results.get(snapshot.version, key)
+    if results is None:
+        results = inflight.do(
+            ("sparql", key, snapshot.version), _execute_sparql, snapshot.graph, query
+        )
+        sparql_results.put(snapshot.version, key, results)
+    # Callers get their own rows; the cached ones stay untouched
+    return [dict(row) for row in results] if isinstance(results, list) else results
+
+
+def _execute_sparql(graph, query):
     try:
         results = graph.query(query)
         # Convert results to a list of dictionaries
@@ -537,24 +614,64 @@ def analyze_funding_data(data):
     return funding_analysis
 
 
+def industry_funding_query(industry_name):
+    """Build the SPARQL query listing every funding round in an industry"""
+    return """
+    PREFIX ex: <http://example.org/ontology#>
+    PREFIX res: <http://example.org/resource/>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+    SELECT ?company_name ?date ?amount ?phase
+    WHERE {
+        ?company a ex:Startup ;
+                ex:name ?company_name ;
+                ex:hasIndustry ?industry .
+        ?industry ex:name %s .
+        ?company ex:hasFunding ?funding .
+        OPTIONAL { ?funding ex:round_date ?date }
+        OPTIONAL { ?funding ex:amount ?amount }
+        OPTIONAL { ?funding ex:phase ?phase }
+    }
+    ORDER BY ?date
+    """ % Literal(industry_name).n3()
+
+
+def resolve_companies(company_names, graph=None):
+    """{name: startup URI} for the names matching a startup (see company_index)"""
+    index = company_index(store.graph if graph is None else graph)
+    resolved = {}
+    for name in company_names:
+        uri = index.resolve(name)
+        if uri is not None:
+            resolved[name] = uri
+    return resolved
+
+
 def perform_company_market_comparison(company_names, results):
     """
     Perform a comparative analysis between specific companies and their market/industry
 
     Args:
-        company_names: List of company names to analyze
+        company_names: List of company names to analyze (partial or
+            differently cased names are resolved with the company index)
         results: Results from the company query
 
     Returns:
         Dictionary with company data and market trends for comparison
     """
     comparison_data = {"companies": {}, "market_trends": {}, "insights": []}
+    graph = store.graph
+    index = company_index(graph)
+    wanted = {str(uri) for uri in resolve_companies(company_names, graph).values()}
 
     # Extract company data from results
     for item in results:
-        if "company_name" in item and item["company_name"] in company_names:
-            company_name = item["company_name"]
-
+        company_name = item.get("company_name")
+        if not company_name:
+            continue
+        # Rows carry the ?company URI when the query binds it
+        uri = item.get("company") or index.lookup(company_name)
+        if str(uri) in wanted:
             # Initialize company in the dictionary if not already present
             if company_name not in comparison_data["companies"]:
                 comparison_data["companies"][company_name] = {
@@ -612,77 +729,12 @@ def perform_company_market_comparison(company_names, results):
             industry_name = company_data["industry"]
 
             # Query to get industry trends
-            industry_query = f"""
-            PREFIX ex: <http://example.org/ontology#>
-            PREFIX res: <http://example.org/resource/>
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-            SELECT ?company_name ?date ?amount ?phase
-            WHERE {{
-                ?company a ex:Startup ;
-                        ex:name ?company_name ;
-                        ex:hasIndustry ?industry .
-                ?industry ex:name "{industry_name}" .
-                ?company ex:hasFunding ?funding .
-                OPTIONAL {{ ?funding ex:round_date ?date }}
-                OPTIONAL {{ ?funding ex:amount ?amount }}
-                OPTIONAL {{ ?funding ex:phase ?phase }}
-            }}
-            ORDER BY ?date
-            """
+            industry_query = industry_funding_query(industry_name)
 
             industry_results = execute_sparql(industry_query)
 
             # Process industry results to get yearly trends
-            industry_yearly_data = {}
-
-            for item in industry_results:
-                if "date" in item and item["date"] and item["date"] != "None":
-                    year = str(item["date"])[:4]
-
-                    if year.isdigit() and len(year) == 4:
-                        if year not in industry_yearly_data:
-                            industry_yearly_data[year] = {
-                                "count": 0,
-                                "total_funding": 0,
-                                "companies": set(),
-                            }
-
-                        industry_yearly_data[year]["count"] += 1
-
-                        # Add amount if available
-                        if (
-                            "amount" in item
-                            and item["amount"]
-                            and item["amount"] != "None"
-                        ):
-                            try:
-                                amount = float(item["amount"])
-                                industry_yearly_data[year]["total_funding"] += amount
-                            except ValueError:
-                                pass
-
-                        # Add company name
-                        if "company_name" in item and item["company_name"]:
-                            industry_yearly_data[year]["companies"].add(
-                                item["company_name"]
-                            )
-
-            # Convert to list for easier processing
-            yearly_trend_list = []
-            for year in sorted(industry_yearly_data.keys()):
-                yearly_trend_list.append(
-                    {
-                        "year": year,
-                        "funding_rounds": industry_yearly_data[year]["count"],
-                        "total_funding": industry_yearly_data[year]["total_funding"],
-                        "total_funding_millions": industry_yearly_data[year][
-                            "total_funding"
-                        ]
-                        / 1000000,
-                        "companies_count": len(industry_yearly_data[year]["companies"]),
-                    }
-                )
+            yearly_trend_list = yearly_funding_records(industry_results)
 
             # Add to comparison data
             comparison_data["market_trends"][industry_name] = {
@@ -708,8 +760,46 @@ def perform_company_market_comparison(company_names, results):
     return comparison_data
 
 
-def process_query(user_query):
-    """Process a natural language query through the agent using a two-step approach"""
+def process_query(user_query, history=None):
+    """
+    Process a natural language query through the agent using a two-step approach
+
+    Args:
+        user_query: Natural language question
+        history: Chat history to use for the LLM calls. Defaults to the shared
+            module-level chat_history; concurrent callers should pass their own
+            (see new_chat_history) so conversations don't interleave.
+    """
+    if history is None:
+        history = chat_history
+
+    # Identical questions asked in the same context (same history so far)
+    # already in flight share that computation and its two LLM calls;
+    # followers then record the leader's exchange in their own history
+    leader_history, exchange, response = inflight.do(
+        ("question", normalize_question(user_query), store.version, _history_key(history)),
+        _record_exchange,
+        user_query,
+        history,
+    )
+    if leader_history is not history:
+        history.extend(exchange)
+    return response
+
+
+def _history_key(history):
+    """Hashable form of a chat history's messages"""
+    return tuple((message.type, str(message.content)) for message in list(history))
+
+
+def _record_exchange(user_query, history):
+    """(history, messages the query appended to it, response)"""
+    start = len(history)
+    response = _process_query(user_query, history)
+    return history, list(history[start:]), response
+
+
+def _process_query(user_query, history):
     # Check if this is a comparison query
     is_comparison_query = any(
         term in user_query.lower()
@@ -749,10 +839,10 @@ def process_query(user_query):
             If no specific company names are mentioned, return "NONE".
             """
 
-            chat_history.append(HumanMessage(content=company_extraction_prompt))
-            company_response = model.invoke(chat_history)
+            history.append(HumanMessage(content=company_extraction_prompt))
+            company_response = _invoke(history)
             company_text = company_response.content.strip()
-            chat_history.append(AIMessage(content=company_text))
+            history.append(AIMessage(content=company_text))
 
             # Process the response to extract company names
             if company_text and company_text.lower() != "none":
@@ -783,24 +873,31 @@ GENERATE SPARQL QUERY:"""
 
     # Modify the query instruction if this is a comparison query with specific companies
     if is_comparison_query and company_names:
+        companies = resolve_companies(company_names)
+        if companies:
+            # Bind the startups directly instead of matching their names
+            values = " ".join(uri.n3() for uri in dict.fromkeys(companies.values()))
+            company_filter = f"Bind the companies with exactly this clause: VALUES ?company {{ {values} }} and select ?company too."
+        else:
+            company_filter = "Use VALUES clause to filter for the exact company names."
         query_instruction = f"""USER QUERY: Get data for the following companies: {", ".join(company_names)}
 
 IMPORTANT INSTRUCTIONS:
 1. Your task is to GENERATE a SPARQL query that will extract ALL data needed about these specific companies.
 2. Include company name, industry name, funding amounts, dates, phases, and locations.
-3. Use VALUES clause to filter for the exact company names.
+3. {company_filter}
 4. ONLY return a valid SPARQL query.
 5. Format your response as a valid SPARQL query with PREFIX declarations.
 
 GENERATE SPARQL QUERY:"""
 
     # Add the specific query instruction to chat history
-    chat_history.append(HumanMessage(content=query_instruction))
+    history.append(HumanMessage(content=query_instruction))
 
     # Get SPARQL query from LLM
-    response = model.invoke(chat_history)
+    response = _invoke(history)
     response_content = response.content
-    chat_history.append(AIMessage(content=response_content))
+    history.append(AIMessage(content=response_content))
 
     # Extract SPARQL query from response - be more robust in extraction
     try:
@@ -821,7 +918,7 @@ GENERATE SPARQL QUERY:"""
             else:
                 # If still no clear query, provide error feedback
                 error_msg = "Response does not contain a valid SPARQL query. Please ensure your response contains only a SPARQL query."
-                chat_history.append(HumanMessage(content=error_msg))
+                history.append(HumanMessage(content=error_msg))
                 return f"Error: {error_msg}"
 
         print(f"Extracted SPARQL Query:\n{sparql_query}")
@@ -1010,10 +1107,10 @@ For this comparison analysis:
 Be data-driven and thorough in your comparison. The analysis should highlight specific insights about how these companies stack up against broader market/industry trends."""
 
             # Send comparison analysis to LLM
-            chat_history.append(HumanMessage(content=analysis_prompt))
-            analysis_response = model.invoke(chat_history)
+            history.append(HumanMessage(content=analysis_prompt))
+            analysis_response = _invoke(history)
             analysis_content = analysis_response.content
-            chat_history.append(AIMessage(content=analysis_content))
+            history.append(AIMessage(content=analysis_content))
 
             # Format response with comparison data
             response = {
@@ -1023,6 +1120,7 @@ Be data-driven and thorough in your comparison. The analysis should highlight sp
                 "llm_analysis": analysis_content,
                 "is_comparison": True,
                 "comparison_data": comparison_data,
+                "series": yearly_series(results),
             }
 
             return json.dumps(response, indent=2)
@@ -1041,7 +1139,7 @@ Be data-driven and thorough in your comparison. The analysis should highlight sp
         )
 
         # If this appears to be a trend query with dates and amounts, provide year-by-year summaries
-        yearly_summary = {}
+        yearly_data_list = []
         has_date = False
         has_amount = False
 
@@ -1053,58 +1151,10 @@ Be data-driven and thorough in your comparison. The analysis should highlight sp
             # If it's trend analysis with dates and amounts, aggregate by year
             if is_trend_analysis and has_date and has_amount:
                 print("Aggregating results by year for trend analysis...")
-
-                # Process results to get yearly data
-                for item in results:
-                    date_field = "date" if "date" in item else "round_date"
-
-                    if item[date_field] and item[date_field] != "None":
-                        year = str(item[date_field])[:4]
-
-                        if year.isdigit() and len(year) == 4:
-                            if year not in yearly_summary:
-                                yearly_summary[year] = {
-                                    "count": 0,
-                                    "total_funding": 0,
-                                    "companies": set(),
-                                }
-
-                            yearly_summary[year]["count"] += 1
-
-                            # Add amount if available
-                            if (
-                                "amount" in item
-                                and item["amount"]
-                                and item["amount"] != "None"
-                            ):
-                                try:
-                                    amount = float(item["amount"])
-                                    yearly_summary[year]["total_funding"] += amount
-                                except ValueError:
-                                    pass
-
-                            # Add company name if available
-                            if "company_name" in item and item["company_name"]:
-                                yearly_summary[year]["companies"].add(
-                                    item["company_name"]
-                                )
+                yearly_data_list = yearly_funding_records(results)
 
         # Step 2: Send results back to LLM for analysis - with enhanced yearly summary if applicable
-        if is_trend_analysis and yearly_summary:
-            # Convert yearly_summary to a list sorted by year for the analysis prompt
-            yearly_data_list = []
-            for year in sorted(yearly_summary.keys()):
-                yearly_data_list.append(
-                    {
-                        "year": year,
-                        "funding_rounds": yearly_summary[year]["count"],
-                        "total_funding": yearly_summary[year]["total_funding"],
-                        "total_funding_millions": yearly_summary[year]["total_funding"]
-                        / 1000000,
-                        "companies_count": len(yearly_summary[year]["companies"]),
-                    }
-                )
-
+        if is_trend_analysis and yearly_data_list:
             # Create an analysis prompt with the full yearly summary
             analysis_prompt = f"""I've executed your SPARQL query and obtained results for {len(results)} records.
 
@@ -1136,7 +1186,7 @@ For this trend analysis:
 
 Important Notes:
 - The yearly_summary shows data from ALL {len(results)} records, not just a sample
-- Make sure to analyze ALL years present in the data, from {min(yearly_summary.keys()) if yearly_summary else "N/A"} to {max(yearly_summary.keys()) if yearly_summary else "N/A"}
+- Make sure to analyze ALL years present in the data, from {yearly_data_list[0]["year"]} to {yearly_data_list[-1]["year"]}
 - Pay special attention to recent trends in the last 3-5 years
 
 Your analysis should be data-driven and based on ALL the yearly data provided above."""
@@ -1259,10 +1309,10 @@ Your analysis should be data-driven and based ONLY on the results provided above
 If the data is insufficient for certain conclusions, clearly state what's missing."""
 
         # Send results to LLM for analysis
-        chat_history.append(HumanMessage(content=analysis_prompt))
-        analysis_response = model.invoke(chat_history)
+        history.append(HumanMessage(content=analysis_prompt))
+        analysis_response = _invoke(history)
         analysis_content = analysis_response.content
-        chat_history.append(AIMessage(content=analysis_content))
+        history.append(AIMessage(content=analysis_content))
 
         # Format response - return ALL results
         response = {
@@ -1270,6 +1320,7 @@ If the data is insufficient for certain conclusions, clearly state what's missin
             "raw_results": results,
             "total_results": len(results),
             "llm_analysis": analysis_content,
+            "series": yearly_series(results),
         }
 
         return json.dumps(response, indent=2)
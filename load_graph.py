@@ -2,6 +2,9 @@ from rdflib import Graph, Namespace, Literal
 from rdflib.namespace import RDF
 import random
 
+from company_index import company_index
+from term_store import STORE
+
 # Define namespaces
 EX = Namespace("http://example.org/ontology#")
 RES = Namespace("http://example.org/resource/")
@@ -15,10 +18,7 @@ def analyze_portfolio(g, companies):
         print("-" * 50)
         
         # Find the company URI
-        company_uri = None
-        for s in g.subjects(EX.name, Literal(company_name)):
-            company_uri = s
-            break
+        company_uri = company_index(g).resolve(company_name)
             
         if not company_uri:
             print(f"Company {company_name} not found in the graph")
@@ -74,7 +74,7 @@ def analyze_portfolio(g, companies):
 
 def load_and_verify_graph():
     print("Loading RDF graph...")
-    g = Graph()
+    g = Graph(store=STORE)
     
     try:
         # Load the graph
@@ -0,0 +1,159 @@
+"""
+Parallel, incremental text extraction from PDF files.
+
+Pages are extracted in chunks on a shared process pool and yielded in page
+order as soon as each chunk is ready, so callers can show the first pages of
+a long gazette while the rest is still being parsed. Only a bounded number
+of chunks is in flight at once, which caps memory on large documents.
+
+Per-page text can be cached on disk, keyed by the file's SHA-256, so a PDF
+that was already parsed is read back without touching PyPDF2.
+
+    for page in iter_pdf_pages("CHE-236.101.881.pdf"):
+        print(page.number, page.total, len(page.text))
+"""
+
+import hashlib
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import PyPDF2
+
+CHUNK_SIZE = 4
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+class PageText(NamedTuple):
+    number: int  # 1-based
+    total: int
+    text: str
+
+
+def get_executor(workers=None):
+    """Process pool shared by all extractions in this process"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            _executor_workers = workers or os.cpu_count() or 1
+            _executor = ProcessPoolExecutor(max_workers=_executor_workers)
+        return _executor
+
+
+def count_pages(pdf_path):
+    with open(pdf_path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def _extract_range(pdf_path, start, stop):
+    """Text of pages [start, stop) -- runs in a worker process"""
+    with open(pdf_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _file_digest(pdf_path):
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """Per-page text files under cache_dir/<pdf sha256>/"""
+
+    def __init__(self, cache_dir, pdf_path):
+        self.dir = os.path.join(cache_dir, _file_digest(pdf_path))
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, index):
+        return os.path.join(self.dir, f"{index:05d}.txt")
+
+    def get(self, index):
+        try:
+            with open(self._path(index), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, index, text):
+        tmp_path = self._path(index) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(index))
+
+
+def iter_pdf_pages(pdf_path, cache_dir=None, chunk_size=CHUNK_SIZE, max_pending=None):
+    """
+    Yield PageText for every page of pdf_path, in order
+
+    Args:
+        pdf_path: PDF file to read
+        cache_dir: Directory for the per-page text cache (no caching if None)
+        chunk_size: Pages extracted per worker task
+        max_pending: Chunks in flight at once (default: twice the pool size)
+    """
+    total = count_pages(pdf_path)
+    cache = PageCache(cache_dir, pdf_path) if cache_dir else None
+
+    # Small documents are not worth the round trip to a worker process
+    if total <= chunk_size:
+        texts = [cache.get(i) for i in range(total)] if cache else [None]
+        from_cache = None not in texts
+        if not from_cache:
+            texts = _extract_range(pdf_path, 0, total)
+        for index, text in enumerate(texts):
+            if cache and not from_cache:
+                cache.put(index, text)
+            yield PageText(index + 1, total, text)
+        return
+
+    executor = get_executor()
+    max_pending = max_pending or 2 * _executor_workers
+    chunks = iter(range(0, total, chunk_size))
+    pending = deque()
+
+    def submit_next():
+        for start in chunks:
+            stop = min(start + chunk_size, total)
+            cached = [cache.get(i) for i in range(start, stop)] if cache else [None]
+            if None in cached:
+                future = executor.submit(_extract_range, pdf_path, start, stop)
+                pending.append((start, future, False))
+            else:
+                pending.append((start, cached, True))
+            return True
+        return False
+
+    while len(pending) < max_pending and submit_next():
+        pass
+
+    while pending:
+        start, result, from_cache = pending.popleft()
+        texts = result if from_cache else result.result()
+        submit_next()
+        for offset, text in enumerate(texts):
+            if cache and not from_cache:
+                cache.put(start + offset, text)
+            yield PageText(start + offset + 1, total, text)
+
+
+def extract_text(pdf_path, cache_dir=None, on_page=None):
+    """
+    Full text of pdf_path, built from iter_pdf_pages
+
+    Args:
+        on_page: Optional callable(PageText) invoked as each page arrives
+    """
+    pages = []
+    for page in iter_pdf_pages(pdf_path, cache_dir=cache_dir):
+        pages.append(page.text)
+        if on_page is not None:
+            on_page(page)
+    return "".join(pages)
@@ -2,31 +2,17 @@ from rdflib import Graph, Namespace, Literal
 from rdflib.namespace import RDF, XSD
 import statistics
 
+from query_backend import SparqlBackend, get_backend
+
 # Define namespaces
 EX = Namespace("http://example.org/ontology#")
 RES = Namespace("http://example.org/resource/")
 
-def get_market_metrics(g):
-    """Get overall market metrics"""
-    query = """
-    SELECT ?company_name ?industry_name (SUM(?amount) as ?total_funding) 
-           (COUNT(?funding) as ?funding_rounds)
-    WHERE {
-        ?company a ex:Startup ;
-                ex:name ?company_name .
-        OPTIONAL {
-            ?company ex:hasIndustry ?industry .
-            ?industry ex:name ?industry_name .
-        }
-        OPTIONAL {
-            ?company ex:hasFunding ?funding .
-            OPTIONAL { ?funding ex:amount ?amount }
-        }
-    }
-    GROUP BY ?company_name ?industry_name
-    """
-    
-    results = list(g.query(query))
+def get_market_metrics(backend=None):
+    """Get overall market metrics from a QueryBackend (or an rdflib Graph)"""
+    if backend is None or isinstance(backend, Graph):
+        backend = get_backend() if backend is None else SparqlBackend(graph=backend)
+    results = backend.company_funding()
     
     # Calculate market metrics
     fundings = []
@@ -34,12 +20,12 @@ def get_market_metrics(g):
     industries = {}
     
     for row in results:
-        if row.total_funding:
-            fundings.append(float(row.total_funding))
-        rounds.append(int(row.funding_rounds))
+        if row['total_funding']:
+            fundings.append(float(row['total_funding']))
+        rounds.append(int(row['funding_rounds']))
         
         # Track industry distribution
-        industry = str(row.industry_name) if row.industry_name else "Unknown"
+        industry = row['industry'] or "Unknown"
         if industry not in industries:
             industries[industry] = 0
         industries[industry] += 1
@@ -52,17 +38,16 @@ def get_market_metrics(g):
         'industry_distribution': industries
     }
 
-def analyze_portfolio(companies):
-    print("Loading RDF graph...")
-    g = Graph()
-    g.parse("startups_graph.ttl", format="turtle")
-    print("Graph loaded successfully!")
+def analyze_portfolio(companies, backend=None):
+    # Aggregates come from SQL when startups_clean.db exists (see query_backend)
+    backend = backend or get_backend()
+    print(f"Using the {backend.name} query backend")
     
     print("\nPortfolio Analysis")
     print("=" * 80)
     
     # Get market metrics
-    market = get_market_metrics(g)
+    market = get_market_metrics(backend)
     
     # Portfolio metrics
     portfolio_fundings = []
@@ -75,39 +60,15 @@ def analyze_portfolio(companies):
         print("-" * 50)
         
         # Get company details
-        query = """
-        SELECT ?industry_name ?location_name (COUNT(?funding) as ?funding_rounds) 
-                (SUM(?amount) as ?total_funding)
-        WHERE {
-            ?company a ex:Startup ;
-                    ex:name ?company_name .
-            OPTIONAL {
-                ?company ex:hasIndustry ?industry .
-                ?industry ex:name ?industry_name .
-            }
-            OPTIONAL {
-                ?company ex:hasLocation ?location .
-                ?location ex:name ?location_name .
-            }
-            OPTIONAL {
-                ?company ex:hasFunding ?funding .
-                OPTIONAL { ?funding ex:amount ?amount }
-            }
-            FILTER(?company_name = %s)
-        }
-        GROUP BY ?industry_name ?location_name
-        """
-        
-        results = list(g.query(query % Literal(company_name).n3()))
-        if not results:
+        details = backend.company_details(company_name)
+        if not details:
             print(f"Company {company_name} not found in the database")
             continue
             
-        details = results[0]
-        industry = str(details.industry_name) if details.industry_name else "Unknown"
-        location = str(details.location_name) if details.location_name else "Unknown"
-        total_funding = float(details.total_funding) if details.total_funding else 0
-        funding_rounds = int(details.funding_rounds)
+        industry = details['industry'] or "Unknown"
+        location = details['location'] or "Unknown"
+        total_funding = details['total_funding'] or 0
+        funding_rounds = details['funding_rounds']
         
         # Update portfolio metrics
         portfolio_fundings.append(total_funding)
@@ -159,18 +120,7 @@ def analyze_portfolio(companies):
     print(f"Geographic Concentration: {len(portfolio_locations)} different locations")
     print(f"Funding Stage Distribution:")
     for company in companies:
-        query = """
-        SELECT ?phase
-        WHERE {
-            ?company a ex:Startup ;
-                    ex:name ?company_name ;
-                    ex:hasFunding ?funding .
-            OPTIONAL { ?funding ex:phase ?phase }
-            FILTER(?company_name = %s)
-        }
-        """
-        results = list(g.query(query % Literal(company).n3()))
-        phases = [str(r.phase) for r in results if r.phase]
+        phases = backend.company_phases(company)
         print(f"- {company}: {', '.join(phases) if phases else 'No funding rounds'}")
 
 if __name__ == "__main__":
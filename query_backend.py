@@ -0,0 +1,493 @@
+"""
+Pluggable backends for the aggregate analytics.
+
+The analysis scripts ask a QueryBackend for grouped figures instead of
+running SPARQL themselves. SparqlBackend evaluates the queries with rdflib
+over startups_graph.ttl; SqlBackend computes the same aggregates with SQL
+over startups_clean.db (see database.py), which is orders of magnitude
+faster for GROUP BY queries over every startup.
+
+The backend is chosen with QUERY_BACKEND=sparql|sql|auto (default auto:
+SQL when the database has been built, SPARQL otherwise):
+
+    backend = get_backend()
+    for industry, startups in backend.industry_counts(TECH_INDUSTRIES, TECH_PREFIXES):
+        ...
+
+Amounts are in CHF from both backends. Names from SqlBackend are lowercase,
+as database.py stores char values lowercased.
+"""
+
+import os
+
+from rdflib import RDF, Graph, Literal
+
+from company_index import company_index
+from investors import investor_key
+from rdf_converter import EX, RES, investor_node
+from startups_db import AMOUNT_SCALE, COMPANIES, DEALS, FUNDING_TABLE, StartupRepository
+from term_store import STORE
+
+GRAPH_PATH = "startups_graph.ttl"
+
+# Industries making up the tech sector, plus prefixes such as "ICT (fintech)"
+TECH_INDUSTRIES = ("biotech", "medtech", "healthcare IT", "micro/nano", "cleantech")
+TECH_PREFIXES = ("ICT",)
+
+PREFIXES = "PREFIX ex: <http://example.org/ontology#>\n"
+
+
+def _chf(value):
+    """Amount in CHF rounded to cents, so both backends return the same totals"""
+    return round(float(value), 2)
+
+
+class QueryBackend:
+    """Aggregates used by portfolio_analysis and tech_sector_analysis"""
+
+    name = None
+
+    def company_funding(self):
+        """[{company, industry, total_funding, funding_rounds}] for every startup"""
+        raise NotImplementedError
+
+    def company_details(self, company):
+        """{industry, location, total_funding, funding_rounds} of one startup, or None"""
+        raise NotImplementedError
+
+    def company_phases(self, company):
+        """Phases of a startup's funding rounds"""
+        raise NotImplementedError
+
+    def industry_counts(self, industries, prefixes=()):
+        """[(industry, startups)], largest first"""
+        raise NotImplementedError
+
+    def yearly_funding(self, industries, prefixes, start_year, end_year):
+        """[(year, funding events, total amount)] for funded rounds, by year"""
+        raise NotImplementedError
+
+    def phase_counts(self, industries, prefixes=()):
+        """[(phase, funding events)], largest first"""
+        raise NotImplementedError
+
+    def top_funded(self, industries, prefixes=(), limit=10):
+        """[(company, total funding)], largest first"""
+        raise NotImplementedError
+
+    def location_counts(self, industries, prefixes=()):
+        """[(canton or city, startups)], largest first"""
+        raise NotImplementedError
+
+    def investor_deals(self, investor):
+        """[{company, date, phase, amount}] of one investor (any spelling), oldest first"""
+        raise NotImplementedError
+
+
+class SparqlBackend(QueryBackend):
+    """Aggregates evaluated by rdflib over the RDF graph"""
+
+    name = "sparql"
+
+    def __init__(self, graph=None, path=GRAPH_PATH):
+        self._graph = graph
+        self.path = path
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            print("Loading RDF graph...")
+            self._graph = Graph(store=STORE)
+            self._graph.parse(self.path, format="turtle")
+            print("Graph loaded successfully!")
+        return self._graph
+
+    def _query(self, query):
+        return list(self.graph.query(PREFIXES + query))
+
+    @staticmethod
+    def _industry_filter(industries, prefixes):
+        tests = [f"STRSTARTS(?industry_name, {Literal(p).n3()})" for p in prefixes]
+        tests += [f"?industry_name = {Literal(i).n3()}" for i in industries]
+        return f"FILTER ({' || '.join(tests)})"
+
+    def company_funding(self):
+        rows = self._query("""
+        SELECT ?company_name ?industry_name (SUM(?amount) as ?total_funding)
+               (COUNT(?funding) as ?funding_rounds)
+        WHERE {
+            ?company a ex:Startup ;
+                    ex:name ?company_name .
+            OPTIONAL {
+                ?company ex:hasIndustry ?industry .
+                ?industry ex:name ?industry_name .
+            }
+            OPTIONAL {
+                ?company ex:hasFunding ?funding .
+                OPTIONAL { ?funding ex:amount ?amount }
+            }
+        }
+        GROUP BY ?company_name ?industry_name
+        """)
+        return [
+            {
+                "company": str(row.company_name),
+                "industry": str(row.industry_name) if row.industry_name else None,
+                "total_funding": _chf(row.total_funding) if row.total_funding else None,
+                "funding_rounds": int(row.funding_rounds),
+            }
+            for row in rows
+        ]
+
+    def company_details(self, company):
+        uri = company_index(self.graph).resolve(company)
+        if uri is None:
+            return None
+        rows = self._query("""
+        SELECT ?industry_name ?location_name (COUNT(?funding) as ?funding_rounds)
+                (SUM(?amount) as ?total_funding)
+        WHERE {
+            VALUES ?company { %s }
+            OPTIONAL {
+                ?company ex:hasIndustry ?industry .
+                ?industry ex:name ?industry_name .
+            }
+            OPTIONAL {
+                ?company ex:hasLocation ?location .
+                ?location ex:name ?location_name .
+            }
+            OPTIONAL {
+                ?company ex:hasFunding ?funding .
+                OPTIONAL { ?funding ex:amount ?amount }
+            }
+        }
+        GROUP BY ?industry_name ?location_name
+        """ % uri.n3())
+        if not rows:
+            return None
+        row = rows[0]
+        return {
+            "industry": str(row.industry_name) if row.industry_name else None,
+            "location": str(row.location_name) if row.location_name else None,
+            "total_funding": _chf(row.total_funding) if row.total_funding else None,
+            "funding_rounds": int(row.funding_rounds),
+        }
+
+    def company_phases(self, company):
+        uri = company_index(self.graph).resolve(company)
+        if uri is None:
+            return []
+        rows = self._query("""
+        SELECT ?phase
+        WHERE {
+            VALUES ?company { %s }
+            ?company ex:hasFunding ?funding .
+            OPTIONAL { ?funding ex:phase ?phase }
+        }
+        """ % uri.n3())
+        return [str(row.phase) for row in rows if row.phase]
+
+    def industry_counts(self, industries, prefixes=()):
+        rows = self._query("""
+        SELECT ?industry_name (COUNT(DISTINCT ?startup) as ?count)
+        WHERE {
+            ?startup a ex:Startup ;
+                    ex:hasIndustry ?industry .
+            ?industry ex:name ?industry_name .
+            %s
+        }
+        GROUP BY ?industry_name
+        ORDER BY DESC(?count)
+        """ % self._industry_filter(industries, prefixes))
+        return [(str(row.industry_name), int(row["count"])) for row in rows]
+
+    def yearly_funding(self, industries, prefixes, start_year, end_year):
+        rows = self._query("""
+        SELECT ?year (COUNT(DISTINCT ?funding) as ?funding_count)
+                     (SUM(?amount) as ?total_amount)
+        WHERE {
+            ?startup a ex:Startup ;
+                    ex:hasIndustry ?industry ;
+                    ex:hasFunding ?funding .
+            ?industry ex:name ?industry_name .
+            ?funding ex:amount ?amount ;
+                    ex:round_date ?funding_date .
+            BIND (YEAR(?funding_date) as ?year)
+            FILTER (?year >= %d && ?year <= %d)
+            %s
+        }
+        GROUP BY ?year
+        ORDER BY ?year
+        """ % (start_year, end_year, self._industry_filter(industries, prefixes)))
+        return [
+            (int(row.year), int(row.funding_count), _chf(row.total_amount)) for row in rows
+        ]
+
+    def phase_counts(self, industries, prefixes=()):
+        rows = self._query("""
+        SELECT ?phase (COUNT(DISTINCT ?funding) as ?count)
+        WHERE {
+            ?startup a ex:Startup ;
+                    ex:hasIndustry ?industry ;
+                    ex:hasFunding ?funding .
+            ?industry ex:name ?industry_name .
+            ?funding ex:phase ?phase .
+            %s
+        }
+        GROUP BY ?phase
+        ORDER BY DESC(?count)
+        """ % self._industry_filter(industries, prefixes))
+        return [(str(row.phase), int(row["count"])) for row in rows]
+
+    def top_funded(self, industries, prefixes=(), limit=10):
+        rows = self._query("""
+        SELECT ?name (SUM(?amount) as ?total_funding)
+        WHERE {
+            ?startup a ex:Startup ;
+                    ex:name ?name ;
+                    ex:hasIndustry ?industry ;
+                    ex:hasFunding ?funding .
+            ?industry ex:name ?industry_name .
+            ?funding ex:amount ?amount .
+            %s
+        }
+        GROUP BY ?name
+        ORDER BY DESC(?total_funding)
+        LIMIT %d
+        """ % (self._industry_filter(industries, prefixes), limit))
+        return [(str(row.name), _chf(row.total_funding)) for row in rows]
+
+    def location_counts(self, industries, prefixes=()):
+        rows = self._query("""
+        SELECT ?location (COUNT(DISTINCT ?startup) as ?count)
+        WHERE {
+            ?startup a ex:Startup ;
+                    ex:hasIndustry ?industry ;
+                    ex:hasLocation ?loc .
+            ?industry ex:name ?industry_name .
+            ?loc ex:name ?location .
+            %s
+        }
+        GROUP BY ?location
+        ORDER BY DESC(?count)
+        """ % self._industry_filter(industries, prefixes))
+        return [(str(row.location), int(row["count"])) for row in rows]
+
+    def _investor(self, investor):
+        key = investor_key(investor)
+        if key is None:
+            return None
+        node = investor_node(key)
+        if (node, RDF.type, EX.Investor) in self.graph:
+            return node
+        # Otherwise the most active investor whose key contains the name
+        prefix = str(RES["investor-"])
+        candidates = [
+            uri for uri in self.graph.subjects(RDF.type, EX.Investor)
+            if key in uri[len(prefix):]
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda uri: len(list(self.graph.subjects(EX.investor, uri))))
+
+    def investor_deals(self, investor):
+        node = self._investor(investor)
+        if node is None:
+            return []
+        # The investor is bound, so rdflib walks its ex:investor index entries
+        rows = self._query("""
+        SELECT ?company_name ?date ?phase ?amount
+        WHERE {
+            ?funding ex:investor %s .
+            ?company ex:hasFunding ?funding ;
+                    ex:name ?company_name .
+            OPTIONAL { ?funding ex:round_date ?date }
+            OPTIONAL { ?funding ex:phase ?phase }
+            OPTIONAL { ?funding ex:amount ?amount }
+        }
+        ORDER BY ?date
+        """ % node.n3())
+        return [
+            {
+                "company": str(row.company_name),
+                "date": str(row.date) if row.date else None,
+                "phase": str(row.phase) if row.phase else None,
+                "amount": _chf(row.amount) if row.amount else None,
+            }
+            for row in rows
+        ]
+
+
+class SqlBackend(QueryBackend):
+    """The same aggregates as SQL over startups_clean.db"""
+
+    name = "sql"
+
+    # One row per startup name and industry, like the graph's ex:Startup nodes
+    STARTUPS = f"(SELECT DISTINCT Title, Industry, Canton, City FROM {COMPANIES})"
+    # Deals joined to startups by company name, as rdf_converter links them
+    FUNDING_QUERY = (
+        f"(SELECT Company, COUNT(*) AS rounds, ROUND(SUM(Amount) * {AMOUNT_SCALE}, 2) AS total "
+        f"FROM {DEALS} GROUP BY Company)"
+    )
+
+    def __init__(self, repository=None):
+        self.repository = repository or StartupRepository()
+        self._funding = None
+
+    @property
+    def funding(self):
+        # Precomputed by database.py and kept current by cdc.py when present
+        if self._funding is None:
+            self._funding = (
+                FUNDING_TABLE if self.repository.has_table(FUNDING_TABLE) else self.FUNDING_QUERY
+            )
+        return self._funding
+
+    def _query(self, sql, params=()):
+        return self.repository.query(sql, params)
+
+    @staticmethod
+    def _industry_filter(industries, prefixes, column="c.Industry"):
+        tests = [f"{column} LIKE ?" for _ in prefixes]
+        tests += [f"{column} = ?" for _ in industries]
+        params = [p.lower() + "%" for p in prefixes] + [i.lower() for i in industries]
+        return f"({' OR '.join(tests)})", params
+
+    def company_funding(self):
+        rows = self._query(f"""
+            SELECT c.Title AS company, c.Industry AS industry,
+                   f.total AS total_funding, COALESCE(f.rounds, 0) AS funding_rounds
+            FROM (SELECT DISTINCT Title, Industry FROM {COMPANIES}) c
+            LEFT JOIN {self.funding} f ON f.Company = c.Title
+            WHERE c.Title IS NOT NULL
+        """)
+        return rows
+
+    def _title(self, company):
+        # Partial names resolve too, as with the SPARQL backend's company index
+        row = self.repository.find_company(company)
+        return row["Title"] if row else None
+
+    def company_details(self, company):
+        title = self._title(company)
+        if title is None:
+            return None
+        rows = self._query(f"""
+            SELECT c.Industry AS industry, c.Canton AS location,
+                   f.total AS total_funding, COALESCE(f.rounds, 0) AS funding_rounds
+            FROM {self.STARTUPS} c
+            LEFT JOIN {self.funding} f ON f.Company = c.Title
+            WHERE c.Title = ?
+            LIMIT 1
+        """, (title,))
+        return rows[0] if rows else None
+
+    def company_phases(self, company):
+        title = self._title(company)
+        if title is None:
+            return []
+        rows = self._query(
+            f"SELECT Phase AS phase FROM {DEALS} WHERE Company = ? AND Phase IS NOT NULL",
+            (title,),
+        )
+        return [row["phase"] for row in rows]
+
+    def industry_counts(self, industries, prefixes=()):
+        where, params = self._industry_filter(industries, prefixes)
+        rows = self._query(f"""
+            SELECT c.Industry AS industry, COUNT(DISTINCT c.Title) AS startups
+            FROM {COMPANIES} c
+            WHERE {where}
+            GROUP BY c.Industry
+            ORDER BY startups DESC
+        """, params)
+        return [(row["industry"], row["startups"]) for row in rows]
+
+    def _tech_deals(self, industries, prefixes):
+        """Deals of startups in the selected industries, one row per deal and industry"""
+        where, params = self._industry_filter(industries, prefixes)
+        return (
+            f"""(SELECT DISTINCT d.rowid AS deal, d.Company AS company, d.Amount AS amount,
+                       d.Phase AS phase, d."Date of the funding round" AS date
+                FROM {DEALS} d
+                JOIN {COMPANIES} c ON c.Title = d.Company
+                WHERE {where})""",
+            params,
+        )
+
+    def yearly_funding(self, industries, prefixes, start_year, end_year):
+        deals, params = self._tech_deals(industries, prefixes)
+        rows = self._query(f"""
+            SELECT CAST(substr(date, 1, 4) AS INTEGER) AS year, COUNT(*) AS events,
+                   ROUND(SUM(amount) * {AMOUNT_SCALE}, 2) AS total
+            FROM {deals}
+            WHERE amount IS NOT NULL AND year BETWEEN ? AND ?
+            GROUP BY year
+            ORDER BY year
+        """, params + [start_year, end_year])
+        return [(row["year"], row["events"], row["total"]) for row in rows]
+
+    def phase_counts(self, industries, prefixes=()):
+        deals, params = self._tech_deals(industries, prefixes)
+        rows = self._query(f"""
+            SELECT phase, COUNT(*) AS events
+            FROM {deals}
+            WHERE phase IS NOT NULL
+            GROUP BY phase
+            ORDER BY events DESC
+        """, params)
+        return [(row["phase"], row["events"]) for row in rows]
+
+    def top_funded(self, industries, prefixes=(), limit=10):
+        deals, params = self._tech_deals(industries, prefixes)
+        rows = self._query(f"""
+            SELECT company, ROUND(SUM(amount) * {AMOUNT_SCALE}, 2) AS total
+            FROM {deals}
+            WHERE amount IS NOT NULL
+            GROUP BY company
+            ORDER BY total DESC
+            LIMIT ?
+        """, params + [limit])
+        return [(row["company"], row["total"]) for row in rows]
+
+    def location_counts(self, industries, prefixes=()):
+        where, params = self._industry_filter(industries, prefixes)
+        # Startups are located in their canton and, when known, their city
+        rows = self._query(f"""
+            SELECT location, COUNT(DISTINCT title) AS startups
+            FROM (
+                SELECT c.Title AS title, c.Canton AS location FROM {COMPANIES} c
+                WHERE c.Canton IS NOT NULL AND {where}
+                UNION ALL
+                SELECT c.Title, c.City FROM {COMPANIES} c
+                WHERE c.Canton IS NOT NULL AND c.City IS NOT NULL AND {where}
+            )
+            GROUP BY location
+            ORDER BY startups DESC
+        """, params + params)
+        return [(row["location"], row["startups"]) for row in rows]
+
+    def investor_deals(self, investor):
+        return [
+            {key: deal[key] for key in ("company", "date", "phase", "amount")}
+            for deal in self.repository.investor_deals(investor)
+        ]
+
+
+def get_backend(name=None, graph=None):
+    """
+    Backend selected by name or the QUERY_BACKEND environment variable
+
+    Args:
+        name: "sparql", "sql" or "auto" (SQL if startups_clean.db exists)
+        graph: Already loaded graph for the SPARQL backend
+    """
+    name = (name or os.getenv("QUERY_BACKEND", "auto")).lower()
+    if name == "auto":
+        name = "sql" if StartupRepository().available() else "sparql"
+    if name == "sql":
+        return SqlBackend()
+    if name == "sparql":
+        return SparqlBackend(graph=graph)
+    raise ValueError(f"Unknown query backend: {name}")
@@ -0,0 +1,59 @@
+"""
+Thread-safe token bucket rate limiting.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` acquisitions per `per` seconds
+
+    Args:
+        rate: Number of acquisitions allowed per period
+        per: Period length in seconds
+        burst: Bucket size, i.e. how many acquisitions may happen back to back
+    """
+
+    def __init__(self, rate, per=1.0, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = per / rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) / self.interval
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) * self.interval
+            time.sleep(delay)
+            waited += delay
+
+
+class KeyedRateLimiter:
+    """One RateLimiter per key (e.g. per host), created on first use"""
+
+    def __init__(self, rate, per=1.0, burst=1):
+        self._args = (rate, per, burst)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = RateLimiter(*self._args)
+        return limiter.acquire()
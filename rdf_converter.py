@@ -1,8 +1,12 @@
 import pandas as pd
 from rdflib import Graph, Namespace, Literal, BNode, RDF, XSD
+import os
 import re
 from datetime import datetime
 
+from data_lake import read_table
+from investors import canonical_name, investor_key, investor_names, split_investors
+
 def clean_text(text):
     if pd.isna(text):
         return None
@@ -26,98 +30,119 @@ def convert_date(date_str):
     except (ValueError, TypeError):
         return None
 
-# Create a new RDF graph
-graph = Graph()
-
 # Define namespaces
 EX = Namespace("http://example.org/ontology#")
 RES = Namespace("http://example.org/resource/")
 
-# Bind namespaces to prefixes for prettier output
-graph.bind("ex", EX)
-graph.bind("res", RES)
+COMPANY_COLUMNS = ['Title', 'Code', 'Year', 'Highlights', 'Industry', 'Canton', 'City']
+DEAL_COLUMNS = ['Id', 'Company', 'Phase', 'Type', 'Amount', 'Amount confidential',
+                'Valuation', 'Date of the funding round', 'Investors']
+
+def deal_node(row):
+    # Deals with an Id get a stable URI so incremental updates (cdc.py) can find them
+    deal_id = clean_text(row.get('Id'))
+    if deal_id:
+        return RES[f"deal-{uri_safe(deal_id)}"]
+    return BNode()
+
+def investor_node(key):
+    # One node per investor key, whatever spelling a deal uses
+    return RES[f"investor-{uri_safe(key)}"]
+
+def company_triples(row):
+    """
+    Triples for one companies row, as (own, shared)
 
-# Load CSV files
-print("Loading CSV files...")
-companies_df = pd.read_csv('companies.csv')
-deals_df = pd.read_csv('deals.csv')
-print(f"Loaded {len(companies_df)} companies and {len(deals_df)} deals from CSV files")
+    own triples have the startup as subject; shared ones describe industry
+    and location nodes that other startups point to as well.
+    """
+    own, shared = [], []
 
-# Process company information
-print("Processing company information...")
-for index, row in companies_df.iterrows():
     # Get the company name (required)
     startup_name = clean_text(row['Title'])
     if not startup_name:
-        continue
+        return own, shared
     
     # Create company URI and add basic information
     startup_uri = RES[uri_safe(startup_name)]
-    graph.add((startup_uri, RDF.type, EX.Startup))
-    graph.add((startup_uri, EX.name, Literal(startup_name)))
+    own.append((startup_uri, RDF.type, EX.Startup))
+    own.append((startup_uri, EX.name, Literal(startup_name)))
+    
+    # Add Swiss company UID (optional), used to link SOGC registry records
+    if not pd.isna(row['Code']):
+        own.append((startup_uri, EX.uid, Literal(clean_text(row['Code']))))
     
     # Add founding date (optional)
     if not pd.isna(row['Year']):
         try:
             year = int(row['Year'])
-            graph.add((startup_uri, EX.foun_date, Literal(year, datatype=XSD.integer)))
+            own.append((startup_uri, EX.foun_date, Literal(year, datatype=XSD.integer)))
         except ValueError:
             pass
     
     # Add highlights (optional)
     if not pd.isna(row['Highlights']):
         highlights = clean_text(row['Highlights'])
-        graph.add((startup_uri, EX.highlights, Literal(highlights)))
+        own.append((startup_uri, EX.highlights, Literal(highlights)))
     
     # Add industry (optional)
     if not pd.isna(row['Industry']):
         industry = clean_text(row['Industry'])
         industry_uri = RES[f"industry-{uri_safe(industry)}"]
-        graph.add((industry_uri, RDF.type, EX.Industry))
-        graph.add((industry_uri, EX.name, Literal(industry)))
-        graph.add((startup_uri, EX.hasIndustry, industry_uri))
+        shared.append((industry_uri, RDF.type, EX.Industry))
+        shared.append((industry_uri, EX.name, Literal(industry)))
+        own.append((startup_uri, EX.hasIndustry, industry_uri))
     
     # Add location hierarchy (optional)
     if not pd.isna(row['Canton']):
         canton = clean_text(row['Canton'])
         canton_uri = RES[f"canton-{uri_safe(canton)}"]
-        graph.add((canton_uri, RDF.type, EX.Canton))
-        graph.add((canton_uri, EX.name, Literal(canton)))
-        graph.add((startup_uri, EX.hasLocation, canton_uri))
+        shared.append((canton_uri, RDF.type, EX.Canton))
+        shared.append((canton_uri, EX.name, Literal(canton)))
+        own.append((startup_uri, EX.hasLocation, canton_uri))
         
         # Add city if available (optional)
         if not pd.isna(row['City']):
             city = clean_text(row['City'])
             city_uri = RES[f"city-{uri_safe(city)}"]
-            graph.add((city_uri, RDF.type, EX.City))
-            graph.add((city_uri, EX.name, Literal(city)))
-            graph.add((city_uri, EX.partOf, canton_uri))
-            graph.add((startup_uri, EX.hasLocation, city_uri))
-
-# Process funding rounds
-print("Processing funding rounds...")
-for index, row in deals_df.iterrows():
+            shared.append((city_uri, RDF.type, EX.City))
+            shared.append((city_uri, EX.name, Literal(city)))
+            shared.append((city_uri, EX.partOf, canton_uri))
+            own.append((startup_uri, EX.hasLocation, city_uri))
+
+    return own, shared
+
+def deal_triples(row, verbose=False, investor_names=None):
+    """
+    Triples for one deals row, as (own, shared)
+
+    own triples describe the funding event and link it to its startup and
+    investors; shared ones describe the investor nodes, named after
+    investor_names ({key: name}, see investors.py) when given.
+    """
+    own, shared = [], []
+
     # Get the company name (required to link the deal)
     startup_name = clean_text(row['Company'])
     if not startup_name:
-        continue
+        return own, shared
         
     startup_uri = RES[uri_safe(startup_name)]
     
     # Create a new funding round
-    funding_round = BNode()
-    graph.add((funding_round, RDF.type, EX.FundingEvent))
-    graph.add((startup_uri, EX.hasFunding, funding_round))
+    funding_round = deal_node(row)
+    own.append((funding_round, RDF.type, EX.FundingEvent))
+    own.append((startup_uri, EX.hasFunding, funding_round))
     
     # Add funding phase (optional)
     if not pd.isna(row['Phase']):
         phase = clean_text(row['Phase'])
-        graph.add((funding_round, EX.phase, Literal(phase)))
+        own.append((funding_round, EX.phase, Literal(phase)))
     
     # Add funding type (optional)
     if not pd.isna(row['Type']):
         funding_type = clean_text(row['Type'])
-        graph.add((funding_round, EX.type, Literal(funding_type)))
+        own.append((funding_round, EX.type, Literal(funding_type)))
     
     # Add funding amount (optional)
     if not pd.isna(row['Amount']):
@@ -133,8 +158,9 @@ for index, row in deals_df.iterrows():
                     amount = float(amount_str)
                     # Convert to actual amount (assuming input is in millions)
                     amount = amount * 1000000
-                    graph.add((funding_round, EX.amount, Literal(amount, datatype=XSD.decimal)))
-                    print(f"Converted amount for {startup_name}: {amount:,.2f} CHF")
+                    own.append((funding_round, EX.amount, Literal(amount, datatype=XSD.decimal)))
+                    if verbose:
+                        print(f"Converted amount for {startup_name}: {amount:,.2f} CHF")
         except (ValueError, TypeError) as e:
             print(f"Warning: Could not convert amount for {startup_name}: {e}")
     
@@ -142,7 +168,7 @@ for index, row in deals_df.iterrows():
     if not pd.isna(row['Valuation']):
         try:
             valuation = float(str(row['Valuation']).replace(',', ''))
-            graph.add((funding_round, EX.valuation, Literal(valuation, datatype=XSD.decimal)))
+            own.append((funding_round, EX.valuation, Literal(valuation, datatype=XSD.decimal)))
         except ValueError:
             pass
     
@@ -150,17 +176,56 @@ for index, row in deals_df.iterrows():
     if not pd.isna(row['Date of the funding round']):
         funding_date = convert_date(row['Date of the funding round'])
         if funding_date:
-            graph.add((funding_round, EX.round_date, Literal(funding_date, datatype=XSD.date)))
+            own.append((funding_round, EX.round_date, Literal(funding_date, datatype=XSD.date)))
     
-    # Add investor information (optional)
-    if not pd.isna(row['Investors']) and row['Investors'] != 'n.a.':
-        investor_name = clean_text(row['Investors'])
-        investor_uri = RES[f"investor-{uri_safe(investor_name)}"]
-        graph.add((investor_uri, RDF.type, EX.Investor))
-        graph.add((investor_uri, EX.name, Literal(investor_name)))
-        graph.add((funding_round, EX.investor, investor_uri))
-
-# Save the graph
-print("Saving RDF graph...")
-graph.serialize('startups_graph.ttl', format='turtle')
-print(f"RDF conversion complete! Total triples: {len(graph)}") 
\ No newline at end of file
+    # Add investors (optional); a cell may list several of them
+    for name in split_investors(row['Investors']):
+        key = investor_key(name)
+        investor_uri = investor_node(key)
+        display_name = (investor_names or {}).get(key) or canonical_name(name)
+        shared.append((investor_uri, RDF.type, EX.Investor))
+        shared.append((investor_uri, EX.name, Literal(display_name)))
+        own.append((funding_round, EX.investor, investor_uri))
+
+    return own, shared
+
+def build_graph(companies_df, deals_df, verbose=False):
+    """RDF graph of the companies and deals tables"""
+    graph = Graph()
+
+    # Bind namespaces to prefixes for prettier output
+    graph.bind("ex", EX)
+    graph.bind("res", RES)
+
+    # Process company information
+    print("Processing company information...")
+    for index, row in companies_df.iterrows():
+        own, shared = company_triples(row)
+        for triple in own + shared:
+            graph.add(triple)
+
+    # Process funding rounds
+    print("Processing funding rounds...")
+    names = investor_names(deals_df['Investors'])
+    for index, row in deals_df.iterrows():
+        own, shared = deal_triples(row, verbose=verbose, investor_names=names)
+        for triple in own + shared:
+            graph.add(triple)
+
+    return graph
+
+if __name__ == "__main__":
+    # Load the companies and deals (Parquet from data_lake.py, or the CSV files)
+    print("Loading companies and deals...")
+    companies_df = read_table('companies', columns=COMPANY_COLUMNS)
+    deals_df = read_table('deals', columns=DEAL_COLUMNS)
+    print(f"Loaded {len(companies_df)} companies and {len(deals_df)} deals")
+
+    graph = build_graph(companies_df, deals_df, verbose=True)
+
+    # Save the graph; replace the file in one step so running processes
+    # (see graph_store.py) never read a half-written graph
+    print("Saving RDF graph...")
+    graph.serialize('startups_graph.ttl.tmp', format='turtle')
+    os.replace('startups_graph.ttl.tmp', 'startups_graph.ttl')
+    print(f"RDF conversion complete! Total triples: {len(graph)}")
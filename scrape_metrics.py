@@ -0,0 +1,283 @@
+"""
+Timing and outcome telemetry for SOGC lookups.
+
+Scraper steps are wrapped in spans that record their duration and outcome:
+
+    with span("navigate", variant=url) as s:
+        driver.get(url)
+        if not loaded:
+            s.outcome = "miss"
+
+A span ends with outcome "ok" unless the code sets another one or an
+exception escapes it ("error"). Fixed waits go through sleep(seconds, reason)
+so they show up in the report too. Finished spans are appended as JSON lines
+to SCRAPE_METRICS_FILE (default scrape_metrics.jsonl; set it to an empty
+string to disable) and can be exported in Prometheus text format. Once the
+file reaches SCRAPE_METRICS_MAX_BYTES (default 5 MB) it is rotated to
+scrape_metrics.jsonl.1, replacing the previous one, so at most twice that
+is kept on disk; load_spans() reads both.
+
+Usage:
+    python scrape_metrics.py scrape_metrics.jsonl --prometheus scrape.prom
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_PATH = os.getenv("SCRAPE_METRICS_FILE", "scrape_metrics.jsonl")
+MAX_BYTES = int(os.getenv("SCRAPE_METRICS_MAX_BYTES", 5 * 1024**2))
+
+
+class Span:
+    def __init__(self, name, trace=None, parent=None, **attrs):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.attrs = attrs
+        self.outcome = "ok"
+        self.start = time.time()
+        self.duration = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace": self.trace,
+            "parent": self.parent,
+            "outcome": self.outcome,
+            "start": round(self.start, 3),
+            "duration": round(self.duration or 0.0, 4),
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class MetricsRecorder:
+    """Keeps recent spans in memory and appends every span to a rotated JSONL file"""
+
+    def __init__(self, path=METRICS_PATH, keep=10000, max_bytes=MAX_BYTES):
+        self.path = path or None
+        self.max_bytes = max_bytes
+        self.spans = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        current = Span(
+            name,
+            trace=attrs.pop("trace", parent.trace if parent else None),
+            parent=parent.name if parent else None,
+            **attrs,
+        )
+        stack.append(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.outcome = "error"
+            current.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            stack.pop()
+            self.record(current)
+
+    def record(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.spans.append(span.to_dict())
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                    full = f.tell() >= self.max_bytes
+                if full:
+                    os.replace(self.path, self.path + ".1")
+
+    def sleep(self, seconds, reason):
+        """time.sleep that is reported as a "sleep" span"""
+        with self.span("sleep", reason=reason):
+            time.sleep(seconds)
+
+
+recorder = MetricsRecorder()
+span = recorder.span
+sleep = recorder.sleep
+
+
+def load_spans(path):
+    """Spans of path, preceded by those of its rotated file (path.1) if any"""
+    parts = [part for part in (path + ".1", path) if os.path.exists(part)]
+    if not parts:
+        raise FileNotFoundError(f"No metrics file {path}")
+    spans = []
+    for part in parts:
+        with open(part, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return spans
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _group(spans, key):
+    groups = {}
+    for s in spans:
+        groups.setdefault(key(s), []).append(s["duration"])
+    rows = []
+    for group_key, durations in sorted(groups.items(), key=lambda kv: -sum(kv[1])):
+        durations.sort()
+        rows.append(
+            {
+                "key": group_key,
+                "count": len(durations),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "p50": _percentile(durations, 0.5),
+                "p95": _percentile(durations, 0.95),
+                "max": durations[-1],
+            }
+        )
+    return rows
+
+
+def _step_name(s):
+    """Span name, qualified by its target (e.g. "wait:search_results")"""
+    target = s.get("attrs", {}).get("target")
+    return f"{s['name']}:{target}" if target else s["name"]
+
+
+def summarize(spans):
+    """
+    Aggregate spans for the report
+
+    Returns:
+        Dict with "steps" (timing per span name and outcome), "variants"
+        (success rate of each alternative tried for a step) and "sleeps"
+        (time spent in fixed waits per reason)
+    """
+    steps = _group(
+        [s for s in spans if s["name"] != "sleep"], lambda s: (_step_name(s), s["outcome"])
+    )
+    sleeps = _group(
+        [s for s in spans if s["name"] == "sleep"],
+        lambda s: s.get("attrs", {}).get("reason", "unknown"),
+    )
+
+    variants = {}
+    for s in spans:
+        variant = s.get("attrs", {}).get("variant")
+        if variant is None:
+            continue
+        target = s.get("attrs", {}).get("target", "")
+        entry = variants.setdefault(
+            (s["name"], target, variant), {"tried": 0, "succeeded": 0, "seconds": 0.0}
+        )
+        entry["tried"] += 1
+        entry["succeeded"] += s["outcome"] == "ok"
+        entry["seconds"] += s["duration"]
+
+    return {"steps": steps, "variants": variants, "sleeps": sleeps}
+
+
+def format_report(spans):
+    summary = summarize(spans)
+    lines = ["Steps (slowest first)", f"{'step':<30}{'outcome':<12}{'count':>7}{'total s':>10}{'mean s':>9}{'p95 s':>9}"]
+    for row in summary["steps"]:
+        name, outcome = row["key"]
+        lines.append(
+            f"{name:<30}{outcome:<12}{row['count']:>7}{row['total']:>10.1f}"
+            f"{row['mean']:>9.2f}{row['p95']:>9.2f}"
+        )
+
+    lines += ["", "Fallbacks", f"{'step':<22}{'target':<14}{'succeeded':>10}{'seconds':>9}  variant"]
+    for (name, target, variant), entry in sorted(summary["variants"].items()):
+        lines.append(
+            f"{name:<22}{target:<14}{entry['succeeded']:>4}/{entry['tried']:<5}"
+            f"{entry['seconds']:>9.1f}  {variant}"
+        )
+
+    lines += ["", "Fixed sleeps", f"{'reason':<34}{'count':>7}{'total s':>10}"]
+    for row in summary["sleeps"]:
+        lines.append(f"{row['key']:<34}{row['count']:>7}{row['total']:>10.1f}")
+    return "\n".join(lines)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def to_prometheus(spans, prefix="sogc_scrape"):
+    """Prometheus text exposition of span durations per step and outcome"""
+    summary = summarize(spans)
+    lines = [
+        f"# HELP {prefix}_step_seconds Time spent in SOGC scrape steps",
+        f"# TYPE {prefix}_step_seconds summary",
+    ]
+    for row in summary["steps"]:
+        name, outcome = row["key"]
+        labels = f'step="{_label(name)}",outcome="{_label(outcome)}"'
+        lines.append(f'{prefix}_step_seconds{{{labels},quantile="0.5"}} {row["p50"]:.4f}')
+        lines.append(f'{prefix}_step_seconds{{{labels},quantile="0.95"}} {row["p95"]:.4f}')
+        lines.append(f"{prefix}_step_seconds_sum{{{labels}}} {row['total']:.4f}")
+        lines.append(f"{prefix}_step_seconds_count{{{labels}}} {row['count']}")
+
+    lines += [
+        f"# HELP {prefix}_sleep_seconds_total Time spent in fixed sleeps",
+        f"# TYPE {prefix}_sleep_seconds_total counter",
+    ]
+    for row in summary["sleeps"]:
+        lines.append(
+            f'{prefix}_sleep_seconds_total{{reason="{_label(row["key"])}"}} {row["total"]:.4f}'
+        )
+
+    lines += [
+        f"# HELP {prefix}_variant_attempts_total Alternatives tried per step",
+        f"# TYPE {prefix}_variant_attempts_total counter",
+    ]
+    for (name, target, variant), entry in sorted(summary["variants"].items()):
+        labels = f'step="{_label(name)}",target="{_label(target)}",variant="{_label(variant)}"'
+        lines.append(f'{prefix}_variant_attempts_total{{{labels},result="ok"}} {entry["succeeded"]}')
+        lines.append(
+            f'{prefix}_variant_attempts_total{{{labels},result="failed"}} '
+            f'{entry["tried"] - entry["succeeded"]}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize SOGC scrape metrics")
+    parser.add_argument("metrics", nargs="?", default=METRICS_PATH or "scrape_metrics.jsonl")
+    parser.add_argument("--prometheus", help="Also write Prometheus text to this file")
+    args = parser.parse_args()
+
+    spans = load_spans(args.metrics)
+    print(f"{len(spans)} spans from {args.metrics}\n")
+    print(format_report(spans))
+
+    if args.prometheus:
+        with open(args.prometheus, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(spans))
+        print(f"\nWrote Prometheus metrics to {args.prometheus}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Single-flight execution: concurrent calls with the same key share one result.
+
+The first caller for a key (the leader) runs the function; callers arriving
+while it is still running wait for it and receive the same result or
+exception. Nothing is cached once the call finishes, so later calls run again.
+"""
+
+import re
+import threading
+
+# Parts of a SPARQL query kept verbatim (string literals, comments, IRIs)
+# or collapsed (whitespace), in the order they are tried at each position
+SPARQL_TOKEN = re.compile(
+    r'"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r"|#[^\n]*\n?"
+    r"|<[^<>\"'{}|^`\\\s]*>"
+    r"|(\s+)",
+    re.DOTALL,
+)
+
+
+def normalize_question(question):
+    """Case- and whitespace-insensitive form of a natural language question"""
+    return " ".join(question.casefold().split())
+
+
+def normalize_sparql(query):
+    """
+    Whitespace-insensitive form of a SPARQL query
+
+    Only whitespace between tokens is collapsed: string literals and comments
+    are kept as written, so queries differing inside a literal stay distinct.
+    """
+    return SPARQL_TOKEN.sub(lambda m: " " if m.group(1) else m.group(0), query).strip()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe request coalescing keyed by any hashable value"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"executed": 0, "shared": 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) unless a call with the same key is in flight
+
+        Returns:
+            The function's result; followers get the leader's result object.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executed"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Number of distinct keys currently executing"""
+        with self._lock:
+            return len(self._calls)
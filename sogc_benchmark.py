@@ -0,0 +1,163 @@
+"""
+Benchmark SOGC lookups against the offline replay server.
+
+Runs N lookups through web_scrapper.download_sogc_data for every
+combination of the warm driver pool and the HTTP fast path, with a
+ReplayServer standing in for shab.ch, and reports throughput and latency
+percentiles per combination. Without --fixtures, blank documents with
+typical latencies are synthesized so the benchmark needs no network.
+
+Usage:
+    python sogc_benchmark.py -n 20 --workers 2
+    python sogc_benchmark.py --fixtures sogc_fixtures --pool off --json bench.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scrape_metrics
+import wait_policy
+from sogc_replay import Fixtures, ReplayServer, synthesize
+from web_scrapper import download_sogc_data
+
+SYNTHETIC_UIDS = [f"CHE-{n:03d}.{n:03d}.{n:03d}" for n in range(101, 106)]
+
+
+def fixture_uids(fixture_dir):
+    """UIDs that have a recorded search response"""
+    uids = []
+    for entry in Fixtures(fixture_dir).entries:
+        uid = entry.get("query", {}).get("keyword")
+        if uid and uid not in uids:
+            uids.append(uid)
+    return uids
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def run_mode(server, uids, lookups, workers, use_pool, fast_path):
+    """Run lookups for one pool/fast path combination and return its stats"""
+    download_root = tempfile.mkdtemp(prefix="sogc_bench_")
+    pool = None
+    try:
+        setup_started = time.perf_counter()
+        if use_pool:
+            from driver_pool import DriverPool
+
+            pool = DriverPool(size=workers, warm_url=server.search_url)
+        setup = time.perf_counter() - setup_started
+
+        def lookup(index):
+            uid = uids[index % len(uids)]
+            started = time.perf_counter()
+            path = download_sogc_data(
+                uid=uid,
+                download_dir=os.path.join(download_root, f"lookup_{index:04d}"),
+                pool=pool,
+                search_url=server.search_url,
+                fast_path=fast_path,
+                api_url=server.api_url,
+            )
+            return time.perf_counter() - started, path is not None
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lookup, range(lookups)))
+        wall = time.perf_counter() - started
+    finally:
+        if pool is not None:
+            pool.close()
+        shutil.rmtree(download_root, ignore_errors=True)
+
+    latencies = sorted(seconds for seconds, _ in results)
+    return {
+        "pool": use_pool,
+        "fast_path": fast_path,
+        "lookups": lookups,
+        "succeeded": sum(ok for _, ok in results),
+        "setup_s": round(setup, 3),
+        "wall_s": round(wall, 3),
+        "per_minute": round(60 * lookups / wall, 1) if wall else 0.0,
+        "p50_s": round(_percentile(latencies, 0.5), 3),
+        "p95_s": round(_percentile(latencies, 0.95), 3),
+    }
+
+
+def format_results(results):
+    lines = [
+        f"{'pool':<6}{'fast':<6}{'ok':>8}{'setup s':>9}{'wall s':>9}"
+        f"{'/min':>8}{'p50 s':>8}{'p95 s':>8}"
+    ]
+    for r in results:
+        mode = f"{'on' if r['pool'] else 'off':<6}{'on' if r['fast_path'] else 'off':<6}"
+        if "error" in r:
+            lines.append(f"{mode}error: {r['error']}")
+            continue
+        lines.append(
+            f"{mode}{r['succeeded']:>4}/{r['lookups']:<3}{r['setup_s']:>9.2f}"
+            f"{r['wall_s']:>9.2f}{r['per_minute']:>8.1f}{r['p50_s']:>8.2f}{r['p95_s']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SOGC lookups offline")
+    parser.add_argument("--fixtures", help="Fixture directory (synthesized if omitted)")
+    parser.add_argument("-n", "--lookups", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--pool", choices=["on", "off", "both"], default="both")
+    parser.add_argument("--fast-path", choices=["on", "off", "both"], default="both")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Multiplier for recorded latencies"
+    )
+    parser.add_argument("--metrics", help="Write scrape spans to this JSONL file")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    # Keep replayed timings out of the live metrics and learned wait budgets
+    scrape_metrics.recorder.path = args.metrics
+    wait_policy.policy.metrics_path = args.metrics
+
+    fixture_dir = args.fixtures
+    if fixture_dir is None:
+        fixture_dir = tempfile.mkdtemp(prefix="sogc_fixtures_")
+        synthesize(SYNTHETIC_UIDS, fixture_dir)
+    uids = fixture_uids(fixture_dir)
+    if not uids:
+        parser.error(f"No recorded searches in {fixture_dir}")
+
+    choices = {"on": [True], "off": [False], "both": [True, False]}
+    results = []
+    with ReplayServer(fixture_dir, speed=args.speed) as server:
+        for use_pool in choices[args.pool]:
+            for fast_path in choices[args.fast_path]:
+                print(f"Running {args.lookups} lookups (pool={use_pool}, fast_path={fast_path})...")
+                try:
+                    results.append(
+                        run_mode(server, uids, args.lookups, args.workers, use_pool, fast_path)
+                    )
+                except Exception as e:
+                    # Browser modes need Chrome; report and keep benchmarking the rest
+                    results.append({"pool": use_pool, "fast_path": fast_path, "error": str(e)})
+        if server.misses:
+            print(f"{len(server.misses)} requests had no fixture, e.g. {server.misses[0]}")
+
+    print()
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Bulk SOGC downloads for many UIDs.
+
+Downloads are spread over a bounded set of workers, rate limited per host
+and retried with backoff. Progress is recorded in a JSON manifest after every
+attempt, so an interrupted run picks up where it stopped when restarted with
+the same manifest.
+
+Usage:
+    python sogc_bulk.py --csv companies.csv --column Code --workers 4
+    python sogc_bulk.py --uids uids.txt --out sogc_bulk --rpm 20
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlparse
+
+from rate_limit import KeyedRateLimiter
+from sogc_http import fetch_sogc_document
+from web_scrapper import SOGC_SEARCH_URL, download_sogc_data
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_PENDING = "pending"
+
+
+class Manifest:
+    """Per-UID download status persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, uid):
+        with self._lock:
+            return dict(self.entries.get(uid, {}))
+
+    def update(self, uid, **fields):
+        with self._lock:
+            entry = self.entries.setdefault(uid, {"status": STATUS_PENDING})
+            entry.update(fields, updated_at=datetime.now().isoformat(timespec="seconds"))
+            self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def read_uids(path=None, csv_path=None, column="Code"):
+    """Read UIDs from a text file (one per line) or a CSV column, deduplicated"""
+    if csv_path:
+        import pandas as pd
+
+        values = pd.read_csv(csv_path, usecols=[column])[column].dropna()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            values = [line.strip() for line in f]
+    uids = []
+    seen = set()
+    for uid in values:
+        uid = str(uid).strip()
+        if uid.startswith("CHE-") and uid not in seen:
+            seen.add(uid)
+            uids.append(uid)
+    return uids
+
+
+def uid_download_dir(root, uid):
+    return os.path.join(root, uid)
+
+
+def make_browser_fetcher(pool, search_url=SOGC_SEARCH_URL):
+    """Fetcher that tries the HTTP API, then a browser borrowed from pool"""
+
+    def fetch(uid, download_dir):
+        return (
+            download_sogc_data(
+                uid=uid, download_dir=download_dir, pool=pool, search_url=search_url
+            )
+            is not None
+        )
+
+    return fetch
+
+
+def http_fetch(uid, download_dir):
+    """Fetcher that only uses the SOGC HTTP API, no browser needed"""
+    return fetch_sogc_document(uid, download_dir) is not None
+
+
+def bulk_download(
+    uids,
+    fetch,
+    download_root="sogc_bulk",
+    manifest_path=None,
+    workers=2,
+    requests_per_minute=30,
+    max_attempts=3,
+    host=urlparse(SOGC_SEARCH_URL).netloc,
+):
+    """
+    Download SOGC documents for many UIDs
+
+    Args:
+        uids: UIDs to fetch
+        fetch: Callable(uid, download_dir) -> bool that downloads one UID
+        download_root: Each UID is saved under download_root/<uid>/<uid>.pdf
+        manifest_path: Progress manifest (default: download_root/manifest.json)
+        workers: Number of concurrent downloads
+        requests_per_minute: Lookups started per minute against host
+        max_attempts: Attempts per UID before it is marked failed
+        host: Rate limiting key for the lookups
+
+    Returns:
+        Dict mapping each UID to its manifest entry
+    """
+    os.makedirs(download_root, exist_ok=True)
+    manifest = Manifest(manifest_path or os.path.join(download_root, "manifest.json"))
+    limiter = KeyedRateLimiter(requests_per_minute, per=60.0)
+
+    def already_done(uid):
+        entry = manifest.get(uid)
+        return entry.get("status") == STATUS_DONE and os.path.exists(
+            entry.get("file", "")
+        )
+
+    pending = [uid for uid in uids if not already_done(uid)]
+    if len(pending) < len(uids):
+        print(f"Skipping {len(uids) - len(pending)} UIDs already downloaded")
+
+    def run(uid):
+        download_dir = uid_download_dir(download_root, uid)
+        target = os.path.join(download_dir, f"{uid}.pdf")
+        error = None
+        for attempt in range(1, max_attempts + 1):
+            limiter.acquire(host)
+            start = time.time()
+            try:
+                ok = fetch(uid, download_dir)
+                error = None if ok else "No document downloaded"
+            except Exception as e:
+                ok = False
+                error = str(e)
+
+            manifest.update(
+                uid,
+                status=STATUS_DONE if ok else STATUS_PENDING,
+                attempts=manifest.get(uid).get("attempts", 0) + 1,
+                seconds=round(time.time() - start, 1),
+                file=target if ok else None,
+                error=error,
+            )
+            if ok:
+                return uid, STATUS_DONE
+            if attempt < max_attempts:
+                time.sleep(2**attempt)
+
+        manifest.update(uid, status=STATUS_FAILED)
+        return uid, STATUS_FAILED
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, uid) for uid in pending]
+        for i, future in enumerate(as_completed(futures), 1):
+            uid, status = future.result()
+            print(f"[{i}/{len(pending)}] {uid}: {status}")
+
+    return {uid: manifest.get(uid) for uid in uids}
+
+
+def print_report(report):
+    counts = {}
+    for uid, entry in report.items():
+        status = entry.get("status", STATUS_PENDING)
+        counts[status] = counts.get(status, 0) + 1
+        print(f"{uid}\t{status}\t{entry.get('error') or entry.get('file') or ''}")
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download SOGC data for many UIDs")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--uids", help="Text file with one UID per line")
+    source.add_argument("--csv", help="CSV file containing a UID column")
+    parser.add_argument("--column", default="Code", help="UID column in --csv")
+    parser.add_argument("--out", default="sogc_bulk", help="Download directory")
+    parser.add_argument("--manifest", help="Progress manifest path")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rpm", type=float, default=30, help="Lookups per minute")
+    parser.add_argument("--attempts", type=int, default=3)
+    parser.add_argument(
+        "--http-only",
+        action="store_true",
+        help="Only use the SOGC HTTP API, without a browser fallback",
+    )
+    args = parser.parse_args()
+
+    uids = read_uids(args.uids, args.csv, args.column)
+    print(f"Loaded {len(uids)} UIDs")
+
+    options = dict(
+        download_root=args.out,
+        manifest_path=args.manifest,
+        workers=args.workers,
+        requests_per_minute=args.rpm,
+        max_attempts=args.attempts,
+    )
+    if args.http_only:
+        report = bulk_download(uids, http_fetch, **options)
+    else:
+        from driver_pool import DriverPool
+
+        with DriverPool(size=args.workers) as pool:
+            report = bulk_download(uids, make_browser_fetcher(pool), **options)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Persistent cache of SOGC documents and their extracted text.
+
+Documents are keyed by UID and publication date. File contents are stored
+once under their SHA-256 (so re-downloading an unchanged PDF costs no extra
+space) and a small SQLite index maps keys to blobs, parsed fields and
+timestamps.
+
+Entries younger than the TTL are served straight from disk. Older entries
+are revalidated by asking for the UID's latest publication date; if nothing
+newer was published the entry is kept, otherwise the document is fetched
+again. When the blobs exceed max_bytes the least recently used entries are
+evicted.
+
+    cache = SOGCCache("sogc_cache")
+    doc = cache.fetch(uid, download, extract_text, latest_date=latest_publication_date)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    uid TEXT NOT NULL,
+    publication_date TEXT NOT NULL,
+    pdf_sha TEXT NOT NULL,
+    text_sha TEXT,
+    fields TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (uid, publication_date)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class CachedDocument:
+    uid: str
+    publication_date: str
+    pdf_path: str
+    text: str
+    fields: dict = field(default_factory=dict)
+    fetched_at: float = 0.0
+    stale: bool = False
+
+
+class SOGCCache:
+    """
+    Content-addressed on-disk cache of SOGC documents
+
+    Args:
+        root: Cache directory
+        ttl: Seconds before an entry is revalidated
+        max_bytes: Total blob size kept before LRU eviction
+    """
+
+    def __init__(self, root="sogc_cache", ttl=7 * 24 * 3600, max_bytes=500 * 1024**2):
+        self.root = os.path.abspath(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.blob_dir = os.path.join(self.root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.db_path = os.path.join(self.root, "index.sqlite")
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def _blob_path(self, sha):
+        return os.path.join(self.blob_dir, sha[:2], sha)
+
+    def _store_blob(self, conn, data):
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        conn.execute(
+            "INSERT OR IGNORE INTO blobs (sha, size) VALUES (?, ?)", (sha, len(data))
+        )
+        return sha
+
+    def _document(self, row, now):
+        uid, publication_date, pdf_sha, text_sha, fields, fetched_at = row
+        text = ""
+        if text_sha:
+            with open(self._blob_path(text_sha), "r", encoding="utf-8") as f:
+                text = f.read()
+        return CachedDocument(
+            uid=uid,
+            publication_date=publication_date,
+            pdf_path=self._blob_path(pdf_sha),
+            text=text,
+            fields=json.loads(fields) if fields else {},
+            fetched_at=fetched_at,
+            stale=now - fetched_at > self.ttl,
+        )
+
+    def get(self, uid, publication_date=None):
+        """Return the cached document (latest publication if no date), or None"""
+        query = (
+            "SELECT uid, publication_date, pdf_sha, text_sha, fields, fetched_at "
+            "FROM entries WHERE uid = ?"
+        )
+        params = [uid]
+        if publication_date is not None:
+            query += " AND publication_date = ?"
+            params.append(publication_date)
+        query += " ORDER BY publication_date DESC, fetched_at DESC LIMIT 1"
+
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(self._blob_path(row[2])):
+                # Blob removed behind our back; treat as a miss
+                conn.execute(
+                    "DELETE FROM entries WHERE uid = ? AND publication_date = ?",
+                    row[:2],
+                )
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE uid = ? AND publication_date = ?",
+                (now, row[0], row[1]),
+            )
+        return self._document(row, now)
+
+    def put(self, uid, pdf_path, publication_date=None, text=None, fields=None):
+        """Store a downloaded document and return it as a CachedDocument"""
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        publication_date = publication_date or ""
+        now = time.time()
+        with self._connect() as conn:
+            pdf_sha = self._store_blob(conn, pdf_bytes)
+            text_sha = self._store_blob(conn, text.encode("utf-8")) if text else None
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    uid,
+                    publication_date,
+                    pdf_sha,
+                    text_sha,
+                    json.dumps(fields) if fields else None,
+                    now,
+                    now,
+                ),
+            )
+        # The document just stored is returned even if it alone exceeds max_bytes
+        self.evict(keep=(uid, publication_date))
+        return CachedDocument(
+            uid=uid,
+            publication_date=publication_date,
+            pdf_path=self._blob_path(pdf_sha),
+            text=text or "",
+            fields=fields or {},
+            fetched_at=now,
+        )
+
+    def touch(self, uid, publication_date):
+        """Mark an entry as revalidated now"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE entries SET fetched_at = ? WHERE uid = ? AND publication_date = ?",
+                (time.time(), uid, publication_date),
+            )
+
+    def size(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self, keep=None):
+        """
+        Drop least recently used entries until the blobs fit in max_bytes
+
+        keep is a (uid, publication_date) entry that is never dropped.
+        """
+        keep_uid, keep_date = keep or (None, None)
+        with self._connect() as conn:
+            while True:
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM blobs"
+                ).fetchone()[0]
+                if total <= self.max_bytes:
+                    break
+                oldest = conn.execute(
+                    "SELECT uid, publication_date FROM entries "
+                    "WHERE NOT (uid IS ? AND publication_date IS ?) "
+                    "ORDER BY accessed_at LIMIT 1",
+                    (keep_uid, keep_date),
+                ).fetchone()
+                if oldest is None:
+                    break
+                conn.execute(
+                    "DELETE FROM entries WHERE uid = ? AND publication_date = ?", oldest
+                )
+                self._collect_garbage(conn)
+
+    def _collect_garbage(self, conn):
+        unused = conn.execute(
+            "SELECT sha FROM blobs WHERE sha NOT IN "
+            "(SELECT pdf_sha FROM entries UNION "
+            "SELECT text_sha FROM entries WHERE text_sha IS NOT NULL)"
+        ).fetchall()
+        for (sha,) in unused:
+            try:
+                os.remove(self._blob_path(sha))
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+
+    def fetch(self, uid, download, extract_text=None, parse=None, latest_date=None):
+        """
+        Return the document for uid, downloading it only when needed
+
+        Args:
+            uid: Company UID
+            download: Callable(uid, download_dir) -> path of the PDF or None
+            extract_text: Callable(pdf_path) -> text, stored with the PDF
+            parse: Callable(text) -> dict of fields, stored with the PDF
+            latest_date: Callable(uid) -> latest publication date or None,
+                used to revalidate stale entries
+
+        Returns:
+            CachedDocument, or None if nothing could be downloaded
+        """
+        cached = self.get(uid)
+        if cached is not None and not cached.stale:
+            return cached
+
+        publication_date = None
+        if latest_date is not None:
+            try:
+                publication_date = latest_date(uid)
+            except Exception as e:
+                print(f"Could not revalidate SOGC cache entry for {uid}: {e}")
+                if cached is not None:
+                    return cached
+
+        # put() stores an unknown date as "", compare the same way
+        publication_date = publication_date or ""
+        if cached is not None and publication_date == cached.publication_date:
+            self.touch(uid, cached.publication_date)
+            cached.stale = False
+            return cached
+
+        with tempfile.TemporaryDirectory() as download_dir:
+            pdf_path = download(uid, download_dir)
+            if not pdf_path or not os.path.exists(pdf_path):
+                # Better an outdated document than none at all
+                return cached
+
+            text = extract_text(pdf_path) if extract_text else None
+            fields = parse(text) if parse and text else None
+            return self.put(uid, pdf_path, publication_date, text, fields)
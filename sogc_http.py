@@ -0,0 +1,158 @@
+"""
+Direct HTTP access to the SOGC publication API.
+
+The SOGC web UI is a single page app backed by a JSON API. Calling that API
+directly finds a company's publications and fetches a document in one or two
+round trips, instead of driving a browser through the search form. All calls
+share one keep-alive requests.Session with automatic retries and
+certificate verification (SOGC_INSECURE_TLS=1 turns it off).
+
+    path = fetch_sogc_document("CHE-236.101.881", "sogc_downloads")
+"""
+
+import os
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SOGC_API_URL = "https://www.shab.ch/api/v1"
+
+# Certificates are verified unless SOGC_INSECURE_TLS=1 (for hosts behind an
+# intercepting proxy or with a broken chain)
+VERIFY_TLS = os.getenv("SOGC_INSECURE_TLS", "") != "1"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Document formats served per publication
+DOCUMENT_FORMATS = ("pdf", "xml")
+
+
+@lru_cache(maxsize=None)
+def get_session(pool_size=10):
+    """Shared keep-alive session that retries transient failures"""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    session.verify = VERIFY_TLS
+    return session
+
+
+def _localized(value):
+    """Pick a readable string from a {"de": ..., "fr": ...} field"""
+    if isinstance(value, dict):
+        for lang in ("de", "fr", "it", "en"):
+            if value.get(lang):
+                return value[lang]
+        return next((v for v in value.values() if v), None)
+    return value
+
+
+def search_publications(uid, api_url=SOGC_API_URL, page_size=100, timeout=30):
+    """
+    Search the SOGC for publications mentioning a UID
+
+    Returns:
+        List of dicts with id, number, date, rubric and title, newest first
+    """
+    params = {
+        "keyword": uid,
+        "publicationStates": "PUBLISHED",
+        "pageRequest.page": 0,
+        "pageRequest.size": page_size,
+        "pageRequest.sortOrders": "publicationDate,desc",
+    }
+    response = get_session().get(
+        f"{api_url}/publications",
+        params=params,
+        headers={"Accept": "application/json"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+
+    publications = []
+    for item in response.json().get("content", []):
+        meta = item.get("meta", item)
+        if not meta.get("id"):
+            continue
+        publications.append(
+            {
+                "id": meta["id"],
+                "number": meta.get("publicationNumber"),
+                "date": (meta.get("publicationDate") or "")[:10],
+                "rubric": meta.get("subRubric") or meta.get("rubric"),
+                "title": _localized(meta.get("title")),
+            }
+        )
+    publications.sort(key=lambda p: p["date"], reverse=True)
+    return publications
+
+
+def latest_publication_date(uid, api_url=SOGC_API_URL):
+    """Date (YYYY-MM-DD) of the newest publication for a UID, or None"""
+    publications = search_publications(uid, api_url=api_url, page_size=1)
+    return publications[0]["date"] if publications else None
+
+
+def download_publication(
+    publication_id, save_path, output_format="pdf", api_url=SOGC_API_URL, timeout=60
+):
+    """Stream one publication document to save_path; returns save_path"""
+    if output_format not in DOCUMENT_FORMATS:
+        raise ValueError(f"Unsupported format for direct download: {output_format}")
+
+    response = get_session().get(
+        f"{api_url}/publications/{publication_id}/{output_format}",
+        stream=True,
+        timeout=timeout,
+    )
+    response.raise_for_status()
+
+    # Write next to the target and rename so readers never see a partial file
+    tmp_path = f"{save_path}.part"
+    with open(tmp_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=65536):
+            f.write(chunk)
+    os.replace(tmp_path, save_path)
+    return save_path
+
+
+def fetch_sogc_document(uid, download_dir, output_format="pdf", api_url=SOGC_API_URL):
+    """
+    Download the latest SOGC publication for a UID without a browser
+
+    Saves it as <download_dir>/<uid>.<format>, like the Selenium path.
+
+    Returns:
+        The saved file path, or None if the direct path failed
+    """
+    try:
+        publications = search_publications(uid, api_url=api_url)
+        if not publications:
+            print(f"No SOGC publications found for {uid} via the API")
+            return None
+
+        latest = publications[0]
+        os.makedirs(download_dir, exist_ok=True)
+        save_path = os.path.join(download_dir, f"{uid}.{output_format}")
+        download_publication(latest["id"], save_path, output_format, api_url=api_url)
+        print(f"Downloaded SOGC publication {latest['number'] or latest['id']} to {save_path}")
+        return save_path
+    except (requests.RequestException, ValueError) as e:
+        print(f"Direct SOGC download failed for {uid}: {e}")
+        return None
@@ -0,0 +1,476 @@
+"""
+Structured records from SOGC commercial register publications.
+
+Publications (XML or CSV exports, or the text of a downloaded PDF) are
+parsed into typed records -- registry events, capital changes, board
+members and liquidations -- which are then linked into the RDF graph on the
+startup's URI:
+
+    startup ex:uid "CHE-..." ;
+            ex:hasRegistryEvent event .
+    event a ex:RegistryEvent, ex:CapitalChange ;
+          ex:event_date "2021-01-05"^^xsd:date ;
+          ex:capital 150000.0 ; ex:previous_capital 100000.0 .
+
+Linked records are kept in sogc_graph.ttl, which llm.py loads next to the
+main graph, so "what happened to UID x between two dates" is a SPARQL
+query over ex:hasRegistryEvent / ex:event_date instead of a new scrape.
+
+Usage:
+    python sogc_records.py sogc_bulk/ --save
+"""
+
+import argparse
+import csv
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from functools import lru_cache
+from typing import ClassVar, Optional
+
+from rdflib import RDF, XSD, Graph, Literal, Namespace
+
+EX = Namespace("http://example.org/ontology#")
+RES = Namespace("http://example.org/resource/")
+
+SOGC_GRAPH_PATH = "sogc_graph.ttl"
+
+# Commercial register sub-rubrics
+RUBRIC_KINDS = {"HR01": "registration", "HR02": "change", "HR03": "deletion"}
+
+
+@dataclass
+class SOGCRecord:
+    uid: str
+    date: str  # YYYY-MM-DD, "" if unknown
+    publication_number: str
+
+    kind: ClassVar[str] = "record"
+    rdf_class: ClassVar[str] = "RegistryEvent"
+
+
+@dataclass
+class RegistryEvent(SOGCRecord):
+    event: str = "change"  # registration, change or deletion
+    text: str = ""
+
+    kind: ClassVar[str] = "registry_event"
+    rdf_class: ClassVar[str] = "RegistryPublication"
+
+
+@dataclass
+class CapitalChange(SOGCRecord):
+    amount: float = 0.0
+    currency: str = "CHF"
+    previous_amount: Optional[float] = None
+
+    kind: ClassVar[str] = "capital_change"
+    rdf_class: ClassVar[str] = "CapitalChange"
+
+
+@dataclass
+class BoardMember(SOGCRecord):
+    name: str = ""
+    role: str = ""
+    signature: str = ""
+    change: str = "joined"  # joined or left
+
+    kind: ClassVar[str] = "board_member"
+    rdf_class: ClassVar[str] = "BoardMember"
+
+
+@dataclass
+class Liquidation(SOGCRecord):
+    status: str = "in_liquidation"  # in_liquidation or deleted
+
+    kind: ClassVar[str] = "liquidation"
+    rdf_class: ClassVar[str] = "Liquidation"
+
+
+RECORD_TYPES = {
+    cls.kind: cls for cls in (RegistryEvent, CapitalChange, BoardMember, Liquidation)
+}
+
+
+def record_to_dict(record):
+    return {"kind": record.kind, **asdict(record)}
+
+
+def record_from_dict(data):
+    cls = RECORD_TYPES[data["kind"]]
+    return cls(**{f.name: data[f.name] for f in fields(cls) if f.name in data})
+
+
+# --- Text parsing -----------------------------------------------------------
+
+PUBLICATION_NUMBER_RE = re.compile(r"\b(HR0\d)-(\d{6,})\b")
+DATE_RE = re.compile(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b|\b(\d{4})-(\d{2})-(\d{2})\b")
+
+CAPITAL_RE = re.compile(
+    r"(?:Aktienkapital|Stammkapital|Kapital|Capital-actions|Capital social)"
+    r"(?:\s+neu)?\s*:\s*(CHF|EUR|USD)\s*([\d'’ .,]*\d)"
+    r"(?:\s*\[(?:bisher|précédemment|finora)\s*:?\s*(?:CHF|EUR|USD)?\s*([\d'’ .,]*\d)\])?",
+    re.IGNORECASE,
+)
+
+PERSON_HEADINGS = re.compile(
+    r"(?:(?P<joined>Eingetragene Personen neu oder mutierend|Eingetragene Personen"
+    r"|Inscription ou modification de personne\(s\)|Personne\(s\) inscrite\(s\))"
+    r"|(?P<left>Ausgeschiedene Personen und erloschene Unterschriften"
+    r"|Personnes et signatures radiées))"
+    r"\s*:",
+)
+# A person list ends at the first full stop that starts a new sentence
+SECTION_END_RE = re.compile(r"(?<!\bDr)(?<!\bProf)\.(?=\s+[A-ZÄÖÜ]|\s*$)")
+ROLE_RE = re.compile(
+    r"präsident|mitglied|geschäftsführ|gesellschafter|direktor|revisionsstelle|"
+    r"vorsitz|delegiert|liquidator|président|membre|administrat|gérant|directeur|"
+    r"organe de révision|associé",
+    re.IGNORECASE,
+)
+SIGNATURE_RE = re.compile(r"unterschrift|zeichnungsberechtigung|signature", re.IGNORECASE)
+
+LIQUIDATION_RE = re.compile(
+    r"in Liquidation|aufgelöst|en liquidation|dissoute|in liquidazione", re.IGNORECASE
+)
+DELETION_RE = re.compile(r"wird gelöscht|gelöscht|est radiée|radiée", re.IGNORECASE)
+
+
+def parse_date(text):
+    """First date in text as YYYY-MM-DD, or "" """
+    match = DATE_RE.search(text or "")
+    if not match:
+        return ""
+    if match.group(1):
+        day, month, year = match.group(1), match.group(2), match.group(3)
+    else:
+        year, month, day = match.group(4), match.group(5), match.group(6)
+    try:
+        return datetime(int(year), int(month), int(day)).strftime("%Y-%m-%d")
+    except ValueError:
+        return ""
+
+
+def parse_amount(text):
+    text = re.sub(r"[’' ]", "", text)
+    if "," in text and "." not in text:
+        text = text.replace(",", ".")
+    return float(text.replace(",", ""))
+
+
+def _parse_person(entry):
+    parts = [part.strip() for part in entry.split(",") if part.strip()]
+    if len(parts) < 2:
+        return None
+    if "(CHE-" in parts[0]:
+        # Legal entities such as auditors: "KPMG AG (CHE-...), in Zürich, ..."
+        name, details = parts[0], parts[1:]
+    else:
+        name, details = f"{parts[1]} {parts[0]}", parts[2:]
+    role = next((part for part in details if ROLE_RE.search(part)), "")
+    signature = next((part for part in details if SIGNATURE_RE.search(part)), "")
+    return name, role, signature
+
+
+def _board_members(text, uid, date, number):
+    headings = list(PERSON_HEADINGS.finditer(text))
+    members = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        section = text[heading.end() : end]
+        stop = SECTION_END_RE.search(section)
+        if stop:
+            section = section[: stop.start()]
+        change = "joined" if heading.group("joined") else "left"
+        for entry in section.split(";"):
+            person = _parse_person(entry)
+            if person:
+                name, role, signature = person
+                members.append(
+                    BoardMember(uid, date, number, name, role, signature, change)
+                )
+    return members
+
+
+def parse_publication_text(text, uid, date="", rubric="", number=""):
+    """Records contained in the text of a single publication"""
+    date = date or parse_date(text)
+    event = RUBRIC_KINDS.get(rubric, "change")
+    records = [RegistryEvent(uid, date, number, event, " ".join(text.split())[:2000])]
+
+    for match in CAPITAL_RE.finditer(text):
+        previous = parse_amount(match.group(3)) if match.group(3) else None
+        records.append(
+            CapitalChange(
+                uid, date, number, parse_amount(match.group(2)), match.group(1).upper(), previous
+            )
+        )
+
+    records.extend(_board_members(text, uid, date, number))
+
+    if event == "deletion" or DELETION_RE.search(text):
+        records.append(Liquidation(uid, date, number, "deleted"))
+    elif LIQUIDATION_RE.search(text):
+        records.append(Liquidation(uid, date, number, "in_liquidation"))
+    return records
+
+
+def parse_text(text, uid):
+    """
+    Records from free text such as an extracted hits-list PDF
+
+    The text is split at publication numbers (HR02-1005123456); text without
+    any is treated as a single publication.
+    """
+    matches = list(PUBLICATION_NUMBER_RE.finditer(text or ""))
+    if not matches:
+        return parse_publication_text(text or "", uid) if (text or "").strip() else []
+
+    records = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        records.extend(
+            parse_publication_text(
+                text[match.start() : end], uid, rubric=match.group(1), number=match.group(0)
+            )
+        )
+    return records
+
+
+# --- Export formats ---------------------------------------------------------
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find_text(element, *names):
+    for child in element.iter():
+        if _local(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return ""
+
+
+def parse_xml(source, uid=None):
+    """Records from an SOGC XML export (one publication or a list of them)"""
+    root = ET.parse(source).getroot()
+    publications = [el for el in root.iter() if _local(el.tag) == "publication"]
+    if not publications:
+        publications = [root]
+
+    records = []
+    for publication in publications:
+        text = _find_text(publication, "publicationText")
+        if not text:
+            text = " ".join(t.strip() for t in publication.itertext() if t.strip())
+        records.extend(
+            parse_publication_text(
+                text,
+                uid or _find_text(publication, "uid"),
+                date=parse_date(_find_text(publication, "publicationDate")),
+                rubric=_find_text(publication, "subRubric"),
+                number=_find_text(publication, "publicationNumber"),
+            )
+        )
+    return records
+
+
+CSV_COLUMNS = {
+    "number": ("publikations-nr", "publikationsnummer", "publication number", "numéro"),
+    "date": ("publikationsdatum", "publication date", "date de publication", "datum"),
+    "rubric": ("unterrubrik", "sub-rubric", "subrubric", "sous-rubrique"),
+    "text": ("publikationstext", "text", "inhalt", "texte", "titel", "title"),
+}
+
+
+def parse_csv(path, uid):
+    """Records from an SOGC CSV export of a hits list"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        reader = csv.DictReader(f, dialect=dialect)
+        columns = {}
+        for field_name in reader.fieldnames or []:
+            for key, candidates in CSV_COLUMNS.items():
+                normalized = field_name.strip().lower().rstrip(".")
+                if key not in columns and normalized in candidates:
+                    columns[key] = field_name
+
+        records = []
+        for row in reader:
+            number = row.get(columns.get("number"), "") or ""
+            rubric = row.get(columns.get("rubric"), "") or number[:4]
+            records.extend(
+                parse_publication_text(
+                    row.get(columns.get("text"), "") or "",
+                    uid,
+                    date=parse_date(row.get(columns.get("date"), "")),
+                    rubric=rubric.strip(),
+                    number=number.strip(),
+                )
+            )
+    return records
+
+
+def parse_file(path, uid=None):
+    """Parse a downloaded SOGC file; the UID defaults to the file name"""
+    uid = uid or os.path.splitext(os.path.basename(path))[0]
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".xml":
+        return parse_xml(path, uid)
+    if extension == ".csv":
+        return parse_csv(path, uid)
+    if extension == ".pdf":
+        from pdf_text import extract_text
+
+        return parse_text(extract_text(path), uid)
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_text(f.read(), uid)
+
+
+# --- Graph ------------------------------------------------------------------
+
+
+def uri_safe(text):
+    # Same rule rdf_converter uses for startup URIs
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", str(text))
+
+
+@lru_cache(maxsize=1)
+def startup_uris_by_uid():
+    """{UID: startup URI} from the Code and Title columns of the companies table"""
+    from data_lake import read_table
+
+    companies = read_table("companies", columns=["Code", "Title"]).dropna()
+    return {
+        str(code).strip(): RES[uri_safe(str(title).strip())]
+        for code, title in zip(companies["Code"], companies["Title"])
+    }
+
+
+def record_uri(record, position):
+    key = record.publication_number or record.date or "undated"
+    return RES[f"sogc-{uri_safe(record.uid)}-{uri_safe(key)}-{record.kind}-{position}"]
+
+
+def link_records(graph, records, startup_uri=None):
+    """
+    Add records to graph on their startup's URI
+
+    URIs are derived from the publication, so linking the same records
+    again does not duplicate them. Records whose UID is not a known startup
+    (and no startup_uri is given) are skipped.
+
+    Returns:
+        Number of records linked
+    """
+    positions = {}
+    linked = 0
+    for record in records:
+        startup = startup_uri or startup_uris_by_uid().get(record.uid)
+        if startup is None:
+            continue
+
+        position_key = (record.uid, record.publication_number, record.date, record.kind)
+        positions[position_key] = positions.get(position_key, -1) + 1
+        node = record_uri(record, positions[position_key])
+
+        graph.add((startup, EX.uid, Literal(record.uid)))
+        graph.add((startup, EX.hasRegistryEvent, node))
+        graph.add((node, RDF.type, EX.RegistryEvent))
+        graph.add((node, RDF.type, EX[record.rdf_class]))
+        graph.add((node, EX.uid, Literal(record.uid)))
+        if record.date:
+            graph.add((node, EX.event_date, Literal(record.date, datatype=XSD.date)))
+        if record.publication_number:
+            graph.add((node, EX.publication_number, Literal(record.publication_number)))
+
+        if isinstance(record, RegistryEvent):
+            graph.add((node, EX.event_kind, Literal(record.event)))
+            if record.text:
+                graph.add((node, EX.text, Literal(record.text)))
+        elif isinstance(record, CapitalChange):
+            graph.add((node, EX.capital, Literal(record.amount, datatype=XSD.decimal)))
+            graph.add((node, EX.currency, Literal(record.currency)))
+            if record.previous_amount is not None:
+                graph.add(
+                    (
+                        node,
+                        EX.previous_capital,
+                        Literal(record.previous_amount, datatype=XSD.decimal),
+                    )
+                )
+        elif isinstance(record, BoardMember):
+            graph.add((node, EX.person_name, Literal(record.name)))
+            graph.add((node, EX.change, Literal(record.change)))
+            if record.role:
+                graph.add((node, EX.role, Literal(record.role)))
+            if record.signature:
+                graph.add((node, EX.signature, Literal(record.signature)))
+        elif isinstance(record, Liquidation):
+            graph.add((node, EX.status, Literal(record.status)))
+        linked += 1
+    return linked
+
+
+_save_lock = threading.Lock()
+
+
+def save_records(records, path=SOGC_GRAPH_PATH):
+    """Link records into the persisted SOGC graph; returns records linked"""
+    with _save_lock:
+        graph = Graph()
+        graph.bind("ex", EX)
+        graph.bind("res", RES)
+        if os.path.exists(path):
+            graph.parse(path, format="turtle")
+        linked = link_records(graph, records)
+        tmp_path = f"{path}.tmp"
+        graph.serialize(tmp_path, format="turtle")
+        os.replace(tmp_path, path)
+    return linked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse SOGC exports into records")
+    parser.add_argument("paths", nargs="+", help="Files or directories to parse")
+    parser.add_argument("--uid", help="UID for all files (default: file name)")
+    parser.add_argument(
+        "--save", action="store_true", help=f"Link the records into {SOGC_GRAPH_PATH}"
+    )
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(
+                    os.path.join(root, n)
+                    for n in names
+                    if n.lower().endswith((".xml", ".csv", ".pdf", ".txt"))
+                )
+        else:
+            files.append(path)
+
+    records = []
+    for path in sorted(files):
+        parsed = parse_file(path, args.uid)
+        print(f"{path}: {len(parsed)} records")
+        records.extend(parsed)
+
+    counts = {}
+    for record in records:
+        counts[record.kind] = counts.get(record.kind, 0) + 1
+    print(", ".join(f"{count} {kind}" for kind, count in sorted(counts.items())))
+
+    if args.save:
+        linked = save_records(records)
+        print(f"Linked {linked} records into {SOGC_GRAPH_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Offline replay of the SOGC site for tests and benchmarks.
+
+A fixture directory holds recorded HTTP responses together with how long
+the live server took to produce them:
+
+    fixtures/
+        fixtures.json     {"entries": [{"path", "query", "status",
+                            "content_type", "latency", "body"}, ...]}
+        bodies/0001.json  response bodies referenced by "body"
+
+ReplayServer serves these on localhost, sleeping for each response's
+recorded latency (scaled by speed), so web_scrapper.download_sogc_data can
+run end to end without network access:
+
+    with ReplayServer("fixtures") as server:
+        download_sogc_data(uid, search_url=server.search_url,
+                           api_url=server.api_url)
+
+The SOGC search UI itself is a single page app that cannot be replayed from
+recordings, so the server ships a small stand-in page with the same form,
+results and "Hits as PDF" dialog the scraper drives. Its search and
+download requests go to the replayed API.
+
+Usage:
+    python sogc_replay.py record CHE-236.101.881 CHE-215.350.964 -o fixtures
+    python sogc_replay.py synthesize CHE-111.111.111 -o fixtures
+    python sogc_replay.py serve fixtures --port 8765
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from sogc_http import SOGC_API_URL, get_session
+
+FIXTURES_FILE = "fixtures.json"
+API_PREFIX = "/api/v1"
+
+# Smallest well-formed single page PDF, for synthesized fixtures
+MINIMAL_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>SOGC replay</title></head>
+<body>
+<form id="search">
+  <label>UID</label>
+  <input type="text" name="uid" placeholder="UID">
+  <label><input type="radio" name="period" value="all"> No restrictions</label>
+  <button type="submit" class="search">Search</button>
+</form>
+<div id="results"></div>
+<div class="modal" id="pdf-dialog" style="display: none;">
+  <input type="text" name="documentName">
+  <div class="modal-footer">
+    <button type="button" class="btn-primary" id="pdf-submit">Hits as PDF</button>
+  </div>
+</div>
+<script>
+var API = "%(api)s";
+var currentUid = null;
+document.getElementById("search").addEventListener("submit", function (event) {
+  event.preventDefault();
+  currentUid = document.querySelector("input[name=uid]").value.trim();
+  var xhr = new XMLHttpRequest();
+  xhr.open("GET", API + "/publications?" + new URLSearchParams({
+    keyword: currentUid, publicationStates: "PUBLISHED"}));
+  xhr.onload = function () {
+    var results = document.getElementById("results");
+    var content = xhr.status === 200 ? JSON.parse(xhr.responseText).content || [] : [];
+    if (!content.length) {
+      results.innerHTML = "<div class='hits'>No hits found</div>";
+      return;
+    }
+    results.innerHTML = "<div class='hits'>" + content.length + " hits for " +
+      currentUid + "</div><button type='button' id='hits-pdf'>Hits as PDF</button>";
+    document.getElementById("hits-pdf").addEventListener("click", function () {
+      document.getElementById("pdf-dialog").style.display = "block";
+    });
+  };
+  xhr.send();
+});
+document.getElementById("pdf-submit").addEventListener("click", function () {
+  window.location.href = "/hits/" + encodeURIComponent(currentUid) + ".pdf";
+});
+</script>
+</body>
+</html>
+"""
+
+
+class Fixtures:
+    """Recorded responses, matched by path and query parameters"""
+
+    def __init__(self, fixture_dir):
+        self.dir = fixture_dir
+        with open(os.path.join(fixture_dir, FIXTURES_FILE), "r", encoding="utf-8") as f:
+            self.entries = json.load(f)["entries"]
+
+    def match(self, path, query):
+        """
+        First entry for path whose recorded query parameters all appear in
+        query (extra parameters such as paging are ignored), or None
+        """
+        for entry in self.entries:
+            if entry["path"] != path:
+                continue
+            if all(query.get(k) == v for k, v in entry.get("query", {}).items()):
+                return entry
+        return None
+
+    def body(self, entry):
+        with open(os.path.join(self.dir, entry["body"]), "rb") as f:
+            return f.read()
+
+    def latest_document(self, uid, output_format="pdf"):
+        """Recorded document entry of the newest publication for uid"""
+        search = self.match(f"{API_PREFIX}/publications", {"keyword": uid})
+        if search is None:
+            return None
+        content = json.loads(self.body(search)).get("content", [])
+        if not content:
+            return None
+        newest = max(
+            (item.get("meta", item) for item in content),
+            key=lambda meta: meta.get("publicationDate") or "",
+        )
+        return self.match(f"{API_PREFIX}/publications/{newest['id']}/{output_format}", {})
+
+
+class ReplayServer:
+    """
+    Local HTTP server replaying a fixture directory
+
+    Args:
+        fixture_dir: Directory with fixtures.json
+        port: Port to bind (0 picks a free one)
+        speed: Multiplier for recorded latencies (0 answers immediately)
+    """
+
+    def __init__(self, fixture_dir, port=0, speed=1.0):
+        self.fixtures = Fixtures(fixture_dir)
+        self.speed = speed
+        self.misses = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        return self.url + API_PREFIX
+
+    @property
+    def search_url(self):
+        return self.url + "/"
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = dict(parse_qsl(parsed.query))
+                with replay._lock:
+                    replay.requests += 1
+
+                if parsed.path in ("/", "/index.html"):
+                    page = SEARCH_PAGE % {"api": API_PREFIX}
+                    return self._send(200, "text/html; charset=utf-8", page.encode())
+
+                if parsed.path.startswith("/hits/") and parsed.path.endswith(".pdf"):
+                    uid = parsed.path[len("/hits/") : -len(".pdf")]
+                    entry = replay.fixtures.latest_document(uid)
+                    if entry is not None:
+                        return self._replay(entry, attachment="hits.pdf")
+                else:
+                    entry = replay.fixtures.match(parsed.path, query)
+                    if entry is not None:
+                        return self._replay(entry)
+
+                with replay._lock:
+                    replay.misses.append(self.path)
+                self._send(404, "text/plain", b"No fixture for this request")
+
+            def _replay(self, entry, attachment=None):
+                time.sleep(entry.get("latency", 0.0) * replay.speed)
+                headers = {}
+                if attachment:
+                    headers["Content-Disposition"] = f'attachment; filename="{attachment}"'
+                self._send(
+                    entry.get("status", 200),
+                    entry.get("content_type", "application/octet-stream"),
+                    replay.fixtures.body(entry),
+                    headers,
+                )
+
+            def _send(self, status, content_type, body, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FixtureWriter:
+    """Builds a fixture directory entry by entry"""
+
+    def __init__(self, fixture_dir):
+        self.dir = fixture_dir
+        self.entries = []
+        os.makedirs(os.path.join(fixture_dir, "bodies"), exist_ok=True)
+
+    def add(self, path, body, query=None, status=200, content_type="application/json", latency=0.0):
+        extension = {"application/json": "json", "application/pdf": "pdf"}.get(
+            content_type.split(";")[0], "bin"
+        )
+        name = f"bodies/{len(self.entries) + 1:04d}.{extension}"
+        with open(os.path.join(self.dir, name), "wb") as f:
+            f.write(body)
+        self.entries.append(
+            {
+                "path": path,
+                "query": query or {},
+                "status": status,
+                "content_type": content_type,
+                "latency": round(latency, 4),
+                "body": name,
+            }
+        )
+
+    def save(self, **meta):
+        with open(os.path.join(self.dir, FIXTURES_FILE), "w", encoding="utf-8") as f:
+            json.dump({**meta, "entries": self.entries}, f, indent=2)
+
+
+def record(uids, fixture_dir, api_url=SOGC_API_URL, output_format="pdf"):
+    """Record live SOGC API responses (and their latencies) for uids"""
+    writer = FixtureWriter(fixture_dir)
+    session = get_session()
+    for uid in uids:
+        started = time.perf_counter()
+        response = session.get(
+            f"{api_url}/publications",
+            params={"keyword": uid, "publicationStates": "PUBLISHED"},
+            headers={"Accept": "application/json"},
+            timeout=30,
+        )
+        writer.add(
+            f"{API_PREFIX}/publications",
+            response.content,
+            query={"keyword": uid},
+            status=response.status_code,
+            content_type=response.headers.get("Content-Type", "application/json"),
+            latency=time.perf_counter() - started,
+        )
+        if not response.ok:
+            print(f"{uid}: search returned HTTP {response.status_code}")
+            continue
+
+        content = response.json().get("content", [])
+        if not content:
+            print(f"{uid}: no publications")
+            continue
+        latest = max(
+            (item.get("meta", item) for item in content),
+            key=lambda meta: meta.get("publicationDate") or "",
+        )
+        path = f"/publications/{latest['id']}/{output_format}"
+        started = time.perf_counter()
+        document = session.get(api_url + path, timeout=60)
+        writer.add(
+            API_PREFIX + path,
+            document.content,
+            status=document.status_code,
+            content_type=document.headers.get("Content-Type", "application/pdf"),
+            latency=time.perf_counter() - started,
+        )
+        print(f"{uid}: recorded publication {latest.get('publicationNumber') or latest['id']}")
+
+    writer.save(recorded_at=time.strftime("%Y-%m-%dT%H:%M:%S"), api_url=api_url)
+    return writer.entries
+
+
+def synthesize(uids, fixture_dir, search_latency=0.3, document_latency=0.8, pdf_path=None):
+    """
+    Write fixtures for uids without network access
+
+    Each UID gets one publication whose document is pdf_path (a minimal
+    blank PDF by default), served with the given latencies.
+    """
+    pdf_bytes = MINIMAL_PDF
+    if pdf_path:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+
+    writer = FixtureWriter(fixture_dir)
+    for number, uid in enumerate(uids, start=1):
+        publication_id = f"replay-{number:04d}"
+        search = {
+            "content": [
+                {
+                    "meta": {
+                        "id": publication_id,
+                        "publicationNumber": f"HR02-{1000000000 + number}",
+                        "publicationDate": "2024-01-15T00:00:00",
+                        "rubric": "HR",
+                        "subRubric": "HR02",
+                        "title": {"de": f"Mutation {uid}"},
+                    }
+                }
+            ]
+        }
+        writer.add(
+            f"{API_PREFIX}/publications",
+            json.dumps(search).encode(),
+            query={"keyword": uid},
+            latency=search_latency,
+        )
+        writer.add(
+            f"{API_PREFIX}/publications/{publication_id}/pdf",
+            pdf_bytes,
+            content_type="application/pdf",
+            latency=document_latency,
+        )
+    writer.save(synthesized=True)
+    return writer.entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay SOGC fixtures")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="Record live API responses")
+    record_cmd.add_argument("uids", nargs="+")
+    record_cmd.add_argument("-o", "--out", default="sogc_fixtures")
+    record_cmd.add_argument("--api-url", default=SOGC_API_URL)
+
+    synth_cmd = commands.add_parser("synthesize", help="Write fixtures offline")
+    synth_cmd.add_argument("uids", nargs="+")
+    synth_cmd.add_argument("-o", "--out", default="sogc_fixtures")
+    synth_cmd.add_argument("--pdf", help="Document served for every UID")
+
+    serve_cmd = commands.add_parser("serve", help="Serve a fixture directory")
+    serve_cmd.add_argument("fixtures", nargs="?", default="sogc_fixtures")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    serve_cmd.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        entries = record(args.uids, args.out, api_url=args.api_url)
+        print(f"Wrote {len(entries)} fixtures to {args.out}")
+    elif args.command == "synthesize":
+        entries = synthesize(args.uids, args.out, pdf_path=args.pdf)
+        print(f"Wrote {len(entries)} fixtures to {args.out}")
+    else:
+        with ReplayServer(args.fixtures, port=args.port, speed=args.speed) as server:
+            print(f"Replaying {args.fixtures} at {server.search_url} (API {server.api_url})")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Indexes and common lookups over startups_clean.db.
+
+database.py loads the workbooks into SQLite; this module adds the indexes
+the lookups below rely on and wraps the queries the app and the analysis
+scripts need, so relational questions (a company's UID, its deals, the
+companies of a sector) are answered from SQLite without loading the RDF
+graph.
+
+Char values are stored lowercased by database.py, so lookups lowercase
+their arguments. Deal amounts are returned in CHF like in the graph (the
+sheet stores millions).
+
+    repo = StartupRepository()
+    repo.company_uid("SwissDrones")        # "CHE-424.414.541"
+    repo.funding_history("climeworks ag")
+    repo.investor_deals("ZKB")             # deals of Zürcher Kantonalbank
+"""
+
+import os
+import sqlite3
+
+from company_index import CompanyIndex
+from investors import investor_key, investor_names, split_investors
+
+DB_PATH = "startups_clean.db"
+
+COMPANIES = "startupticker_companies"
+DEALS = "startupticker_deals"
+
+# table -> indexed column tuples; tables or columns that were not loaded are skipped
+INDEXES = {
+    COMPANIES: [("Title",), ("Code",), ("Industry",)],
+    DEALS: [("Id",), ("Company", "Date of the funding round"), ("Date of the funding round",)],
+    "crunchbase_organizations": [("uuid",), ("name",)],
+    "crunchbase_funding_rounds": [("org_uuid",), ("announced_on",)],
+}
+
+AMOUNT_SCALE = 1_000_000
+
+# Precomputed deal count and total (CHF) per company name
+FUNDING_TABLE = "company_funding"
+
+# Investor dimension (one row per investor key, see investors.py) and the
+# deals of each investor
+INVESTORS_TABLE = "investors"
+DEAL_INVESTORS_TABLE = "deal_investors"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _index_name(table, columns):
+    suffix = "_".join("".join(c if c.isalnum() else "_" for c in col.lower()) for col in columns)
+    return f"idx_{table}_{suffix}"
+
+
+def create_indexes(conn, indexes=INDEXES):
+    """Create the index plan on an open connection; returns the names created"""
+    created = []
+    for table, column_sets in indexes.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")}
+        if not existing:
+            continue
+        for columns in column_sets:
+            if not set(columns) <= existing:
+                continue
+            name = _index_name(table, columns)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} "
+                f"({', '.join(_quote(c) for c in columns)})"
+            )
+            created.append(name)
+    # Let the planner know the row counts and selectivity
+    conn.execute("ANALYZE")
+    return created
+
+
+def refresh_company_funding(conn, companies=None):
+    """
+    Recompute FUNDING_TABLE, for every company or only the given names
+
+    Runs on the caller's connection, so it commits (or rolls back) with the
+    changes that made it necessary.
+    """
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {FUNDING_TABLE} "
+        "(Company TEXT PRIMARY KEY, rounds INTEGER, total REAL)"
+    )
+    select = (
+        f"SELECT Company, COUNT(*), ROUND(SUM(Amount) * {AMOUNT_SCALE}, 2) FROM {DEALS} "
+        "WHERE Company IS NOT NULL"
+    )
+    if companies is None:
+        conn.execute(f"DELETE FROM {FUNDING_TABLE}")
+        conn.execute(f"INSERT INTO {FUNDING_TABLE} {select} GROUP BY Company")
+        return
+    for company in set(companies):
+        conn.execute(f"DELETE FROM {FUNDING_TABLE} WHERE Company = ?", (company,))
+        conn.execute(
+            f"INSERT INTO {FUNDING_TABLE} {select} AND Company = ? GROUP BY Company", (company,)
+        )
+
+
+def refresh_investors(conn):
+    """
+    Rebuild INVESTORS_TABLE and DEAL_INVESTORS_TABLE from the Investors cells
+
+    A full rebuild takes a fraction of a second, so cdc.py simply calls it
+    again in its transaction.
+    """
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {INVESTORS_TABLE} "
+        "(key TEXT PRIMARY KEY, name TEXT, deals INTEGER)"
+    )
+    # The primary key doubles as the investor -> deals index
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {DEAL_INVESTORS_TABLE} "
+        "(investor_key TEXT, deal_id TEXT, name TEXT, PRIMARY KEY (investor_key, deal_id))"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{DEAL_INVESTORS_TABLE}_deal_id "
+        f"ON {DEAL_INVESTORS_TABLE} (deal_id)"
+    )
+    deals = conn.execute(
+        f"SELECT Id, Investors FROM {DEALS} WHERE Id IS NOT NULL AND Investors IS NOT NULL"
+    ).fetchall()
+    links = {
+        (investor_key(name), deal_id): name
+        for deal_id, cell in deals
+        for name in split_investors(cell)
+    }
+    names = investor_names(cell for _, cell in deals)
+    counts = {}
+    for key, _ in links:
+        counts[key] = counts.get(key, 0) + 1
+
+    conn.execute(f"DELETE FROM {DEAL_INVESTORS_TABLE}")
+    conn.execute(f"DELETE FROM {INVESTORS_TABLE}")
+    conn.executemany(
+        f"INSERT INTO {DEAL_INVESTORS_TABLE} VALUES (?, ?, ?)",
+        [(key, deal_id, name) for (key, deal_id), name in links.items()],
+    )
+    conn.executemany(
+        f"INSERT INTO {INVESTORS_TABLE} VALUES (?, ?, ?)",
+        [(key, names[key], count) for key, count in counts.items()],
+    )
+
+
+class StartupRepository:
+    """Read-only queries over the startupticker tables"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        # (file signature, CompanyIndex) of the company titles
+        self._titles = None
+
+    def available(self):
+        return self.has_table(COMPANIES)
+
+    def has_table(self, name):
+        if not os.path.exists(self.db_path):
+            return False
+        return self._one(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ) is not None
+
+    def _connect(self):
+        # One short-lived connection per call keeps the repository thread safe
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def query(self, sql, params=()):
+        """All rows of a read-only query as dicts"""
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def _one(self, sql, params=()):
+        rows = self.query(sql, params)
+        return rows[0] if rows else None
+
+    def _title_index(self):
+        """CompanyIndex of the titles, rebuilt when the database file changes"""
+        stat = os.stat(self.db_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._titles
+        if cached is None or cached[0] != signature:
+            titles = self.query(f"SELECT Title FROM {COMPANIES} WHERE Title IS NOT NULL")
+            cached = self._titles = (signature, CompanyIndex.from_names(row["Title"] for row in titles))
+        return cached[1]
+
+    def find_company(self, name):
+        """
+        Company row best matching name, matched like the graph's startups
+        (company_index.CompanyIndex.resolve): exact or normalized title, then
+        a title starting with it, then a close spelling
+        """
+        name = name.strip()
+        if not name:
+            return None
+        title = self._title_index().resolve(name.lower())
+        if title is None:
+            return None
+        return self._one(f"SELECT * FROM {COMPANIES} WHERE Title = ? LIMIT 1", (title,))
+
+    def company_by_uid(self, uid):
+        return self._one(
+            f"SELECT * FROM {COMPANIES} WHERE Code = ? LIMIT 1", (uid.lower().strip(),)
+        )
+
+    def company_uid(self, name):
+        """Commercial register UID (CHE-...) of the company matching name, or None"""
+        company = self.find_company(name)
+        if company is None or not company.get("Code"):
+            return None
+        return company["Code"].upper()
+
+    def company_summary(self, title):
+        """Industry, canton, number of deals and total funding of one company"""
+        return self._one(
+            f"""
+            SELECT c.Title AS title, c.Code AS code, c.Industry AS industry,
+                   c.Canton AS canton, c.City AS city, c.Year AS year,
+                   COUNT(d.Id) AS funding_rounds,
+                   ROUND(SUM(d.Amount) * {AMOUNT_SCALE}, 2) AS total_funding
+            FROM {COMPANIES} c
+            LEFT JOIN {DEALS} d ON d.Company = c.Title
+            WHERE c.Title = ?
+            GROUP BY c.Title
+            """,
+            (title.lower().strip(),),
+        )
+
+    def funding_history(self, title):
+        """Deals of one company, oldest first"""
+        return self.query(
+            f"""
+            SELECT "Date of the funding round" AS date, Phase AS phase, Type AS type,
+                   ROUND(Amount * {AMOUNT_SCALE}, 2) AS amount, Investors AS investors
+            FROM {DEALS}
+            WHERE Company = ?
+            ORDER BY "Date of the funding round"
+            """,
+            (title.lower().strip(),),
+        )
+
+    def sector_companies(self, industry):
+        """Funding totals of every company in an industry"""
+        return self.query(
+            f"""
+            SELECT c.Title AS title, COUNT(d.Id) AS funding_rounds,
+                   ROUND(SUM(d.Amount) * {AMOUNT_SCALE}, 2) AS total_funding
+            FROM {COMPANIES} c
+            LEFT JOIN {DEALS} d ON d.Company = c.Title
+            WHERE c.Industry = ?
+            GROUP BY c.Title
+            """,
+            (industry.lower().strip(),),
+        )
+
+    def deals_between(self, start, end):
+        """Deals dated in [start, end), both YYYY-MM-DD"""
+        return self.query(
+            f"""SELECT * FROM {DEALS}
+            WHERE "Date of the funding round" >= ? AND "Date of the funding round" < ?
+            ORDER BY "Date of the funding round"
+            """,
+            (start, end),
+        )
+
+    def find_investor(self, name):
+        """
+        Investor row (key, name, deals) matching name: same key (any spelling
+        or alias), then the most active investor whose key contains it
+        """
+        key = investor_key(name)
+        if key is None or not self.has_table(INVESTORS_TABLE):
+            return None
+        return (
+            self._one(f"SELECT * FROM {INVESTORS_TABLE} WHERE key = ?", (key,))
+            or self._one(
+                f"SELECT * FROM {INVESTORS_TABLE} WHERE instr(key, ?) > 0 "
+                "ORDER BY deals DESC LIMIT 1",
+                (key,),
+            )
+        )
+
+    def investor_deals(self, name):
+        """Deals of the investor matching name, oldest first"""
+        investor = self.find_investor(name)
+        if investor is None:
+            return []
+        return self.query(
+            f"""
+            SELECT d.Id AS id, d.Company AS company, d."Date of the funding round" AS date,
+                   d.Phase AS phase, d.Type AS type, ROUND(d.Amount * {AMOUNT_SCALE}, 2) AS amount
+            FROM {DEAL_INVESTORS_TABLE} i
+            JOIN {DEALS} d ON d.Id = i.deal_id
+            WHERE i.investor_key = ?
+            ORDER BY d."Date of the funding round"
+            """,
+            (investor["key"],),
+        )
+
+    def crunchbase_rounds(self, org_uuid):
+        return self.query(
+            "SELECT * FROM crunchbase_funding_rounds WHERE org_uuid = ? "
+            "ORDER BY announced_on",
+            (org_uuid,),
+        )
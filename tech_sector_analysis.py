@@ -1,15 +1,11 @@
-from rdflib import Graph, Literal, RDF, URIRef, Namespace
-from rdflib.namespace import XSD
-from datetime import datetime, timedelta
+from datetime import datetime
 
-# Load the RDF graph
-print("Loading graph...")
-g = Graph()
-g.parse("startups_graph.ttl", format="turtle")
-print("Graph loaded successfully")
+from query_backend import TECH_INDUSTRIES, TECH_PREFIXES, get_backend
 
-# Define namespaces
-ex = Namespace("http://example.org/ontology#")
+# Aggregates come from SQL when startups_clean.db exists, SPARQL otherwise
+# (QUERY_BACKEND=sparql|sql overrides)
+backend = get_backend()
+print(f"Using the {backend.name} query backend")
 
 # Calculate date range for last 5 years
 current_year = datetime.now().year
@@ -20,144 +16,50 @@ print("=" * 80)
 
 # 1. Industry Distribution
 print("\n1. Industry Distribution in Tech Sector:")
-query_industry = """
-    SELECT ?industry_name (COUNT(DISTINCT ?startup) as ?count)
-    WHERE {
-        ?startup a ex:Startup ;
-                ex:hasIndustry ?industry .
-        ?industry ex:name ?industry_name .
-        FILTER (STRSTARTS(?industry_name, "ICT") || ?industry_name = "biotech" || 
-                ?industry_name = "medtech" || ?industry_name = "healthcare IT" ||
-                ?industry_name = "micro/nano" || ?industry_name = "cleantech")
-    }
-    GROUP BY ?industry_name
-    ORDER BY DESC(?count)
-"""
-
 try:
-    results = g.query(query_industry)
     print("\nNumber of startups by industry:")
-    for row in results:
-        count = int(row.count.toPython())
-        print(f"- {row.industry_name}: {count} startups")
+    for industry, count in backend.industry_counts(TECH_INDUSTRIES, TECH_PREFIXES):
+        print(f"- {industry}: {count} startups")
 except Exception as e:
     print(f"Error in industry distribution query: {e}")
 
 # 2. Funding Trends
 print("\n2. Funding Trends by Year:")
-query_funding = """
-    SELECT ?year (COUNT(DISTINCT ?funding) as ?funding_count) 
-                 (SUM(?amount) as ?total_amount)
-    WHERE {
-        ?startup a ex:Startup ;
-                ex:hasIndustry ?industry ;
-                ex:hasFunding ?funding .
-        ?industry ex:name ?industry_name .
-        ?funding ex:amount ?amount ;
-                ex:date ?funding_date .
-        BIND (YEAR(?funding_date) as ?year)
-        FILTER (?year >= %d && ?year <= %d)
-        FILTER (STRSTARTS(?industry_name, "ICT") || ?industry_name = "biotech" || 
-                ?industry_name = "medtech" || ?industry_name = "healthcare IT" ||
-                ?industry_name = "micro/nano" || ?industry_name = "cleantech")
-    }
-    GROUP BY ?year
-    ORDER BY ?year
-""" % (start_year, current_year)
-
 try:
     print("\nYear | Number of Funding Events | Total Amount (CHF)")
     print("-" * 50)
-    results = g.query(query_funding)
-    for row in results:
-        year = int(row.year.toPython())
-        count = int(row.funding_count.toPython())
-        amount = float(row.total_amount.toPython())
+    for year, count, amount in backend.yearly_funding(
+        TECH_INDUSTRIES, TECH_PREFIXES, start_year, current_year
+    ):
         print(f"{year} | {count} | {amount:,.2f}")
 except Exception as e:
     print(f"Error in funding trends query: {e}")
 
 # 3. Funding Stages Distribution
 print("\n3. Funding Stage Distribution:")
-query_stages = """
-    SELECT ?phase (COUNT(DISTINCT ?funding) as ?count)
-    WHERE {
-        ?startup a ex:Startup ;
-                ex:hasIndustry ?industry ;
-                ex:hasFunding ?funding .
-        ?industry ex:name ?industry_name .
-        ?funding ex:phase ?phase .
-        FILTER (STRSTARTS(?industry_name, "ICT") || ?industry_name = "biotech" || 
-                ?industry_name = "medtech" || ?industry_name = "healthcare IT" ||
-                ?industry_name = "micro/nano" || ?industry_name = "cleantech")
-    }
-    GROUP BY ?phase
-    ORDER BY DESC(?count)
-"""
-
 try:
     print("\nFunding stages distribution:")
-    results = g.query(query_stages)
-    for row in results:
-        count = int(row.count.toPython())
-        print(f"- {row.phase}: {count} funding events")
+    for phase, count in backend.phase_counts(TECH_INDUSTRIES, TECH_PREFIXES):
+        print(f"- {phase}: {count} funding events")
 except Exception as e:
     print(f"Error in funding stages query: {e}")
 
 # 4. Top Funded Companies
 print("\n4. Top 10 Funded Companies:")
-query_top_funded = """
-    SELECT ?name (SUM(?amount) as ?total_funding)
-    WHERE {
-        ?startup a ex:Startup ;
-                ex:name ?name ;
-                ex:hasIndustry ?industry ;
-                ex:hasFunding ?funding .
-        ?industry ex:name ?industry_name .
-        ?funding ex:amount ?amount .
-        FILTER (STRSTARTS(?industry_name, "ICT") || ?industry_name = "biotech" || 
-                ?industry_name = "medtech" || ?industry_name = "healthcare IT" ||
-                ?industry_name = "micro/nano" || ?industry_name = "cleantech")
-    }
-    GROUP BY ?name
-    ORDER BY DESC(?total_funding)
-    LIMIT 10
-"""
-
 try:
     print("\nCompany | Total Funding (CHF)")
     print("-" * 40)
-    results = g.query(query_top_funded)
-    for row in results:
-        amount = float(row.total_funding.toPython())
-        print(f"{row.name} | {amount:,.2f}")
+    for name, amount in backend.top_funded(TECH_INDUSTRIES, TECH_PREFIXES, limit=10):
+        print(f"{name} | {amount:,.2f}")
 except Exception as e:
     print(f"Error in top funded companies query: {e}")
 
 # 5. Geographic Distribution
 print("\n5. Geographic Distribution of Tech Startups:")
-query_location = """
-    SELECT ?location (COUNT(DISTINCT ?startup) as ?count)
-    WHERE {
-        ?startup a ex:Startup ;
-                ex:hasIndustry ?industry ;
-                ex:hasLocation ?loc .
-        ?industry ex:name ?industry_name .
-        ?loc ex:name ?location .
-        FILTER (STRSTARTS(?industry_name, "ICT") || ?industry_name = "biotech" || 
-                ?industry_name = "medtech" || ?industry_name = "healthcare IT" ||
-                ?industry_name = "micro/nano" || ?industry_name = "cleantech")
-    }
-    GROUP BY ?location
-    ORDER BY DESC(?count)
-"""
-
 try:
     print("\nLocation | Number of Startups")
     print("-" * 40)
-    results = g.query(query_location)
-    for row in results:
-        count = int(row.count.toPython())
-        print(f"{row.location} | {count}")
+    for location, count in backend.location_counts(TECH_INDUSTRIES, TECH_PREFIXES):
+        print(f"{location} | {count}")
 except Exception as e:
-    print(f"Error in geographic distribution query: {e}") 
\ No newline at end of file
+    print(f"Error in geographic distribution query: {e}")
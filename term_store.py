@@ -0,0 +1,244 @@
+"""
+Compact in-memory rdflib store.
+
+rdflib's default Memory store keeps every triple in nested dicts keyed by
+the terms themselves, three times over (SPO, POS and OSP). InternedStore
+gives each distinct term an integer id once and stores a triple as one
+64-bit integer, kept in three sorted arrays (SPO, POS and OSP order). A
+pattern with bound terms is a contiguous range of one of them, found with
+bisect:
+
+    import term_store
+    graph = Graph(store=term_store.STORE)
+    graph.parse("startups_graph.ttl", format="turtle")
+
+Writes are buffered and merged into the arrays on the next read, so
+parsing or copying a graph sorts each array once. Like a plain Graph()
+over Memory, the store is not context aware. Set RDF_STORE=Memory to go
+back to rdflib's store.
+"""
+
+import os
+import threading
+from array import array
+from bisect import bisect_left
+
+from rdflib import plugin
+from rdflib.store import Store
+
+# Store plugin name, see the register() call at the end
+STORE = os.getenv("RDF_STORE", "Interned")
+
+# Bits of a term id in a packed triple; 3 * BITS must fit in 64
+BITS = 21
+MASK = (1 << BITS) - 1
+MAX_TERMS = 1 << BITS
+
+# Index name -> positions of (s, p, o) in its keys
+ORDERS = {
+    "spo": (0, 1, 2),
+    "pos": (1, 2, 0),
+    "osp": (2, 0, 1),
+}
+
+# Pending writes above 1/MERGE_RATIO of the triples rebuild the arrays
+# instead of inserting key by key
+MERGE_RATIO = 64
+
+
+def _pack(a, b, c):
+    return (a << (2 * BITS)) | (b << BITS) | c
+
+
+def _unpack(key):
+    return key >> (2 * BITS), (key >> BITS) & MASK, key & MASK
+
+
+def _permute(key, order):
+    """Key of an SPO key in another index's order"""
+    ids = _unpack(key)
+    return _pack(ids[order[0]], ids[order[1]], ids[order[2]])
+
+
+class InternedStore(Store):
+    """Triples as sorted arrays of interned term ids"""
+
+    context_aware = False
+    formula_aware = False
+    graph_aware = False
+    transaction_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        super().__init__(configuration)
+        self.identifier = identifier
+        self._ids = {}
+        self._terms = []
+        self._index = {name: array("Q") for name in ORDERS}
+        # SPO keys written since the last merge
+        self._added = set()
+        self._removed = set()
+        self._lock = threading.Lock()
+        self._namespace = {}
+        self._prefix = {}
+
+    def _intern(self, term):
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            if term_id >= MAX_TERMS:
+                raise ValueError(f"{type(self).__name__} holds at most {MAX_TERMS} distinct terms")
+            self._ids[term] = term_id
+            self._terms.append(term)
+        return term_id
+
+    def add(self, triple, context=None, quoted=False):
+        s, p, o = triple
+        key = _pack(self._intern(s), self._intern(p), self._intern(o))
+        if key in self._removed:
+            self._removed.discard(key)
+        else:
+            self._added.add(key)
+
+    def addN(self, quads):
+        for s, p, o, _ in quads:
+            self.add((s, p, o))
+
+    def remove(self, triple_pattern, context=None):
+        order, keys = self._match(triple_pattern)
+        for key in keys:
+            ids = [None, None, None]
+            for position, term_id in zip(order, _unpack(key)):
+                ids[position] = term_id
+            key = _pack(*ids)
+            self._added.discard(key)
+            self._removed.add(key)
+
+    def _merge(self):
+        """Fold the pending writes into the sorted arrays"""
+        with self._lock:
+            if not (self._added or self._removed):
+                return
+            spo = self._index["spo"]
+            if (len(self._added) + len(self._removed)) * MERGE_RATIO < len(spo):
+                # Insert into copies: readers iterating the old arrays keep them
+                index = {name: array("Q", keys) for name, keys in self._index.items()}
+                for key in self._added:
+                    position = bisect_left(spo, key)
+                    if position < len(spo) and spo[position] == key:
+                        continue
+                    for name, order in ORDERS.items():
+                        keys = index[name]
+                        permuted = _permute(key, order)
+                        keys.insert(bisect_left(keys, permuted), permuted)
+                for key in self._removed:
+                    for name, order in ORDERS.items():
+                        keys = index[name]
+                        permuted = _permute(key, order)
+                        position = bisect_left(keys, permuted)
+                        if position < len(keys) and keys[position] == permuted:
+                            del keys[position]
+            else:
+                triples = (set(spo) | self._added) - self._removed
+                index = {
+                    name: array("Q", sorted(_permute(key, order) for key in triples))
+                    for name, order in ORDERS.items()
+                }
+            self._index = index
+            self._added = set()
+            self._removed = set()
+
+    def _match(self, triple_pattern):
+        """(order, keys) of the triples matching a pattern, keys in that order"""
+        self._merge()
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self._ids.get(term)
+            if term_id is None:
+                # A term the store has never seen matches nothing
+                return ORDERS["spo"], ()
+            ids.append(term_id)
+        s, p, o = ids
+
+        # Index whose keys start with the bound terms
+        if s is not None and p is None and o is not None:
+            name = "osp"
+        elif s is None and p is not None:
+            name = "pos"
+        elif s is None and o is not None:
+            name = "osp"
+        else:
+            name = "spo"
+        order = ORDERS[name]
+        keys = self._index[name]
+        prefix = []
+        for position in order:
+            if ids[position] is None:
+                break
+            prefix.append(ids[position])
+        if not prefix:
+            # Arrays are replaced, never changed, once readers can see them
+            return order, keys
+
+        free = BITS * (3 - len(prefix))
+        low = 0
+        for term_id in prefix:
+            low = (low << BITS) | term_id
+        low <<= free
+        start = bisect_left(keys, low)
+        end = bisect_left(keys, low + (1 << free), start)
+        return order, keys[start:end]
+
+    def triples(self, triple_pattern, context=None):
+        """Matching triples as ((s, p, o), contexts) pairs"""
+        terms = self._terms
+        order, keys = self._match(triple_pattern)
+        shift = 2 * BITS
+        no_contexts = ()
+        # Decode in the order of the index the keys come from
+        if order == ORDERS["spo"]:
+            for key in keys:
+                yield (terms[key >> shift], terms[(key >> BITS) & MASK], terms[key & MASK]), no_contexts
+        elif order == ORDERS["pos"]:
+            for key in keys:
+                yield (terms[key & MASK], terms[key >> shift], terms[(key >> BITS) & MASK]), no_contexts
+        else:
+            for key in keys:
+                yield (terms[(key >> BITS) & MASK], terms[key & MASK], terms[key >> shift]), no_contexts
+
+    def __len__(self, context=None):
+        self._merge()
+        return len(self._index["spo"])
+
+    def bind(self, prefix, namespace, override=True):
+        # Same semantics as rdflib's Memory.bind
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace)
+        if bound_prefix is None:
+            bound_prefix = self._prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            namespace = bound_namespace if bound_namespace is not None else namespace
+            prefix = bound_prefix if bound_prefix is not None else prefix
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        yield from list(self._namespace.items())
+
+
+plugin.register("Interned", Store, "term_store", "InternedStore")
@@ -0,0 +1,238 @@
+"""
+Adaptive waits for the Selenium scraper.
+
+Instead of sleeping a fixed number of seconds after every navigation or
+click, each wait polls an explicit condition (an element, the document
+ready state, network idle) every POLL_INTERVAL seconds and returns as soon
+as it holds. The time budget of a step is learned from how long that step
+took when it succeeded before:
+
+    budget = clamp(p95 of recent successes * MARGIN, floor, ceiling)
+
+An until() step only gets more time after it failed: every consecutive
+timeout doubles its budget (up to the ceiling) and the next success resets
+it. settle() steps replace fixed sleeps and never wait longer than the
+sleep they replaced (their default): pages that keep polling never reach
+network idle, and backing off there would make them slower than before.
+
+Waits are recorded as "wait" spans in scrape_metrics, and the policy seeds
+itself from the spans of earlier runs in SCRAPE_METRICS_FILE, so learned
+latencies carry over between processes.
+
+    wait = policy.bind(driver)
+    wait.until("search_results", lambda d: d.find_elements(By.CLASS_NAME, "hits"))
+    wait.settle("page_load")
+"""
+
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import scrape_metrics
+from scrape_metrics import span
+
+POLL_INTERVAL = 0.1
+MARGIN = 2.0
+QUIET_PERIOD = 0.5
+
+# Outstanding XHRs as seen by jQuery or AngularJS (the SOGC UI is an Angular
+# app), or -1 while the document is still loading. Otherwise the number of
+# resources fetched so far, which stops changing once the network is idle.
+NETWORK_STATE_JS = """
+if (document.readyState !== 'complete') { return -1; }
+var pending = 0;
+if (window.jQuery && window.jQuery.active) { pending += window.jQuery.active; }
+try {
+    if (window.angular) {
+        var injector = window.angular.element(document.body).injector();
+        if (injector) { pending += injector.get('$http').pendingRequests.length; }
+    }
+} catch (e) {}
+if (pending > 0) { return -1; }
+return performance.getEntriesByType('resource').length;
+"""
+
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+class NetworkIdle:
+    """
+    Condition that holds once the page is loaded, no XHR is pending and no
+    new resource was fetched for quiet seconds
+    """
+
+    def __init__(self, quiet=QUIET_PERIOD):
+        self.quiet = quiet
+        self._count = None
+        self._since = None
+
+    def __call__(self, driver):
+        count = driver.execute_script(NETWORK_STATE_JS)
+        now = time.monotonic()
+        if count is None or count < 0 or count != self._count:
+            self._count = count
+            self._since = now
+            return False
+        return now - self._since >= self.quiet
+
+
+class StepStats:
+    """Recent successful latencies and the current failure streak of a step"""
+
+    def __init__(self, keep):
+        self.latencies = deque(maxlen=keep)
+        self.failures = 0
+
+    def p95(self):
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+
+
+class WaitPolicy:
+    """
+    Learns per-step wait budgets and runs explicit waits against them
+
+    Args:
+        default: Budget (seconds) of a step with no history
+        floor: Smallest budget ever given to a step
+        ceiling: Largest budget, including after back-off
+        poll: Seconds between condition checks
+        keep: Successful latencies remembered per step
+        metrics_path: Span log to learn from (None to start empty)
+    """
+
+    def __init__(
+        self,
+        default=20,
+        floor=2,
+        ceiling=60,
+        poll=POLL_INTERVAL,
+        keep=50,
+        metrics_path=scrape_metrics.METRICS_PATH,
+    ):
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self.poll = poll
+        self.keep = keep
+        self.metrics_path = metrics_path
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load_history(self):
+        """Seed step latencies from earlier runs, once"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.metrics_path:
+            return
+        try:
+            spans = scrape_metrics.load_spans(self.metrics_path)
+        except FileNotFoundError:
+            return
+        for s in spans:
+            if s["name"] == "wait" and s["outcome"] == "ok":
+                step = s.get("attrs", {}).get("target")
+                if step:
+                    self._step(step).latencies.append(s["duration"])
+
+    def _step(self, step):
+        if step not in self._stats:
+            self._stats[step] = StepStats(self.keep)
+        return self._stats[step]
+
+    def budget(self, step, default=None, backoff=True):
+        """Seconds the next wait for step may take"""
+        with self._lock:
+            self._load_history()
+            stats = self._step(step)
+            if stats.latencies:
+                budget = max(self.floor, stats.p95() * MARGIN)
+            else:
+                budget = default if default is not None else self.default
+            if backoff:
+                budget *= 2**stats.failures
+            return min(self.ceiling, budget)
+
+    def observe(self, step, seconds, ok):
+        with self._lock:
+            stats = self._step(step)
+            if ok:
+                stats.latencies.append(seconds)
+                stats.failures = 0
+            else:
+                stats.failures += 1
+
+    def until(self, driver, step, condition, default=None):
+        """
+        Wait until condition(driver) is truthy and return its value
+
+        Raises:
+            TimeoutException: If the step's budget runs out, like WebDriverWait
+        """
+        return self._wait(driver, step, condition, self.budget(step, default))
+
+    def _wait(self, driver, step, condition, timeout, backoff=True):
+        waiter = WebDriverWait(
+            driver,
+            timeout,
+            poll_frequency=self.poll,
+            ignored_exceptions=[StaleElementReferenceException],
+        )
+        started = time.perf_counter()
+        timed_out = None
+        with span("wait", target=step, budget=round(timeout, 2)) as wait_span:
+            try:
+                result = waiter.until(condition)
+            except TimeoutException as e:
+                wait_span.outcome = "timeout"
+                timed_out = e
+        if timed_out is None or backoff:
+            self.observe(step, time.perf_counter() - started, ok=timed_out is None)
+        if timed_out is not None:
+            raise timed_out
+        return result
+
+    def settle(self, driver, step, condition=None, default=None):
+        """
+        Wait for condition (network idle by default) without raising
+
+        Replaces fixed sleeps after navigations and clicks: the budget is
+        the learned one without back-off, capped at default (the replaced
+        sleep). Returns whether the condition held within the budget.
+        """
+        timeout = self.budget(step, default, backoff=False)
+        if default is not None:
+            timeout = min(timeout, default)
+        try:
+            self._wait(driver, step, condition or NetworkIdle(), timeout, backoff=False)
+            return True
+        except TimeoutException:
+            print(f"Wait for {step} timed out, continuing anyway...")
+            return False
+
+    def bind(self, driver):
+        return BoundWait(self, driver)
+
+
+class BoundWait:
+    """WaitPolicy methods with the driver filled in"""
+
+    def __init__(self, policy, driver):
+        self.policy = policy
+        self.driver = driver
+
+    def until(self, step, condition, default=None):
+        return self.policy.until(self.driver, step, condition, default)
+
+    def settle(self, step, condition=None, default=None):
+        return self.policy.settle(self.driver, step, condition, default)
+
+
+policy = WaitPolicy()
@@ -1,37 +1,38 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
-    StaleElementReferenceException,
 )
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
 import time
 import os
+from functools import lru_cache
 import requests
 from selenium.webdriver.common.action_chains import ActionChains
 import urllib3
 import warnings
 
+import scrape_metrics
+from download_watcher import DownloadWatcher
+from scrape_metrics import span
+from sogc_http import SOGC_API_URL, fetch_sogc_document, get_session
+from wait_policy import document_ready, policy as wait_policy
+
 # Disable SSL verification warnings - only for debugging purposes
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 warnings.filterwarnings("ignore", message="Unverified HTTPS request")
 
 
-def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=None):
-    """
-    Download data from Swiss Official Gazette of Commerce (SOGC) for a specific UID
+SOGC_SEARCH_URL = "https://www.shab.ch/#!/search/publications"
 
-    Args:
-        uid (str): UID number to search for (default: CHE-236.101.881)
-        output_format (str): Format to download - "pdf", "word", "xml", or "csv"
-        download_dir (str): Directory to save downloaded files
-    """
+
+def prepare_download_dir(download_dir=None):
+    """Resolve the download directory to an absolute path and create it"""
     # Set up download directory
     if download_dir is None:
         download_dir = os.path.join(os.getcwd(), "sogc_downloads")
@@ -45,9 +46,17 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
         os.makedirs(download_dir)
         print(f"Created download directory: {download_dir}")
 
-    if not os.path.exists(download_dir):
-        os.makedirs(download_dir)
+    return download_dir
+
 
+@lru_cache(maxsize=1)
+def chromedriver_path():
+    """Resolve the chromedriver binary once per process"""
+    return ChromeDriverManager().install()
+
+
+def build_chrome_options(download_dir):
+    """Chrome options used for every scraping session"""
     # Configure Chrome options
     chrome_options = Options()
     chrome_options.add_argument("--window-size=1920,1080")
@@ -87,50 +96,124 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
     }
     chrome_options.add_experimental_option("prefs", prefs)
 
+    return chrome_options
+
+
+def create_driver(download_dir):
+    """Launch a headless Chrome that saves downloads into download_dir"""
+    chrome_options = build_chrome_options(download_dir)
+
     # Initialize the WebDriver with WebDriverManager for automatic driver management
-    try:
-        service = Service(ChromeDriverManager().install())
-        print(f"Chrome driver path: {service.path}")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("Chrome driver successfully initialized")
-    except Exception as e:
-        print(f"Error initializing Chrome driver: {e}")
-        # Try a fallback method
+    with span("driver_start") as driver_span:
         try:
-            print("Trying fallback method for Chrome driver initialization")
-            from selenium.webdriver.chrome.service import Service as ChromeService
+            service = Service(chromedriver_path())
+            print(f"Chrome driver path: {service.path}")
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            print("Chrome driver successfully initialized")
+        except Exception as e:
+            print(f"Error initializing Chrome driver: {e}")
+            driver_span.attrs["variant"] = "fallback_service"
+            # Try a fallback method
+            try:
+                print("Trying fallback method for Chrome driver initialization")
+                from selenium.webdriver.chrome.service import Service as ChromeService
 
-            driver = webdriver.Chrome(
-                service=ChromeService(ChromeDriverManager().install()),
-                options=chrome_options,
-            )
-            print("Chrome driver successfully initialized with fallback method")
-        except Exception as e2:
-            print(f"Fallback method also failed: {e2}")
-            raise
-
-    # Define wait
-    wait = WebDriverWait(
-        driver,
-        20,
-        poll_frequency=1,
-        ignored_exceptions=[StaleElementReferenceException],
+                driver = webdriver.Chrome(
+                    service=ChromeService(chromedriver_path()),
+                    options=chrome_options,
+                )
+                print("Chrome driver successfully initialized with fallback method")
+            except Exception as e2:
+                print(f"Fallback method also failed: {e2}")
+                raise
+
+    return driver
+
+
+def set_download_dir(driver, download_dir):
+    """Point an already running Chrome at a different download directory"""
+    driver.execute_cdp_cmd(
+        "Page.setDownloadBehavior",
+        {"behavior": "allow", "downloadPath": download_dir},
     )
 
+
+def download_sogc_data(
+    uid="CHE-236.101.881",
+    output_format="pdf",
+    download_dir=None,
+    pool=None,
+    search_url=SOGC_SEARCH_URL,
+    fast_path=True,
+    api_url=SOGC_API_URL,
+):
+    """
+    Download data from Swiss Official Gazette of Commerce (SOGC) for a specific UID
+
+    Args:
+        uid (str): UID number to search for (default: CHE-236.101.881)
+        output_format (str): Format to download - "pdf", "word", "xml", or "csv"
+        download_dir (str): Directory to save downloaded files
+        pool (DriverPool): Borrow a warm browser from this pool instead of
+            launching (and quitting) a new one
+        search_url (str): SOGC search page, overridable for local stand-ins
+        fast_path (bool): Try the SOGC API over plain HTTP first and only fall
+            back to browser automation if that fails
+        api_url (str): SOGC API used by the fast path
+
+    Returns:
+        Path of the downloaded <uid> file, or None if nothing was downloaded
+    """
+    download_dir = prepare_download_dir(download_dir)
+    target_path = os.path.join(download_dir, f"{uid}.{output_format}")
+
+    with span("lookup", trace=uid, format=output_format) as lookup_span:
+        if fast_path and output_format in ("pdf", "xml"):
+            with span("http_fast_path", variant="sogc_api") as http_span:
+                if fetch_sogc_document(uid, download_dir, output_format, api_url):
+                    lookup_span.attrs["path"] = "http"
+                    return target_path
+                http_span.outcome = "miss"
+            print("Falling back to browser automation...")
+
+        lookup_span.attrs["path"] = "browser"
+        if pool is not None:
+            with pool.session(download_dir) as driver:
+                _search_and_download(driver, uid, download_dir, search_url)
+            print(f"Process completed. Check {download_dir} for downloaded files.")
+        else:
+            driver = create_driver(download_dir)
+            try:
+                _search_and_download(driver, uid, download_dir, search_url)
+            finally:
+                print("Closing browser...")
+                driver.quit()
+                print(f"Process completed. Check {download_dir} for downloaded files.")
+
+        if not os.path.exists(target_path):
+            lookup_span.outcome = "not_found"
+            return None
+        return target_path
+
+
+def _search_and_download(driver, uid, download_dir, search_url=SOGC_SEARCH_URL):
+    """Run the SOGC search for uid in driver and save the hits PDF"""
+    # Explicit waits with learned per-step budgets
+    wait = wait_policy.bind(driver)
+    watcher = None
+
     try:
         print(f"Searching for UID: {uid}")
 
         # Navigate to SOGC search page - this initial load is necessary
         print("Navigating to SOGC search page...")
         try:
-            driver.get("https://www.shab.ch/#!/search/publications")
+            with span("navigate", variant=search_url):
+                driver.get(search_url)
 
-            # Wait for page to load by checking for a common element
-            print("Waiting for page to load...")
-            wait.until(EC.presence_of_element_located((By.XPATH, "//body")))
-            wait.until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
+                # Wait for page to load by checking for a common element
+                print("Waiting for page to load...")
+                wait.until("search_page_load", document_ready)
         except TimeoutException:
             print("Timeout on main URL, trying alternative URL...")
             # Try alternative URLs in sequence
@@ -142,43 +225,47 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
             ]
 
             for alt_url in alternative_urls:
-                try:
-                    print(f"Trying alternative URL: {alt_url}")
-                    driver.get(alt_url)
-                    time.sleep(3)
-
-                    # Check if page loaded successfully
-                    if (
-                        "shab" in driver.current_url
-                        or "zefix" in driver.current_url
-                        or "sogc" in driver.current_url
-                    ):
-                        print("Alternative URL loaded successfully")
-
-                        # Navigate to search page if possible
-                        try:
-                            search_links = driver.find_elements(
-                                By.XPATH,
-                                "//a[contains(@href, 'search') or contains(text(), 'Search') or contains(text(), 'Suche')]",
-                            )
-                            if search_links:
-                                print(
-                                    f"Found {len(search_links)} possible search links"
-                                )
-                                driver.execute_script(
-                                    "arguments[0].click();", search_links[0]
+                with span("navigate", variant=alt_url) as nav_span:
+                    nav_span.outcome = "miss"
+                    try:
+                        print(f"Trying alternative URL: {alt_url}")
+                        driver.get(alt_url)
+                        wait.settle("alternative_url_load", default=3)
+
+                        # Check if page loaded successfully
+                        if (
+                            "shab" in driver.current_url
+                            or "zefix" in driver.current_url
+                            or "sogc" in driver.current_url
+                        ):
+                            print("Alternative URL loaded successfully")
+                            nav_span.outcome = "ok"
+
+                            # Navigate to search page if possible
+                            try:
+                                search_links = driver.find_elements(
+                                    By.XPATH,
+                                    "//a[contains(@href, 'search') or contains(text(), 'Search') or contains(text(), 'Suche')]",
                                 )
-                                time.sleep(2)
-                                break
-                        except Exception as e:
-                            print(f"Error trying to find search links: {e}")
-                except Exception as e:
-                    print(f"Failed to load alternative URL {alt_url}: {e}")
-                    continue
+                                if search_links:
+                                    print(
+                                        f"Found {len(search_links)} possible search links"
+                                    )
+                                    driver.execute_script(
+                                        "arguments[0].click();", search_links[0]
+                                    )
+                                    wait.settle("search_link_click", default=2)
+                                    break
+                            except Exception as e:
+                                print(f"Error trying to find search links: {e}")
+                    except Exception as e:
+                        print(f"Failed to load alternative URL {alt_url}: {e}")
+                        continue
 
         # Wait for the search interface to be visible
         try:
             wait.until(
+                "search_interface",
                 EC.visibility_of_any_elements_located(
                     (
                         By.XPATH,
@@ -215,60 +302,66 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
         ]
 
         for selector in selectors:
-            try:
-                print(f"  Trying selector: {selector}")
-                elements = driver.find_elements(By.XPATH, selector)
-                if elements:
-                    print(f"  Found {len(elements)} elements with selector: {selector}")
-                    uid_input = elements[0]
-                    break
-                else:
-                    print("  No elements found")
-            except Exception as e:
-                print(f"  Error with selector {selector}: {e}")
+            with span("selector", target="uid_input", variant=selector) as selector_span:
+                try:
+                    print(f"  Trying selector: {selector}")
+                    elements = driver.find_elements(By.XPATH, selector)
+                    if elements:
+                        print(f"  Found {len(elements)} elements with selector: {selector}")
+                        uid_input = elements[0]
+                        break
+                    else:
+                        print("  No elements found")
+                        selector_span.outcome = "miss"
+                except Exception as e:
+                    print(f"  Error with selector {selector}: {e}")
+                    selector_span.outcome = "error"
 
         if not uid_input:
             # Try JavaScript as a last resort to find the field
             print("Trying JavaScript to find UID field...")
-            input_found = driver.execute_script("""
-                var input = document.querySelector('input[name="uid"]');
-                if (!input) {
-                    var inputs = document.querySelectorAll('input');
-                    console.log("Total inputs found: " + inputs.length);
+            with span("selector", target="uid_input", variant="javascript") as selector_span:
+                input_found = driver.execute_script("""
+                    var input = document.querySelector('input[name="uid"]');
+                    if (!input) {
+                        var inputs = document.querySelectorAll('input');
+                        console.log("Total inputs found: " + inputs.length);
                     
-                    for (var i = 0; i < inputs.length; i++) {
-                        var currentInput = inputs[i];
-                        var name = currentInput.name || '';
-                        var placeholder = currentInput.placeholder || '';
-                        var id = currentInput.id || '';
+                        for (var i = 0; i < inputs.length; i++) {
+                            var currentInput = inputs[i];
+                            var name = currentInput.name || '';
+                            var placeholder = currentInput.placeholder || '';
+                            var id = currentInput.id || '';
                         
-                        console.log("Input #" + (i+1) + ": " + name + ", " + placeholder + ", " + id);
+                            console.log("Input #" + (i+1) + ": " + name + ", " + placeholder + ", " + id);
                         
-                        if (name.toLowerCase().includes('uid') || 
-                            placeholder.toLowerCase().includes('uid') ||
-                            id.toLowerCase().includes('uid')) {
-                            return { 
-                                found: true,
-                                index: i,
-                                name: name,
-                                placeholder: placeholder,
-                                id: id
-                            };
+                            if (name.toLowerCase().includes('uid') || 
+                                placeholder.toLowerCase().includes('uid') ||
+                                id.toLowerCase().includes('uid')) {
+                                return { 
+                                    found: true,
+                                    index: i,
+                                    name: name,
+                                    placeholder: placeholder,
+                                    id: id
+                                };
+                            }
                         }
+                    } else {
+                        return { 
+                            found: true,
+                            index: -1, 
+                            name: input.name,
+                            placeholder: input.placeholder || '',
+                            id: input.id || ''
+                        };
                     }
-                } else {
-                    return { 
-                        found: true,
-                        index: -1, 
-                        name: input.name,
-                        placeholder: input.placeholder || '',
-                        id: input.id || ''
-                    };
-                }
                 
-                // If we get here, nothing was found
-                return { found: false };
-            """)
+                    // If we get here, nothing was found
+                    return { found: false };
+                """)
+                if not input_found:
+                    selector_span.outcome = "miss"
 
             if not input_found:
                 print("ERROR: Could not find the UID input field")
@@ -280,29 +373,32 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
             print(f"Entering UID: {uid}")
             uid_input.send_keys(uid)
 
-            # Press Enter key to trigger search WITHOUT reloading page
-            print("Pressing Enter to search...")
-            uid_input.send_keys(Keys.ENTER)  # Send Enter directly to input field
+            with span("search", variant="enter_key") as search_span:
+                # Press Enter key to trigger search WITHOUT reloading page
+                print("Pressing Enter to search...")
+                uid_input.send_keys(Keys.ENTER)  # Send Enter directly to input field
 
-            # Wait for search results to appear
-            print("Waiting for search results...")
-            try:
-                # Wait for any indication that results have loaded
-                wait.until(
-                    lambda d: uid in d.page_source
-                    or len(
-                        d.find_elements(
-                            By.XPATH,
-                            "//div[contains(@class, 'hits') or contains(@class, 'result')]",
+                # Wait for search results to appear
+                print("Waiting for search results...")
+                try:
+                    # Wait for any indication that results have loaded
+                    wait.until(
+                        "search_results",
+                        lambda d: uid in d.page_source
+                        or len(
+                            d.find_elements(
+                                By.XPATH,
+                                "//div[contains(@class, 'hits') or contains(@class, 'result')]",
+                            )
                         )
+                        > 0
+                        or "No hits found" in d.page_source
+                    )
+                except TimeoutException:
+                    search_span.outcome = "timeout"
+                    print(
+                        "Timed out waiting for search results, trying alternative methods..."
                     )
-                    > 0
-                    or "No hits found" in d.page_source
-                )
-            except TimeoutException:
-                print(
-                    "Timed out waiting for search results, trying alternative methods..."
-                )
 
             # Verify that search results are displayed
             try:
@@ -322,72 +418,78 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
                     )
 
                     if search_buttons:
-                        print("Clicking search button...")
-                        search_buttons[0].click()
-                        # Wait for results after clicking search button
-                        try:
-                            wait.until(
-                                lambda d: uid in d.page_source
-                                or len(
-                                    d.find_elements(
-                                        By.XPATH,
-                                        "//div[contains(@class, 'hits') or contains(@class, 'result')]",
+                        with span("search", variant="search_button") as search_span:
+                            print("Clicking search button...")
+                            search_buttons[0].click()
+                            # Wait for results after clicking search button
+                            try:
+                                wait.until(
+                                    "search_results",
+                                    lambda d: uid in d.page_source
+                                    or len(
+                                        d.find_elements(
+                                            By.XPATH,
+                                            "//div[contains(@class, 'hits') or contains(@class, 'result')]",
+                                        )
                                     )
+                                    > 0
+                                    or "No hits found" in d.page_source
+                                )
+                            except TimeoutException:
+                                search_span.outcome = "timeout"
+                                print(
+                                    "Timed out waiting for results after clicking search button"
                                 )
-                                > 0
-                                or "No hits found" in d.page_source
-                            )
-                        except TimeoutException:
-                            print(
-                                "Timed out waiting for results after clicking search button"
-                            )
                     else:
                         # Try JavaScript approach as last resort
-                        print("Using JavaScript to trigger search...")
-                        driver.execute_script(
-                            """
-                            // Try to trigger search via form submission
-                            var inputs = document.querySelectorAll('input');
-                            for (var i = 0; i < inputs.length; i++) {
-                                if (inputs[i].value === arguments[0]) {
-                                    var form = inputs[i].closest('form');
-                                    if (form) {
-                                        form.dispatchEvent(new Event('submit', { bubbles: true }));
-                                        return;
+                        with span("search", variant="javascript") as search_span:
+                            print("Using JavaScript to trigger search...")
+                            driver.execute_script(
+                                """
+                                // Try to trigger search via form submission
+                                var inputs = document.querySelectorAll('input');
+                                for (var i = 0; i < inputs.length; i++) {
+                                    if (inputs[i].value === arguments[0]) {
+                                        var form = inputs[i].closest('form');
+                                        if (form) {
+                                            form.dispatchEvent(new Event('submit', { bubbles: true }));
+                                            return;
+                                        }
                                     }
                                 }
-                            }
                             
-                            // If no form, try to click any search button
-                            var buttons = document.querySelectorAll('button');
-                            for (var i = 0; i < buttons.length; i++) {
-                                if (buttons[i].textContent.includes('Search') || 
-                                    buttons[i].textContent.includes('Suche') ||
-                                    buttons[i].className.includes('search')) {
-                                    buttons[i].click();
-                                    return;
+                                // If no form, try to click any search button
+                                var buttons = document.querySelectorAll('button');
+                                for (var i = 0; i < buttons.length; i++) {
+                                    if (buttons[i].textContent.includes('Search') || 
+                                        buttons[i].textContent.includes('Suche') ||
+                                        buttons[i].className.includes('search')) {
+                                        buttons[i].click();
+                                        return;
+                                    }
                                 }
-                            }
-                        """,
-                            uid,
-                        )
-                        # Wait again after JavaScript search trigger
-                        try:
-                            wait.until(
-                                lambda d: uid in d.page_source
-                                or len(
-                                    d.find_elements(
-                                        By.XPATH,
-                                        "//div[contains(@class, 'hits') or contains(@class, 'result')]",
+                            """,
+                                uid,
+                            )
+                            # Wait again after JavaScript search trigger
+                            try:
+                                wait.until(
+                                    "search_results",
+                                    lambda d: uid in d.page_source
+                                    or len(
+                                        d.find_elements(
+                                            By.XPATH,
+                                            "//div[contains(@class, 'hits') or contains(@class, 'result')]",
+                                        )
                                     )
+                                    > 0
+                                    or "No hits found" in d.page_source
+                                )
+                            except TimeoutException:
+                                search_span.outcome = "timeout"
+                                print(
+                                    "Timed out waiting for results after JavaScript search"
                                 )
-                                > 0
-                                or "No hits found" in d.page_source
-                            )
-                        except TimeoutException:
-                            print(
-                                "Timed out waiting for results after JavaScript search"
-                            )
             except Exception as e:
                 print(f"Error checking search results: {e}")
 
@@ -413,151 +515,164 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
                 ]
 
                 for selector in pdf_button_selectors:
-                    pdf_buttons = driver.find_elements(By.XPATH, selector)
-                    if pdf_buttons:
-                        print(f"Found PDF button with selector: {selector}")
-                        pdf_buttons[0].click()
-                        # Wait for a dialog or response after clicking PDF button
-                        try:
-                            wait.until(
-                                lambda d: len(
-                                    d.find_elements(
-                                        By.XPATH,
-                                        "//input[@type='text'] | //div[contains(@class, 'modal')] | //form",
+                    with span("selector", target="pdf_button", variant=selector) as selector_span:
+                        pdf_buttons = driver.find_elements(By.XPATH, selector)
+                        selector_span.outcome = "ok" if pdf_buttons else "miss"
+                        if pdf_buttons:
+                            print(f"Found PDF button with selector: {selector}")
+                            pdf_buttons[0].click()
+                            # Wait for a dialog or response after clicking PDF button
+                            try:
+                                wait.until(
+                                    "pdf_dialog",
+                                    lambda d: len(
+                                        d.find_elements(
+                                            By.XPATH,
+                                            "//input[@type='text'] | //div[contains(@class, 'modal')] | //form",
+                                        )
                                     )
+                                    > 0
                                 )
-                                > 0
-                            )
-                        except TimeoutException:
-                            print("No dialog appeared after clicking PDF button")
-                        pdf_found = True
-                        break
+                            except TimeoutException:
+                                print("No dialog appeared after clicking PDF button")
+                                selector_span.outcome = "no_dialog"
+                            pdf_found = True
+                            break
             except Exception as e:
                 print(f"Error finding PDF button with selectors: {e}")
 
             # If direct approach fails, try JavaScript with more detailed debugging
             if not pdf_found:
                 print("Using JavaScript to find and click PDF button...")
-                js_result = driver.execute_script("""
-                    // First log all buttons for debugging
-                    var allButtons = document.querySelectorAll('button');
-                    console.log("Total buttons found: " + allButtons.length);
+                with span("click", target="pdf_button", variant="javascript") as click_span:
+                    js_result = driver.execute_script("""
+                        // First log all buttons for debugging
+                        var allButtons = document.querySelectorAll('button');
+                        console.log("Total buttons found: " + allButtons.length);
                     
-                    var buttonTexts = [];
-                    for (var i = 0; i < allButtons.length; i++) {
-                        var btnText = allButtons[i].textContent.trim();
-                        buttonTexts.push(btnText);
-                        console.log("Button " + i + ": '" + btnText + "'");
-                    }
+                        var buttonTexts = [];
+                        for (var i = 0; i < allButtons.length; i++) {
+                            var btnText = allButtons[i].textContent.trim();
+                            buttonTexts.push(btnText);
+                            console.log("Button " + i + ": '" + btnText + "'");
+                        }
                     
-                    // First look for exact match on button text
-                    for (var i = 0; i < allButtons.length; i++) {
-                        var btnText = allButtons[i].textContent.trim();
-                        if (btnText === "Hits as PDF") {
-                            console.log("Found exact match PDF button!");
-                            allButtons[i].click();
-                            return "PDF button clicked: " + btnText;
+                        // First look for exact match on button text
+                        for (var i = 0; i < allButtons.length; i++) {
+                            var btnText = allButtons[i].textContent.trim();
+                            if (btnText === "Hits as PDF") {
+                                console.log("Found exact match PDF button!");
+                                allButtons[i].click();
+                                return "PDF button clicked: " + btnText;
+                            }
                         }
-                    }
                     
-                    // If not found, try partial match
-                    for (var i = 0; i < allButtons.length; i++) {
-                        var btn = allButtons[i];
-                        if (btn.textContent.indexOf("PDF") >= 0) {
-                            console.log("Found button with 'PDF' in text: " + btn.textContent);
-                            btn.click();
-                            return "Button with PDF text clicked: " + btn.textContent;
+                        // If not found, try partial match
+                        for (var i = 0; i < allButtons.length; i++) {
+                            var btn = allButtons[i];
+                            if (btn.textContent.indexOf("PDF") >= 0) {
+                                console.log("Found button with 'PDF' in text: " + btn.textContent);
+                                btn.click();
+                                return "Button with PDF text clicked: " + btn.textContent;
+                            }
                         }
-                    }
                     
-                    // Log what buttons we found for debugging
-                    return "No PDF button found. Available buttons: " + JSON.stringify(buttonTexts);
-                """)
+                        // Log what buttons we found for debugging
+                        return "No PDF button found. Available buttons: " + JSON.stringify(buttonTexts);
+                    """)
 
-                print(f"JavaScript PDF button click result: {js_result}")
+                    print(f"JavaScript PDF button click result: {js_result}")
 
-                # Wait for dialog to appear after JS button click
-                try:
-                    wait.until(
-                        lambda d: len(
-                            d.find_elements(
-                                By.XPATH,
-                                "//input[@type='text'] | //div[contains(@class, 'modal')] | //form",
+                    # Wait for dialog to appear after JS button click
+                    try:
+                        wait.until(
+                            "pdf_dialog",
+                            lambda d: len(
+                                d.find_elements(
+                                    By.XPATH,
+                                    "//input[@type='text'] | //div[contains(@class, 'modal')] | //form",
+                                )
                             )
+                            > 0
                         )
-                        > 0
-                    )
-                    pdf_found = "clicked" in js_result
-                except TimeoutException:
-                    print("No dialog appeared after JavaScript PDF button click")
+                        pdf_found = "clicked" in js_result
+                    except TimeoutException:
+                        print("No dialog appeared after JavaScript PDF button click")
+                    click_span.outcome = "ok" if pdf_found else "miss"
 
                 if not pdf_found:
                     # If we still can't find the button, try clicking anything that might be PDF-related
                     print("Trying to find any PDF-related elements...")
-                    pdf_elements_js = driver.execute_script("""
-                        // Try to find any element that might be related to PDF
-                        var allElements = document.querySelectorAll('*');
-                        for (var i = 0; i < allElements.length; i++) {
-                            var element = allElements[i];
-                            var text = element.textContent.trim();
-                            var className = element.className || '';
-                            var id = element.id || '';
+                    with span("click", target="pdf_button", variant="any_pdf_element") as click_span:
+                        pdf_elements_js = driver.execute_script("""
+                            // Try to find any element that might be related to PDF
+                            var allElements = document.querySelectorAll('*');
+                            for (var i = 0; i < allElements.length; i++) {
+                                var element = allElements[i];
+                                var text = element.textContent.trim();
+                                var className = element.className || '';
+                                var id = element.id || '';
                             
-                            if ((text.indexOf('PDF') >= 0 || 
-                                className.indexOf('pdf') >= 0 || 
-                                id.indexOf('pdf') >= 0) && 
-                                element.offsetParent !== null) { // Check if element is visible
-                                console.log("Found PDF element: ", text, className, id);
+                                if ((text.indexOf('PDF') >= 0 || 
+                                    className.indexOf('pdf') >= 0 || 
+                                    id.indexOf('pdf') >= 0) && 
+                                    element.offsetParent !== null) { // Check if element is visible
+                                    console.log("Found PDF element: ", text, className, id);
                                 
-                                // Try to click it if it's clickable
-                                if (element.tagName === 'BUTTON' || 
-                                    element.tagName === 'A' || 
-                                    element.tagName === 'INPUT' || 
-                                    element.onclick) {
-                                    element.click();
-                                    return "Clicked PDF-related element: " + text;
-                                }
+                                    // Try to click it if it's clickable
+                                    if (element.tagName === 'BUTTON' || 
+                                        element.tagName === 'A' || 
+                                        element.tagName === 'INPUT' || 
+                                        element.onclick) {
+                                        element.click();
+                                        return "Clicked PDF-related element: " + text;
+                                    }
                                 
-                                // Otherwise try to find a parent or nearby element that's clickable
-                                var parent = element.parentElement;
-                                if (parent && 
-                                    (parent.tagName === 'BUTTON' || 
-                                     parent.tagName === 'A' || 
-                                     parent.onclick)) {
-                                    parent.click();
-                                    return "Clicked parent of PDF element: " + parent.textContent;
+                                    // Otherwise try to find a parent or nearby element that's clickable
+                                    var parent = element.parentElement;
+                                    if (parent && 
+                                        (parent.tagName === 'BUTTON' || 
+                                         parent.tagName === 'A' || 
+                                         parent.onclick)) {
+                                        parent.click();
+                                        return "Clicked parent of PDF element: " + parent.textContent;
+                                    }
                                 }
                             }
-                        }
-                        return "No PDF-related elements found";
-                    """)
-                    print(f"PDF elements search result: {pdf_elements_js}")
+                            return "No PDF-related elements found";
+                        """)
+                        print(f"PDF elements search result: {pdf_elements_js}")
 
-                    # Wait for dialog after final PDF click attempt
-                    try:
-                        wait.until(
-                            lambda d: len(
-                                d.find_elements(
-                                    By.XPATH,
-                                    "//input[@type='text'] | //div[contains(@class, 'modal')] | //form",
+                        # Wait for dialog after final PDF click attempt
+                        try:
+                            wait.until(
+                                "pdf_dialog",
+                                lambda d: len(
+                                    d.find_elements(
+                                        By.XPATH,
+                                        "//input[@type='text'] | //div[contains(@class, 'modal')] | //form",
+                                    )
                                 )
+                                > 0
                             )
-                            > 0
-                        )
-                        pdf_found = "Clicked" in pdf_elements_js
-                    except TimeoutException:
-                        print(
-                            "No dialog appeared after final PDF element click attempt"
-                        )
+                            pdf_found = "Clicked" in pdf_elements_js
+                        except TimeoutException:
+                            print(
+                                "No dialog appeared after final PDF element click attempt"
+                            )
+                        click_span.outcome = "ok" if pdf_found else "miss"
 
             # Handle PDF save dialog if it appears
             if pdf_found:
+                # Start watching before anything can trigger the download
+                watcher = DownloadWatcher(download_dir, suffix=".pdf")
                 print("Looking for PDF save dialog...")
                 try:
                     # Wait for the dialog to appear
                     print("Waiting for PDF dialog to appear...")
                     try:
                         wait.until(
+                            "save_dialog",
                             EC.presence_of_element_located(
                                 (
                                     By.XPATH,
@@ -608,134 +723,114 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
 
                     # Most direct approach - try to fill the input using JavaScript and simulate user interaction
                     print("Attempting to set document name and click button...")
-                    success = driver.execute_script("""
-                        try {
-                            // First find all visible inputs
-                            var visibleInputs = Array.from(document.querySelectorAll('input'))
-                                .filter(input => input.offsetParent !== null && input.type === 'text');
+                    with span("click", target="dialog_submit", variant="javascript") as click_span:
+                        success = driver.execute_script("""
+                            try {
+                                // First find all visible inputs
+                                var visibleInputs = Array.from(document.querySelectorAll('input'))
+                                    .filter(input => input.offsetParent !== null && input.type === 'text');
                             
-                            if (visibleInputs.length === 0) {
-                                console.log("No visible text inputs found");
-                                return "No visible text inputs found";
-                            }
+                                if (visibleInputs.length === 0) {
+                                    console.log("No visible text inputs found");
+                                    return "No visible text inputs found";
+                                }
                             
-                            // Use the first visible text input - likely our document name field
-                            var inputField = visibleInputs[0];
-                            console.log("Found text input: " + inputField.outerHTML);
+                                // Use the first visible text input - likely our document name field
+                                var inputField = visibleInputs[0];
+                                console.log("Found text input: " + inputField.outerHTML);
                             
-                            // Clear it and set value to "aaa"
-                            inputField.value = "";
-                            inputField.focus();
+                                // Clear it and set value to "aaa"
+                                inputField.value = "";
+                                inputField.focus();
                             
-                            // Simulate typing
-                            var event = new Event('input', { bubbles: true });
-                            inputField.value = "aaa";
-                            inputField.dispatchEvent(event);
-                            inputField.dispatchEvent(new Event('change', { bubbles: true }));
-                            console.log("Set input value to 'aaa'");
+                                // Simulate typing
+                                var event = new Event('input', { bubbles: true });
+                                inputField.value = "aaa";
+                                inputField.dispatchEvent(event);
+                                inputField.dispatchEvent(new Event('change', { bubbles: true }));
+                                console.log("Set input value to 'aaa'");
                             
-                            // Find the "Hits as PDF" button in modal footer
-                            var footers = document.querySelectorAll('.modal-footer');
-                            if (footers.length === 0) {
-                                console.log("No modal footers found");
+                                // Find the "Hits as PDF" button in modal footer
+                                var footers = document.querySelectorAll('.modal-footer');
+                                if (footers.length === 0) {
+                                    console.log("No modal footers found");
                                 
-                                // Try to find any buttons with the text
-                                var allButtons = Array.from(document.querySelectorAll('button'))
-                                    .filter(b => b.offsetParent !== null && 
-                                            (b.textContent.trim() === 'Hits as PDF' || 
-                                             b.classList.contains('btn-primary')));
+                                    // Try to find any buttons with the text
+                                    var allButtons = Array.from(document.querySelectorAll('button'))
+                                        .filter(b => b.offsetParent !== null && 
+                                                (b.textContent.trim() === 'Hits as PDF' || 
+                                                 b.classList.contains('btn-primary')));
                                 
-                                if (allButtons.length > 0) {
-                                    console.log("Found button by text: " + allButtons[0].outerHTML);
+                                    if (allButtons.length > 0) {
+                                        console.log("Found button by text: " + allButtons[0].outerHTML);
                                     
-                                    // Click with timeout to ensure input is processed
-                                    setTimeout(function() {
-                                        allButtons[0].click();
-                                        console.log("Clicked button");
-                                    }, 500);
+                                        // Click with timeout to ensure input is processed
+                                        setTimeout(function() {
+                                            allButtons[0].click();
+                                            console.log("Clicked button");
+                                        }, 500);
                                     
-                                    return "Found and clicked button by text";
-                                }
+                                        return "Found and clicked button by text";
+                                    }
                                 
-                                return "Could not find footer or button";
-                            }
+                                    return "Could not find footer or button";
+                                }
                             
-                            // Find button in footer
-                            var pdfButton = null;
-                            var buttons = footers[0].querySelectorAll('button');
-                            for (var i = 0; i < buttons.length; i++) {
-                                var btn = buttons[i];
-                                if (btn.textContent.trim() === 'Hits as PDF') {
-                                    pdfButton = btn;
-                                    break;
+                                // Find button in footer
+                                var pdfButton = null;
+                                var buttons = footers[0].querySelectorAll('button');
+                                for (var i = 0; i < buttons.length; i++) {
+                                    var btn = buttons[i];
+                                    if (btn.textContent.trim() === 'Hits as PDF') {
+                                        pdfButton = btn;
+                                        break;
+                                    }
                                 }
-                            }
                             
-                            if (!pdfButton) {
-                                console.log("No 'Hits as PDF' button found in footer");
-                                // Try primary button
-                                var primaryButtons = footers[0].querySelectorAll('.btn-primary');
-                                if (primaryButtons.length > 0) {
-                                    pdfButton = primaryButtons[0];
-                                    console.log("Using primary button instead");
+                                if (!pdfButton) {
+                                    console.log("No 'Hits as PDF' button found in footer");
+                                    // Try primary button
+                                    var primaryButtons = footers[0].querySelectorAll('.btn-primary');
+                                    if (primaryButtons.length > 0) {
+                                        pdfButton = primaryButtons[0];
+                                        console.log("Using primary button instead");
+                                    }
                                 }
-                            }
                             
-                            if (pdfButton) {
-                                console.log("Found button: " + pdfButton.outerHTML);
+                                if (pdfButton) {
+                                    console.log("Found button: " + pdfButton.outerHTML);
                                 
-                                // Click with timeout to ensure input is processed
-                                setTimeout(function() {
-                                    pdfButton.click();
-                                    console.log("Clicked button");
-                                }, 500);
+                                    // Click with timeout to ensure input is processed
+                                    setTimeout(function() {
+                                        pdfButton.click();
+                                        console.log("Clicked button");
+                                    }, 500);
                                 
-                                return "Input filled and button clicked";
-                            }
+                                    return "Input filled and button clicked";
+                                }
                             
-                            return "Could not find PDF button";
-                        } catch (e) {
-                            console.error("Error in JavaScript: " + e);
-                            return "Error: " + e.message;
-                        }
-                    """)
+                                return "Could not find PDF button";
+                            } catch (e) {
+                                console.error("Error in JavaScript: " + e);
+                                return "Error: " + e.message;
+                            }
+                        """)
+                        if "clicked" not in str(success):
+                            click_span.outcome = "miss"
 
                     print(f"JavaScript result: {success}")
 
-                    # Wait for download to start - check for new PDF files
+                    # Wait for the download to land in the directory
                     print("Waiting for download to start...")
-                    download_started = False
                     max_wait = 30  # Maximum wait time in seconds
-                    start_time = time.time()
-
-                    while time.time() - start_time < max_wait and not download_started:
-                        # Check if any PDF files appear in the download directory
-                        pdf_files = [
-                            f for f in os.listdir(download_dir) if f.endswith(".pdf")
-                        ]
-                        recent_pdfs = [
-                            f
-                            for f in pdf_files
-                            if os.path.getctime(os.path.join(download_dir, f))
-                            > start_time
-                        ]
-
-                        if recent_pdfs:
-                            download_started = True
-                            print("Download started!")
-                            break
-
-                        # Check if there's a .crdownload or .part file indicating download in progress
-                        temp_files = [
-                            f
-                            for f in os.listdir(download_dir)
-                            if f.endswith(".crdownload") or f.endswith(".part")
-                        ]
-                        if temp_files:
-                            print("Download in progress...")
-
-                        # Short pause before checking again
-                        time.sleep(1)
+                    with span("download_wait", variant="dialog_javascript") as wait_span:
+                        download_started = watcher.wait(timeout=max_wait) is not None
+                        if not download_started:
+                            wait_span.outcome = "timeout"
+                    if download_started:
+                        print("Download started!")
+                    elif watcher.in_progress():
+                        print("Download in progress...")
 
                     if not download_started:
                         # Fallback approach - try to use direct selenium WebDriver actions
@@ -770,106 +865,38 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
                                     print("Clicked button using direct WebDriver")
 
                                     # Wait for the download to start
-                                    start_time = time.time()
-                                    while (
-                                        time.time() - start_time < max_wait
-                                        and not download_started
-                                    ):
-                                        pdf_files = [
-                                            f
-                                            for f in os.listdir(download_dir)
-                                            if f.endswith(".pdf")
-                                        ]
-                                        recent_pdfs = [
-                                            f
-                                            for f in pdf_files
-                                            if os.path.getctime(
-                                                os.path.join(download_dir, f)
-                                            )
-                                            > start_time
-                                        ]
-
-                                        if recent_pdfs:
+                                    with span("download_wait", variant="fallback_webdriver") as wait_span:
+                                        if watcher.wait(timeout=max_wait):
                                             download_started = True
-                                            print(
-                                                "Download started after fallback method!"
-                                            )
-                                            break
-
-                                        time.sleep(1)
+                                            print("Download started after fallback method!")
+                                        else:
+                                            wait_span.outcome = "timeout"
                         except Exception as e:
                             print(f"Fallback method failed: {e}")
 
                 except Exception as e:
                     print(f"Error handling save dialog: {e}")
 
-                # Wait for download to complete by checking for .part or .crdownload files to disappear
+                # Wait for the download to complete (resolves immediately if it already did)
                 print("Waiting for PDF download to complete...")
                 max_wait_time = 60  # Maximum time to wait for download (seconds)
-                start_time = time.time()
-                download_complete = False
-
-                while (
-                    time.time() - start_time < max_wait_time and not download_complete
-                ):
-                    # Check for temporary download files
-                    temp_files = [
-                        f
-                        for f in os.listdir(download_dir)
-                        if f.endswith(".crdownload") or f.endswith(".part")
-                    ]
-
-                    if not temp_files:
-                        # No temp files means either download completed or hasn't started
-                        # Check if any new PDFs appeared since we started
-                        pdf_files = [
-                            f for f in os.listdir(download_dir) if f.endswith(".pdf")
-                        ]
-                        recent_pdfs = [
-                            f
-                            for f in pdf_files
-                            if os.path.getctime(os.path.join(download_dir, f))
-                            > start_time - max_wait_time
-                        ]  # Check for files created after we started this process
-
-                        if recent_pdfs:
-                            download_complete = True
-                            break
-
-                    # Short pause before checking again
-                    time.sleep(1)
-
-                # Final check for downloaded PDFs
-                pdf_files = [f for f in os.listdir(download_dir) if f.endswith(".pdf")]
-                recent_pdfs = [
-                    f
-                    for f in pdf_files
-                    if os.path.getctime(os.path.join(download_dir, f))
-                    > time.time() - max_wait_time
-                ]
-
-                if recent_pdfs:
-                    print("Successfully downloaded PDF files:")
-                    for file in recent_pdfs:
-                        print(f"- {file}")
-
-                    # Rename the last downloaded PDF to UID.pdf if it exists
-                    if recent_pdfs:
-                        latest_pdf = max(
-                            recent_pdfs,
-                            key=lambda f: os.path.getctime(
-                                os.path.join(download_dir, f)
-                            ),
-                        )
-                        target_filename = f"{uid}.pdf"
-                        source_path = os.path.join(download_dir, latest_pdf)
-                        target_path = os.path.join(download_dir, target_filename)
-
-                        try:
-                            os.rename(source_path, target_path)
-                            print(f"Renamed '{latest_pdf}' to '{target_filename}'")
-                        except Exception as e:
-                            print(f"Error renaming PDF file: {e}")
+                with span("download_wait", variant="completion") as wait_span:
+                    downloaded = watcher.wait(timeout=max_wait_time)
+                    if not downloaded:
+                        wait_span.outcome = "timeout"
+
+                if downloaded:
+                    latest_pdf = os.path.basename(downloaded)
+                    print(f"Successfully downloaded PDF file: {latest_pdf}")
+
+                    # Rename the downloaded PDF to UID.pdf
+                    target_filename = f"{uid}.pdf"
+                    target_path = os.path.join(download_dir, target_filename)
+                    try:
+                        os.rename(downloaded, target_path)
+                        print(f"Renamed '{latest_pdf}' to '{target_filename}'")
+                    except Exception as e:
+                        print(f"Error renaming PDF file: {e}")
                 else:
                     print("No PDF files were downloaded")
 
@@ -890,17 +917,23 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
                         if download_url:
                             print(f"Found potential download URL: {download_url}")
                             pdf_path = os.path.join(download_dir, f"{uid}.pdf")
-                            if download_file_with_requests(download_url, pdf_path):
-                                print(f"Successfully downloaded PDF to {pdf_path}")
+                            with span("direct_download", variant="page_link") as direct_span:
+                                if download_file_with_requests(download_url, pdf_path):
+                                    print(f"Successfully downloaded PDF to {pdf_path}")
+                                else:
+                                    direct_span.outcome = "miss"
                         else:
                             # No direct link found, try constructing a URL
                             print("No direct link found, trying constructed URL...")
                             constructed_url = f"https://www.shab.ch/shab/api/publications/uid/{uid}/pdf"
                             pdf_path = os.path.join(download_dir, f"{uid}.pdf")
-                            if download_file_with_requests(constructed_url, pdf_path):
-                                print(
-                                    f"Successfully downloaded PDF from constructed URL to {pdf_path}"
-                                )
+                            with span("direct_download", variant="constructed_url") as direct_span:
+                                if download_file_with_requests(constructed_url, pdf_path):
+                                    print(
+                                        f"Successfully downloaded PDF from constructed URL to {pdf_path}"
+                                    )
+                                else:
+                                    direct_span.outcome = "miss"
                     except Exception as e:
                         print(f"Direct download attempt failed: {e}")
 
@@ -915,9 +948,8 @@ def download_sogc_data(uid="CHE-236.101.881", output_format="pdf", download_dir=
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        print("Closing browser...")
-        driver.quit()
-        print(f"Process completed. Check {download_dir} for downloaded files.")
+        if watcher is not None:
+            watcher.close()
 
 
 def download_file_with_requests(url, save_path, attempt=1, max_attempts=3):
@@ -930,7 +962,7 @@ def download_file_with_requests(url, save_path, attempt=1, max_attempts=3):
 
     try:
         print(f"Downloading {url} using requests (attempt {attempt}/{max_attempts})...")
-        response = requests.get(
+        response = get_session().get(
             url, headers=headers, stream=True, verify=False, timeout=30
         )
         response.raise_for_status()
@@ -945,7 +977,7 @@ def download_file_with_requests(url, save_path, attempt=1, max_attempts=3):
         print(f"Download error: {e}")
         if attempt < max_attempts:
             print(f"Retrying ({attempt + 1}/{max_attempts})...")
-            time.sleep(2)
+            scrape_metrics.sleep(2, "direct_download_retry")
             return download_file_with_requests(
                 url, save_path, attempt + 1, max_attempts
             )
@@ -958,96 +990,90 @@ def try_zefix_lookup(driver, uid, download_dir):
     """
     Try to lookup a company on Zefix as a fallback
     """
-    try:
-        print("Attempting Zefix lookup...")
-        driver.get("https://www.zefix.ch/en/search/entity/welcome")
-        time.sleep(3)
-
-        # Check if we need to accept cookies
+    wait = wait_policy.bind(driver)
+    with span("zefix", variant="zefix") as zefix_span:
+        zefix_span.outcome = "miss"
         try:
-            cookie_buttons = driver.find_elements(
-                By.XPATH,
-                "//button[contains(text(), 'Accept') or contains(text(), 'Akzeptieren') or contains(@id, 'cookie')]",
-            )
-            if cookie_buttons:
-                cookie_buttons[0].click()
-                time.sleep(1)
-        except Exception:
-            pass
-
-        # Try to find the UID search field
-        uid_inputs = driver.find_elements(
-            By.XPATH, "//input[contains(@placeholder, 'UID') or contains(@id, 'uid')]"
-        )
-        if uid_inputs:
-            print("Found UID input on Zefix")
-            uid_inputs[0].clear()
-            uid_inputs[0].send_keys(uid)
-
-            # Find and click search button
-            search_buttons = driver.find_elements(
-                By.XPATH,
-                "//button[contains(text(), 'Search') or contains(@type, 'submit') or contains(@class, 'search')]",
-            )
-            if search_buttons:
-                search_buttons[0].click()
-                time.sleep(5)
+            print("Attempting Zefix lookup...")
+            driver.get("https://www.zefix.ch/en/search/entity/welcome")
+            wait.settle("zefix_page_load", default=3)
 
-                # Check for results
-                result_links = driver.find_elements(
+            # Check if we need to accept cookies
+            try:
+                cookie_buttons = driver.find_elements(
                     By.XPATH,
-                    "//a[contains(@class, 'detail') or contains(@href, 'detail')]",
+                    "//button[contains(text(), 'Accept') or contains(text(), 'Akzeptieren') or contains(@id, 'cookie')]",
                 )
-                if result_links:
-                    print("Found company in Zefix results")
-                    result_links[0].click()
-                    time.sleep(3)
+                if cookie_buttons:
+                    cookie_buttons[0].click()
+                    wait.settle(
+                        "zefix_cookie_banner",
+                        EC.invisibility_of_element(cookie_buttons[0]),
+                        default=1,
+                    )
+            except Exception:
+                pass
 
-                    # Try to find extract or history button
-                    extract_buttons = driver.find_elements(
-                        By.XPATH,
-                        "//button[contains(text(), 'Extract') or contains(text(), 'History') or contains(text(), 'PDF')]",
+            # Try to find the UID search field
+            uid_inputs = driver.find_elements(
+                By.XPATH, "//input[contains(@placeholder, 'UID') or contains(@id, 'uid')]"
+            )
+            if uid_inputs:
+                print("Found UID input on Zefix")
+                uid_inputs[0].clear()
+                uid_inputs[0].send_keys(uid)
+
+                # Find and click search button
+                search_buttons = driver.find_elements(
+                    By.XPATH,
+                    "//button[contains(text(), 'Search') or contains(@type, 'submit') or contains(@class, 'search')]",
+                )
+                if search_buttons:
+                    search_buttons[0].click()
+                    result_xpath = (
+                        "//a[contains(@class, 'detail') or contains(@href, 'detail')]"
                     )
-                    if extract_buttons:
-                        extract_buttons[0].click()
-                        time.sleep(2)
-
-                        # Wait for download to start
-                        start_time = time.time()
-                        max_wait = 30
-                        while time.time() - start_time < max_wait:
-                            pdf_files = [
-                                f
-                                for f in os.listdir(download_dir)
-                                if f.endswith(".pdf")
-                            ]
-                            recent_pdfs = [
-                                f
-                                for f in pdf_files
-                                if os.path.getctime(os.path.join(download_dir, f))
-                                > start_time
-                            ]
-                            if recent_pdfs:
-                                latest_pdf = max(
-                                    recent_pdfs,
-                                    key=lambda f: os.path.getctime(
-                                        os.path.join(download_dir, f)
-                                    ),
-                                )
+                    wait.settle(
+                        "zefix_search_results",
+                        lambda d: d.find_elements(By.XPATH, result_xpath),
+                        default=5,
+                    )
+
+                    # Check for results
+                    result_links = driver.find_elements(By.XPATH, result_xpath)
+                    if result_links:
+                        print("Found company in Zefix results")
+                        result_links[0].click()
+                        extract_xpath = "//button[contains(text(), 'Extract') or contains(text(), 'History') or contains(text(), 'PDF')]"
+                        wait.settle(
+                            "zefix_detail_page",
+                            lambda d: d.find_elements(By.XPATH, extract_xpath),
+                            default=3,
+                        )
+
+                        # Try to find extract or history button
+                        extract_buttons = driver.find_elements(By.XPATH, extract_xpath)
+                        if extract_buttons:
+                            with DownloadWatcher(download_dir, suffix=".pdf") as watcher:
+                                extract_buttons[0].click()
+                                with span("download_wait", variant="zefix") as wait_span:
+                                    downloaded = watcher.wait(timeout=32)
+                                    if not downloaded:
+                                        wait_span.outcome = "timeout"
+
+                            if downloaded:
                                 target_path = os.path.join(download_dir, f"{uid}.pdf")
-                                os.rename(
-                                    os.path.join(download_dir, latest_pdf), target_path
-                                )
+                                os.rename(downloaded, target_path)
                                 print(
                                     f"Successfully downloaded and renamed Zefix PDF to {target_path}"
                                 )
+                                zefix_span.outcome = "ok"
                                 return True
-                            time.sleep(1)
 
-        return False
-    except Exception as e:
-        print(f"Zefix lookup failed: {e}")
-        return False
+            return False
+        except Exception as e:
+            print(f"Zefix lookup failed: {e}")
+            return False
 
 
 if __name__ == "__main__":